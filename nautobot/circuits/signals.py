@@ -8,7 +8,7 @@ from django.utils import timezone
 
 from .models import Circuit, CircuitTermination
 from nautobot.dcim.models import CablePath
-from nautobot.dcim.signals import create_cablepath
+from nautobot.dcim.signals import retrace_cablepath
 
 
 def rebuild_paths_circuits(obj):
@@ -26,9 +26,7 @@ def rebuild_paths_circuits(obj):
     with transaction.atomic():
         for cp in cable_paths:
             invalidate_obj(cp.origin)
-            cp.delete()
-            # Prevent looping back to rebuild_paths during the atomic transaction.
-            create_cablepath(cp.origin, rebuild=False)
+            retrace_cablepath(cp, obj)
 
 
 @receiver((post_save, post_delete), sender=CircuitTermination)
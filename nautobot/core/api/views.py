@@ -5,6 +5,7 @@ from collections import OrderedDict
 from django import __version__ as DJANGO_VERSION
 from django.apps import apps
 from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
 from django.core.exceptions import ObjectDoesNotExist
 from django.http.response import HttpResponseBadRequest
 from django.db import transaction
@@ -16,12 +17,11 @@ from rest_framework.reverse import reverse
 from rest_framework.views import APIView
 from rest_framework.viewsets import ModelViewSet as ModelViewSet_
 from rest_framework.permissions import AllowAny, IsAuthenticated
-from rest_framework.exceptions import PermissionDenied, ParseError
+from rest_framework.exceptions import PermissionDenied, ParseError, ValidationError
 from drf_yasg.openapi import Schema, TYPE_OBJECT, TYPE_ARRAY
 from drf_yasg.utils import swagger_auto_schema
 from rq.worker import Worker
 
-from graphql import get_default_backend
 from graphql.execution import ExecutionResult
 from graphql.type.schema import GraphQLSchema
 from graphql.execution.middleware import MiddlewareManager
@@ -30,6 +30,9 @@ from graphene_django.views import GraphQLView, instantiate_middleware, HttpError
 
 from nautobot.core.api import BulkOperationSerializer
 from nautobot.core.api.exceptions import SerializerNotFound
+from nautobot.core.graphql.documents import CachedDocumentBackend, get_persisted_query, PersistedQueryError
+from nautobot.core.graphql.limits import check_query_limits, QueryRejectedError
+from nautobot.utilities.exceptions import RQWorkerNotRunningException
 from nautobot.utilities.api import get_serializer_for_model
 from . import serializers
 
@@ -170,6 +173,43 @@ class ModelViewSet(BulkUpdateModelMixin, BulkDestroyModelMixin, ModelViewSet_):
 
         return super().get_queryset()
 
+    def list(self, request, *args, **kwargs):
+        # Export all of the matching objects in the background, rather than listing a page of them
+        if "export" in request.GET:
+            return self._enqueue_export(request)
+
+        return super().list(request, *args, **kwargs)
+
+    def _enqueue_export(self, request):
+        """
+        Enqueue an export of the objects matching the request's filters, as YAML or CSV or by the export template
+        named by the `export` query parameter, and return the JobResult of the export with status 202. The exported
+        file may be downloaded from the JobResult's `export` endpoint once the export has completed.
+        """
+        from nautobot.extras.api.serializers import JobResultSerializer
+        from nautobot.extras.exports import enqueue_export, get_export_filename
+        from nautobot.extras.models import ExportTemplate
+
+        model = self.queryset.model
+        export_template = None
+        if request.GET["export"]:
+            try:
+                export_template = ExportTemplate.objects.get(
+                    content_type=ContentType.objects.get_for_model(model), name=request.GET["export"]
+                )
+            except ExportTemplate.DoesNotExist:
+                raise ValidationError({"export": f"No export template named {request.GET['export']} was found."})
+        elif get_export_filename(model) is None:
+            raise ValidationError(
+                {"export": f"Export of {model._meta.verbose_name_plural} requires an export template."}
+            )
+        if not Worker.count(get_connection("default")):
+            raise RQWorkerNotRunningException()
+
+        job_result = enqueue_export(self.filter_queryset(self.get_queryset()), request.user, export_template)
+        serializer = JobResultSerializer(job_result, context={"request": request})
+        return Response(serializer.data, status=status.HTTP_202_ACCEPTED)
+
     def initialize_request(self, request, *args, **kwargs):
         # Check if brief=True has been passed
         if request.method == "GET" and request.GET.get("brief"):
@@ -376,7 +416,7 @@ class GraphQLDRFAPIView(APIView):
             schema = graphene_settings.SCHEMA
 
         if backend is None:
-            backend = get_default_backend()
+            backend = CachedDocumentBackend()
 
         if middleware is None:
             middleware = graphene_settings.MIDDLEWARE
@@ -446,6 +486,11 @@ class GraphQLDRFAPIView(APIView):
         """
         query, variables, operation_name, id = GraphQLView.get_graphql_params(request, data)
 
+        try:
+            query = get_persisted_query(self.graphql_schema, query, data.get("extensions"))
+        except PersistedQueryError as e:
+            return {"errors": [GraphQLView.format_error(e)]}, 400
+
         execution_result = self.execute_graphql_request(request, data, query, variables, operation_name)
 
         status_code = 200
@@ -456,7 +501,7 @@ class GraphQLDRFAPIView(APIView):
                 response["errors"] = [GraphQLView.format_error(e) for e in execution_result.errors]
 
             if execution_result.invalid:
-                status_code = 400
+                status_code = getattr(execution_result.errors[0], "status_code", 400)
             else:
                 response["data"] = execution_result.data
 
@@ -517,6 +562,11 @@ class GraphQLDRFAPIView(APIView):
                 HttpResponseBadRequest(f"'{operation_type}' is not a supported operation, Only query are supported.")
             )
 
+        try:
+            check_query_limits(self.graphql_schema, document.document_ast, operation_name, request, variables)
+        except QueryRejectedError as e:
+            return ExecutionResult(errors=[e], invalid=True)
+
         try:
             extra_options = {}
             if self.executor:
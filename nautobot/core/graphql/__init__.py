@@ -1,10 +1,13 @@
 import graphene
+from django.db import models
 from django.db.models import JSONField
 from django.db.models.fields import BinaryField
 
 from graphene.types import generic
 from graphene_django.converter import convert_django_field
 
+from nautobot.core.graphql.pagination import DjangoPaginatedListField
+
 
 @convert_django_field.register(JSONField)
 def convert_field_to_string(field, registry=None):
@@ -16,3 +19,21 @@ def convert_field_to_string(field, registry=None):
 def convert_field_to_string(field, registry=None):  # noqa: F811
     """Convert BinaryField to String."""
     return graphene.String()
+
+
+@convert_django_field.register(models.ManyToManyField)
+@convert_django_field.register(models.ManyToManyRel)
+@convert_django_field.register(models.ManyToOneRel)
+def convert_field_to_list(field, registry=None):
+    """Convert many-to-many and reverse foreign key relations to a paginated list."""
+    model = field.related_model
+
+    def dynamic_type():
+        _type = registry.get_type_for_model(model)
+        if not _type:
+            return None
+
+        description = field.help_text if isinstance(field, models.ManyToManyField) else field.field.help_text
+        return DjangoPaginatedListField(_type, required=True, description=description)
+
+    return graphene.Dynamic(dynamic_type)
@@ -0,0 +1,153 @@
+"""Caching and persistence of parsed GraphQL documents.
+
+Each query document is parsed and validated against the schema only once: the resulting document is kept in an
+in-process LRU cache keyed by the SHA-256 hash of the document, so that a query sent repeatedly is executed without
+being parsed or validated again.
+
+Clients may also send a query by its hash alone, once the query has been registered, following the protocol of
+Apollo's automatic persisted queries: a request giving the hash as `extensions.persistedQuery.sha256Hash` (with
+`extensions.persistedQuery.version` 1) along with the query registers the query under its hash, after which requests
+may give the hash without the query. A request giving the hash of a query which is not registered receives a
+`PersistedQueryNotFound` error, whereupon the client should send the query again along with its hash.
+"""
+
+import hashlib
+import json
+import threading
+from collections import OrderedDict
+from functools import partial
+
+from django.core.cache import cache
+from graphql import GraphQLError
+from graphql.backend.base import GraphQLDocument
+from graphql.backend.core import GraphQLCoreBackend
+from graphql.execution import execute, ExecutionResult
+from graphql.language.base import parse
+from graphql.validation import validate
+
+# The number of parsed and validated documents kept by each process
+DOCUMENT_CACHE_SIZE = 256
+
+# Registered queries are kept for a week after they were last registered
+PERSISTED_QUERY_CACHE_KEY = "nautobot.graphql.persisted.{hash}"
+PERSISTED_QUERY_TIMEOUT = 7 * 24 * 60 * 60
+
+
+class PersistedQueryError(GraphQLError):
+    """An error in the persisted query requested, with a `code` given as its extension."""
+
+    def __init__(self, message, code):
+        super().__init__(message, extensions={"code": code})
+
+
+class DocumentCache:
+    """A thread-safe LRU cache of parsed and validated documents, keyed by schema and by the hash of the document."""
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._documents = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, schema, document_hash):
+        with self._lock:
+            document = self._documents.get((schema, document_hash))
+            if document is not None:
+                self._documents.move_to_end((schema, document_hash))
+            return document
+
+    def set(self, schema, document_hash, document):
+        with self._lock:
+            self._documents[(schema, document_hash)] = document
+            self._documents.move_to_end((schema, document_hash))
+            while len(self._documents) > self.maxsize:
+                self._documents.popitem(last=False)
+
+    def clear(self):
+        with self._lock:
+            self._documents.clear()
+
+
+document_cache = DocumentCache(DOCUMENT_CACHE_SIZE)
+
+
+def get_document_hash(document_string):
+    """Return the SHA-256 hash of the given document as a hex string."""
+    return hashlib.sha256(document_string.encode("utf-8")).hexdigest()
+
+
+def execute_validated(schema, document_ast, validation_errors, *args, **kwargs):
+    """Execute a document which has already been validated, returning its validation errors if it was invalid."""
+    if validation_errors:
+        return ExecutionResult(errors=validation_errors, invalid=True)
+    return execute(schema, document_ast, *args, **kwargs)
+
+
+class CachedDocumentBackend(GraphQLCoreBackend):
+    """GraphQL backend which parses and validates each document once, keeping the result in the document cache."""
+
+    def document_from_string(self, schema, document_string):
+        if not isinstance(document_string, str):
+            return super().document_from_string(schema, document_string)
+
+        document_hash = get_document_hash(document_string)
+        document = document_cache.get(schema, document_hash)
+        if document is None:
+            document_ast = parse(document_string)
+            document = GraphQLDocument(
+                schema=schema,
+                document_string=document_string,
+                document_ast=document_ast,
+                execute=partial(
+                    execute_validated, schema, document_ast, validate(schema, document_ast), **self.execute_params
+                ),
+            )
+            document_cache.set(schema, document_hash, document)
+
+        return document
+
+
+def get_persisted_query(schema, query, extensions):
+    """Return the query of a request, registering it if it is given along with its hash, or else retrieving it by hash.
+
+    Args:
+        schema (GraphQLSchema): schema of the query
+        query (str): query given by the request, if any
+        extensions (dict): extensions given by the request (or their JSON representation), if any
+
+    Returns:
+        str: query to execute
+
+    Raises:
+        PersistedQueryError: if the request gives an unregistered or incorrect hash, or an unsupported version
+    """
+    if isinstance(extensions, str):
+        try:
+            extensions = json.loads(extensions)
+        except ValueError:
+            extensions = None
+    persisted_query = extensions.get("persistedQuery") if isinstance(extensions, dict) else None
+    if not isinstance(persisted_query, dict):
+        return query
+
+    if persisted_query.get("version") != 1:
+        raise PersistedQueryError("Unsupported persisted query version", code="PERSISTED_QUERY_NOT_SUPPORTED")
+    document_hash = persisted_query.get("sha256Hash")
+    if not isinstance(document_hash, str):
+        raise PersistedQueryError("Persisted query hash is missing", code="PERSISTED_QUERY_NOT_FOUND")
+    document_hash = document_hash.lower()
+
+    if query:
+        if get_document_hash(query) != document_hash:
+            raise PersistedQueryError("Provided sha256Hash does not match query", code="PERSISTED_QUERY_HASH_MISMATCH")
+        cache.set(PERSISTED_QUERY_CACHE_KEY.format(hash=document_hash), query, timeout=PERSISTED_QUERY_TIMEOUT)
+        return query
+
+    # A query executed recently by this process need not be retrieved
+    document = document_cache.get(schema, document_hash)
+    if document is not None:
+        return document.document_string
+
+    query = cache.get(PERSISTED_QUERY_CACHE_KEY.format(hash=document_hash))
+    if query is None:
+        raise PersistedQueryError("PersistedQueryNotFound", code="PERSISTED_QUERY_NOT_FOUND")
+    return query
@@ -7,9 +7,10 @@ import graphene
 from graphql import GraphQLError
 from graphene_django import DjangoObjectType
 
+from nautobot.core.graphql.loaders import get_loader, RelationshipLoader
+from nautobot.core.graphql.optimizer import optimize_queryset
+from nautobot.core.graphql.pagination import get_pagination_args, paginate_queryset
 from nautobot.core.graphql.utils import str_to_var_name, get_filtering_args_from_filterset
-from nautobot.extras.choices import RelationshipSideChoices
-from nautobot.extras.models import RelationshipAssociation
 from nautobot.utilities.utils import get_filterset_for_model
 
 logger = logging.getLogger("nautobot.graphql.generators")
@@ -20,6 +21,9 @@ def generate_restricted_queryset():
     """Generate a function to return a restricted queryset compatible with the internal permissions system."""
 
     def get_queryset(queryset, info):
+        # Related objects already retrieved were prefetched by optimize_queryset() from a restricted queryset
+        if queryset._result_cache is not None:
+            return queryset
         return queryset.restrict(info.context.user, "view")
 
     return get_queryset
@@ -52,16 +56,14 @@ def generate_relationship_resolver(name, resolver_name, relationship, side, peer
     """
 
     def resolve_relationship(self, info, **kwargs):
-        """Return a queryset or an object depending on the type of the relationship."""
-        peer_side = RelationshipSideChoices.OPPOSITE[side]
-        query_params = {"relationship": relationship}
-        query_params[f"{side}_id"] = self.pk
-        queryset_ids = RelationshipAssociation.objects.filter(**query_params).values_list(f"{peer_side}_id", flat=True)
+        """Return a list of objects or an object depending on the type of the relationship.
 
-        if relationship.has_many(peer_side):
-            return peer_model.objects.filter(id__in=queryset_ids)
-
-        return peer_model.objects.filter(id__in=queryset_ids).first()
+        The peers of all the objects resolved at the same level of the query are loaded together.
+        """
+        loader = get_loader(
+            info, ("relationship", relationship.pk, side), RelationshipLoader, relationship, side, peer_model
+        )
+        return loader.load(self.pk)
 
     resolve_relationship.__name__ = resolver_name
     return resolve_relationship
@@ -135,7 +137,7 @@ def generate_single_item_resolver(schema_type, resolver_name):
 
         obj_id = kwargs.get("id", None)
         if obj_id:
-            return model.objects.restrict(info.context.user, "view").get(pk=obj_id)
+            return optimize_queryset(model.objects.restrict(info.context.user, "view"), info).get(pk=obj_id)
         return None
 
     single_resolver.__name__ = resolver_name
@@ -149,6 +151,7 @@ def generate_list_resolver(schema_type, resolver_name):
     If a filterset_class is associated with the schema_type,
     the resolver will pass all arguments received to the FilterSet
     If not, it will return a restricted queryset for all objects
+    In either case, the queryset is paginated by the arguments limit, offset and after
 
     Args:
         schema_type (DjangoObjectType): DjangoObjectType for a given model
@@ -159,7 +162,7 @@ def generate_list_resolver(schema_type, resolver_name):
     """
     model = schema_type._meta.model
 
-    def list_resolver(self, info, **kwargs):
+    def list_resolver(self, info, limit=None, offset=None, after=None, **kwargs):
         filterset_class = schema_type._meta.filterset_class
         if filterset_class is not None:
             resolved_obj = filterset_class(kwargs, model.objects.restrict(info.context.user, "view").all())
@@ -176,9 +179,11 @@ def generate_list_resolver(schema_type, resolver_name):
                 # Raising this exception will send the error message in the response of the GraphQL request
                 raise GraphQLError(errors)
 
-            return resolved_obj.qs.all()
+            return paginate_queryset(optimize_queryset(resolved_obj.qs.all(), info), limit, offset, after)
 
-        return model.objects.restrict(info.context.user, "view").all()
+        return paginate_queryset(
+            optimize_queryset(model.objects.restrict(info.context.user, "view").all(), info), limit, offset, after
+        )
 
     list_resolver.__name__ = resolver_name
     return list_resolver
@@ -202,7 +207,7 @@ def generate_attrs_for_schema_type(schema_type):
     # Define Attributes for single item and list with their search parameters
     search_params = generate_list_search_parameters(schema_type)
     attrs[single_item_name] = graphene.Field(schema_type, id=graphene.ID())
-    attrs[list_name] = graphene.List(schema_type, **search_params)
+    attrs[list_name] = graphene.List(schema_type, **search_params, **get_pagination_args())
 
     # Define Resolvers for both single item and list
     single_item_resolver_name = f"{RESOLVER_PREFIX}{single_item_name}"
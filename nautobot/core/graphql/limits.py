@@ -0,0 +1,302 @@
+"""Limits on the depth and estimated cost of GraphQL queries.
+
+Before a query is executed, its selection set is walked to estimate the number of objects it will resolve. Each field
+of a model's objects is estimated to resolve one object for each of its parents if it refers to a single object, or
+else (if it is a list) as many objects per parent as there are objects of the model for each object of its parent's
+model; the root list of a model is estimated to resolve every object of the model. Each list is estimated to resolve no
+more than a page of objects per parent, as limited by its `limit` argument or else by the maximum page size. The cost
+of a query is the total number of objects estimated to be resolved, whatever the filters applied.
+
+A query which is nested too deeply (`GRAPHQL_MAX_DEPTH`) or whose estimated cost is too high (`GRAPHQL_MAX_COST`) is
+rejected, as is any query which would exceed the budget of its user's API token (or of the user, if not authenticated
+by a token) for the current period (`GRAPHQL_COST_BUDGET` per `GRAPHQL_COST_BUDGET_PERIOD` seconds).
+"""
+
+import math
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from graphene_django import DjangoObjectType
+from graphql import GraphQLError
+from graphql.language.ast import FragmentDefinition, IntValue, OperationDefinition, Variable
+from graphql.type import GraphQLList, GraphQLNonNull, GraphQLObjectType
+
+from nautobot.core.graphql.optimizer import get_named_type, iter_selected_fields
+from nautobot.core.graphql.pagination import get_page_size
+
+# The time in seconds for which the number of objects of each model is cached for estimating the cost of queries
+ROW_COUNT_CACHE_TIMEOUT = 300
+
+ROW_COUNT_CACHE_KEY = "nautobot.graphql.rows.{label}"
+
+# The estimated cost of the queries made with each API token (or by each user) within each period
+BUDGET_CACHE_KEY = "nautobot.graphql.budget.{identity}.{period}"
+
+
+class QueryRejectedError(GraphQLError):
+    """A query which was rejected before execution, with a `code` and details given as its extensions."""
+
+    status_code = 400
+
+    def __init__(self, message, code, node=None, path=None, **details):
+        super().__init__(
+            message, nodes=[node] if node is not None else None, path=path, extensions={"code": code, **details}
+        )
+
+
+class QueryBudgetExceededError(QueryRejectedError):
+    """A query rejected as the budget of its user or API token for the current period does not allow it."""
+
+    status_code = 429
+
+
+class FieldCost:
+    """The estimated cost of a field of a query, including its subfields."""
+
+    def __init__(self, path, node, depth, rows):
+        self.path = path
+        self.node = node
+        self.depth = depth
+        self.rows = rows
+        self.children = []
+
+    @property
+    def cost(self):
+        return self.rows + sum(child.cost for child in self.children)
+
+    @property
+    def max_depth(self):
+        return max([self.depth] + [child.max_depth for child in self.children])
+
+    def walk(self):
+        """Yield this field and all of its subfields, depth first."""
+        yield self
+        for child in self.children:
+            yield from child.walk()
+
+
+def get_row_count(model):
+    """Return the number of objects of the given model, as counted within the last `ROW_COUNT_CACHE_TIMEOUT`."""
+    return cache.get_or_set(
+        ROW_COUNT_CACHE_KEY.format(label=model._meta.label_lower),
+        model.objects.count,
+        timeout=ROW_COUNT_CACHE_TIMEOUT,
+    )
+
+
+def get_model(graphql_type):
+    """Return the Django model of the given GraphQL Object type, or None if it is not a DjangoObjectType."""
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+    if graphene_type is not None and issubclass(graphene_type, DjangoObjectType):
+        return graphene_type._meta.model
+    return None
+
+
+def is_list_type(graphql_type):
+    if isinstance(graphql_type, GraphQLNonNull):
+        graphql_type = graphql_type.of_type
+    return isinstance(graphql_type, GraphQLList)
+
+
+def get_page_rows(field, field_ast, variables):
+    """Return the maximum number of objects of a page of the given list field per parent, or None if not paginated."""
+    if "limit" not in field.args:
+        return None
+    limit = None
+    for argument in field_ast.arguments:
+        if argument.name.value != "limit":
+            continue
+        if isinstance(argument.value, IntValue):
+            limit = int(argument.value.value)
+        elif isinstance(argument.value, Variable) and isinstance(variables, dict):
+            limit = variables.get(argument.value.name.value)
+    return get_page_size(limit if isinstance(limit, int) and limit > 0 else None)
+
+
+def estimate_rows(field_type, model, parent_rows, parent_model, count_rows, page_rows=None):
+    """Return the estimated number of objects resolved by a field for `parent_rows` objects of `parent_model`.
+
+    Args:
+        field_type (GraphQLType): type of the field
+        model (Model): Django model of the objects of the field, if any
+        parent_rows (int): estimated number of objects of which the field is resolved, or None at the root
+        parent_model (Model): Django model of the parent objects, if any
+        count_rows (bool): whether the objects of the models are counted, or else each list assumed to be of one
+        page_rows (int): maximum number of objects resolved by the field per parent object, if paginated
+    """
+    if not is_list_type(field_type):
+        return parent_rows or 1
+    if model is None or not count_rows:
+        return parent_rows or 1
+    if parent_rows is None:
+        rows = get_row_count(model)
+    elif parent_model is None:
+        return parent_rows
+    else:
+        rows = max(1, math.ceil(get_row_count(model) / max(1, get_row_count(parent_model))))
+    if page_rows is not None:
+        rows = min(rows, page_rows)
+    return rows if parent_rows is None else parent_rows * rows
+
+
+def estimate_selection_set(parent_type, selection_set, fragments, parent_rows, path, depth, count_rows, variables=None):
+    """Return a list of the estimated costs of the object fields selected of a GraphQL Object type."""
+    parent_model = get_model(parent_type)
+    costs = []
+    for field_ast in iter_selected_fields(selection_set, fragments):
+        name = field_ast.name.value
+        # Introspection fields resolve no objects
+        if name.startswith("__") or name not in parent_type.fields or field_ast.selection_set is None:
+            continue
+
+        field = parent_type.fields[name]
+        field_type = field.type
+        named_type = get_named_type(field_type)
+        if not isinstance(named_type, GraphQLObjectType):
+            continue
+
+        model = get_model(named_type)
+        alias = field_ast.alias.value if field_ast.alias else name
+        field_cost = FieldCost(
+            path=path + [alias],
+            node=field_ast,
+            depth=depth + 1,
+            rows=estimate_rows(
+                field_type,
+                model,
+                parent_rows,
+                parent_model,
+                count_rows,
+                page_rows=get_page_rows(field, field_ast, variables),
+            ),
+        )
+        field_cost.children = estimate_selection_set(
+            named_type,
+            field_ast.selection_set,
+            fragments,
+            field_cost.rows,
+            field_cost.path,
+            depth + 1,
+            count_rows,
+            variables=variables,
+        )
+        costs.append(field_cost)
+
+    return costs
+
+
+def get_operation(document_ast, operation_name):
+    """Return the operation of the given name in a document (or its only operation) and the document's fragments."""
+    operations = [definition for definition in document_ast.definitions if isinstance(definition, OperationDefinition)]
+    fragments = {
+        definition.name.value: definition
+        for definition in document_ast.definitions
+        if isinstance(definition, FragmentDefinition)
+    }
+    for operation in operations:
+        if operation_name is None and len(operations) == 1:
+            return operation, fragments
+        if operation.name is not None and operation.name.value == operation_name:
+            return operation, fragments
+    return None, fragments
+
+
+def estimate_query_cost(schema, document_ast, operation_name=None, count_rows=True, variables=None):
+    """Return a list of the estimated costs of the root fields of the operation of a query.
+
+    Args:
+        schema (GraphQLSchema): schema of the query
+        document_ast (Document): parsed query
+        operation_name (str): name of the operation to estimate, which may be omitted if the query has only one
+        count_rows (bool): whether the objects of each model are counted to estimate the size of lists
+        variables (dict): variables of the query, by which the size of pages of lists may be given
+    """
+    operation, fragments = get_operation(document_ast, operation_name)
+    if operation is None or operation.operation != "query":
+        return []
+    return estimate_selection_set(
+        schema.get_query_type(), operation.selection_set, fragments, None, [], 0, count_rows, variables=variables
+    )
+
+
+def get_budget_identity(request):
+    """Return the identity against whose budget the cost of the request's queries is counted, if any."""
+    token = getattr(request, "auth", None)
+    if token is not None and getattr(token, "pk", None) is not None:
+        return f"token.{token.pk}"
+    user = getattr(request, "user", None)
+    if user is not None and user.is_authenticated:
+        return f"user.{user.pk}"
+    return None
+
+
+def check_query_limits(schema, document_ast, operation_name, request, variables=None):
+    """Raise a QueryRejectedError if the given query may not be executed, or else count its cost against its budget.
+
+    Args:
+        schema (GraphQLSchema): schema of the query
+        document_ast (Document): parsed query
+        operation_name (str): name of the operation to execute, which may be omitted if the query has only one
+        request (HttpRequest): request which submitted the query
+        variables (dict): variables of the query
+    """
+    max_depth = settings.GRAPHQL_MAX_DEPTH
+    max_cost = settings.GRAPHQL_MAX_COST
+    budget = settings.GRAPHQL_COST_BUDGET
+    if not (max_depth or max_cost or budget):
+        return
+
+    field_costs = estimate_query_cost(
+        schema, document_ast, operation_name, count_rows=bool(max_cost or budget), variables=variables
+    )
+
+    if max_depth:
+        for field_cost in (cost for root in field_costs for cost in root.walk()):
+            if field_cost.depth > max_depth:
+                raise QueryRejectedError(
+                    f"Query is nested too deeply at {'.'.join(field_cost.path)}: " f"the maximum depth is {max_depth}",
+                    code="QUERY_TOO_DEEP",
+                    node=field_cost.node,
+                    path=field_cost.path,
+                    depth=max(root.max_depth for root in field_costs),
+                    max_depth=max_depth,
+                )
+
+    cost = sum(root.cost for root in field_costs)
+    if max_cost and cost > max_cost:
+        # Report the most deeply nested field which alone exceeds the maximum cost, or else the costliest root field
+        too_expensive = [field_cost for root in field_costs for field_cost in root.walk() if field_cost.cost > max_cost]
+        if too_expensive:
+            subtree = max(too_expensive, key=lambda field_cost: field_cost.depth)
+        else:
+            subtree = max(field_costs, key=lambda field_cost: field_cost.cost)
+        raise QueryRejectedError(
+            f"Query is too expensive: its estimated cost of {cost} exceeds the maximum of {max_cost}, "
+            f"of which {'.'.join(subtree.path)} costs {subtree.cost}",
+            code="QUERY_TOO_EXPENSIVE",
+            node=subtree.node,
+            path=subtree.path,
+            cost=cost,
+            max_cost=max_cost,
+            subtree_cost=subtree.cost,
+        )
+
+    identity = get_budget_identity(request)
+    if budget and identity is not None:
+        now = time.time()
+        period = settings.GRAPHQL_COST_BUDGET_PERIOD
+        key = BUDGET_CACHE_KEY.format(identity=identity, period=int(now // period))
+        cache.add(key, 0, timeout=period * 2)
+        remaining = max(0, budget - cache.get(key, 0))
+        if cost > remaining:
+            raise QueryBudgetExceededError(
+                f"Query exceeds the remaining budget: its estimated cost of {cost} exceeds the {remaining} "
+                f"remaining of the budget of {budget} per {period} seconds",
+                code="BUDGET_EXCEEDED",
+                cost=cost,
+                budget=budget,
+                remaining=remaining,
+                retry_after=math.ceil(period - now % period),
+            )
+        cache.incr(key, cost)
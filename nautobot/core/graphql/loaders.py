@@ -0,0 +1,104 @@
+"""Request-scoped DataLoaders for GraphQL.
+
+A resolver of a field of many objects (such as the tags of each device in a list of devices) loads its value through a
+DataLoader rather than querying it directly, so that the values for all the objects at the same level of the query are
+retrieved together in a single batch of queries.
+"""
+
+from django.contrib.contenttypes.models import ContentType
+from promise import Promise
+from promise.dataloader import DataLoader
+
+from nautobot.extras.choices import RelationshipSideChoices
+from nautobot.extras.models import RelationshipAssociation, TaggedItem
+
+
+def get_loader(info, key, loader_class, *args):
+    """Return the DataLoader for the given key within the current GraphQL request, creating it if necessary.
+
+    Loaders are stored on the request (`info.context`), so that values are batched and cached within a single
+    request but never shared between requests.
+
+    Args:
+        info (ResolveInfo): info of the field being resolved
+        key (tuple): identifier of the loader within the request
+        loader_class (type): DataLoader class to instantiate
+        *args: arguments with which to instantiate loader_class
+    """
+    loaders = getattr(info.context, "graphql_loaders", None)
+    if loaders is None:
+        loaders = {}
+        info.context.graphql_loaders = loaders
+
+    if key not in loaders:
+        loaders[key] = loader_class(*args)
+
+    return loaders[key]
+
+
+class TagLoader(DataLoader):
+    """Load the tags of objects of a given model, by object PK."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.content_type = ContentType.objects.get_for_model(model)
+
+    def batch_load_fn(self, keys):
+        tags = {key: [] for key in keys}
+        tagged_items = (
+            TaggedItem.objects.filter(content_type=self.content_type, object_id__in=keys)
+            .select_related("tag")
+            .order_by("tag__name")
+        )
+        for tagged_item in tagged_items:
+            tags[tagged_item.object_id].append(tagged_item.tag)
+
+        return Promise.resolve([tags[key] for key in keys])
+
+
+class RelationshipLoader(DataLoader):
+    """Load the peers of objects on one side of a Relationship, by object PK.
+
+    Each object's peers are loaded as a list, ordered as the peer model, or as a single peer (or None) if the peer side
+    of the relationship has only one object.
+    """
+
+    def __init__(self, relationship, side, peer_model):
+        super().__init__()
+        self.relationship = relationship
+        self.side = side
+        self.peer_side = RelationshipSideChoices.OPPOSITE[side]
+        self.peer_model = peer_model
+
+    def batch_load_fn(self, keys):
+        associations = RelationshipAssociation.objects.filter(
+            relationship=self.relationship, **{f"{self.side}_id__in": keys}
+        ).values_list(f"{self.side}_id", f"{self.peer_side}_id")
+
+        peer_pks = {}
+        for pk, peer_pk in associations:
+            peer_pks.setdefault(peer_pk, []).append(pk)
+
+        peers = {key: [] for key in keys}
+        if peer_pks:
+            for peer in self.peer_model.objects.filter(pk__in=peer_pks):
+                for pk in peer_pks[peer.pk]:
+                    peers[pk].append(peer)
+
+        if self.relationship.has_many(self.peer_side):
+            return Promise.resolve([peers[key] for key in keys])
+
+        return Promise.resolve([peers[key][0] if peers[key] else None for key in keys])
+
+
+class ConfigContextLoader(DataLoader):
+    """Load the rendered config context of Devices or VirtualMachines, by object PK."""
+
+    def __init__(self, model):
+        super().__init__()
+        self.model = model
+
+    def batch_load_fn(self, keys):
+        config_contexts = dict(self.model.objects.filter(pk__in=keys).render_config_contexts())
+
+        return Promise.resolve([config_contexts.get(key) for key in keys])
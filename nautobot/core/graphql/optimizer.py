@@ -0,0 +1,121 @@
+"""Query planning for GraphQL.
+
+Before the objects of a list or single-item field are retrieved, the selection set of the query is walked to find the
+related objects which will be resolved for each of them, so that they can be retrieved together with the objects
+themselves rather than by a query per object: forward foreign keys and one-to-one relations are joined by
+`select_related()`, while reverse foreign keys and many-to-many relations are retrieved by `prefetch_related()`,
+restricted to the objects which the user is permitted to view.
+"""
+
+from django.db.models import Prefetch
+from graphql.language.ast import FragmentSpread, InlineFragment
+
+
+def get_named_type(graphql_type):
+    """Return the object type wrapped by the given List and NonNull types, if any."""
+    while hasattr(graphql_type, "of_type"):
+        graphql_type = graphql_type.of_type
+    return graphql_type
+
+
+def get_model_relation(model, name):
+    """Return the relation field of the model by which related objects are accessed as the attribute `name`, or None.
+
+    Generic foreign keys are not returned, as they cannot be followed by `select_related()`.
+    """
+    for field in model._meta.get_fields():
+        if not field.is_relation or field.related_model is None:
+            continue
+        accessor_name = field.get_accessor_name() if field.auto_created and not field.concrete else field.name
+        if accessor_name == name:
+            return field
+    return None
+
+
+def iter_selected_fields(selection_set, fragments):
+    """Yield each field selected by the given selection set, including those selected through fragments."""
+    for selection in selection_set.selections:
+        if isinstance(selection, FragmentSpread):
+            yield from iter_selected_fields(fragments[selection.name.value].selection_set, fragments)
+        elif isinstance(selection, InlineFragment):
+            yield from iter_selected_fields(selection.selection_set, fragments)
+        else:
+            yield selection
+
+
+def plan_related_lookups(model, graphql_type, selection_set, info, prefix=""):
+    """Return the lookups by which the related objects selected for objects of the given model are retrieved.
+
+    Only relations resolved from the model's own attribute are planned, as a field with a custom resolver may
+    not read it at all.
+
+    Args:
+        model (Model): Django model of the objects being resolved
+        graphql_type (GraphQLObjectType): GraphQL Object type of the objects being resolved
+        selection_set (SelectionSet): the fields selected for each object
+        info (ResolveInfo): info of the field whose objects are being resolved
+        prefix (str): lookup path from the queryset's model to `model`
+
+    Returns:
+        tuple: list of select_related() lookups, list of prefetch_related() lookups
+    """
+    select_related = []
+    prefetch_related = []
+    graphene_type = getattr(graphql_type, "graphene_type", None)
+
+    planned = set()
+    for field_ast in iter_selected_fields(selection_set, info.fragments):
+        name = field_ast.name.value
+        # A field selected more than once (under different aliases) is planned as first selected
+        if field_ast.selection_set is None or name not in graphql_type.fields or name in planned:
+            continue
+        if graphene_type is not None and hasattr(graphene_type, f"resolve_{name}"):
+            continue
+        # A page of related objects is retrieved from the database for each object, rather than all of them prefetched
+        if any(argument.name.value in ("limit", "offset", "after") for argument in field_ast.arguments):
+            continue
+        field = get_model_relation(model, name)
+        if field is None:
+            continue
+
+        planned.add(name)
+        related_type = get_named_type(graphql_type.fields[name].type)
+        if field.many_to_one or field.one_to_one:
+            select_related.append(f"{prefix}{name}")
+            related_select, related_prefetch = plan_related_lookups(
+                field.related_model, related_type, field_ast.selection_set, info, prefix=f"{prefix}{name}__"
+            )
+            select_related.extend(related_select)
+            prefetch_related.extend(related_prefetch)
+        else:
+            queryset = field.related_model.objects.all()
+            if hasattr(queryset, "restrict"):
+                queryset = queryset.restrict(info.context.user, "view")
+            related_select, related_prefetch = plan_related_lookups(
+                field.related_model, related_type, field_ast.selection_set, info
+            )
+            queryset = queryset.select_related(*related_select).prefetch_related(*related_prefetch)
+            prefetch_related.append(Prefetch(f"{prefix}{name}", queryset=queryset))
+
+    return select_related, prefetch_related
+
+
+def optimize_queryset(queryset, info):
+    """Return the queryset resolving the current field, retrieving along with its objects the related objects selected.
+
+    Args:
+        queryset (QuerySet): queryset of the objects of the field being resolved
+        info (ResolveInfo): info of the field being resolved
+    """
+    field_ast = info.field_asts[0]
+    if field_ast.selection_set is None:
+        return queryset
+
+    select_related, prefetch_related = plan_related_lookups(
+        queryset.model, get_named_type(info.return_type), field_ast.selection_set, info
+    )
+    if select_related:
+        queryset = queryset.select_related(*select_related)
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+    return queryset
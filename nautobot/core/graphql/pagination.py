@@ -0,0 +1,98 @@
+"""Pagination of GraphQL list fields.
+
+The list of each model, and each list of related objects, accepts the arguments `limit` and `offset`, or `limit` and
+`after`, the ID of the last object of the previous page. Pages taken `after` an object are ordered by ID, so that a
+client may page through a large list by keyset rather than by offset, without the cost of skipping the objects
+before each page. No list returns more than `GRAPHQL_MAX_PAGE_SIZE` objects (defaulting to `MAX_PAGE_SIZE`), which is
+also the number of objects returned if no limit is given.
+"""
+
+import graphene
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.db.models import QuerySet
+from graphene_django import DjangoListField
+from graphql import GraphQLError
+
+from nautobot.core.graphql.optimizer import optimize_queryset
+
+
+def get_max_page_size():
+    """Return the maximum number of objects returned by a list, or 0 for no maximum."""
+    if settings.GRAPHQL_MAX_PAGE_SIZE is None:
+        return settings.MAX_PAGE_SIZE
+    return settings.GRAPHQL_MAX_PAGE_SIZE
+
+
+def get_page_size(limit):
+    """Return the number of objects to return for the given `limit`, or None for all."""
+    max_page_size = get_max_page_size()
+    if max_page_size and (not limit or limit > max_page_size):
+        return max_page_size
+    return limit or None
+
+
+def get_pagination_args():
+    """Return the arguments for paginating a list field."""
+    return {
+        "limit": graphene.Argument(graphene.Int, description="Maximum number of objects to return"),
+        "offset": graphene.Argument(graphene.Int, description="Number of objects to skip"),
+        "after": graphene.Argument(graphene.ID, description="Return objects ordered by ID after the given ID"),
+    }
+
+
+def paginate_queryset(queryset, limit=None, offset=None, after=None):
+    """Return the page of the queryset selected by the given pagination arguments.
+
+    Args:
+        queryset (QuerySet): queryset to paginate
+        limit (int): maximum number of objects to return, capped to the maximum page size
+        offset (int): number of objects to skip
+        after (str): if given, return only objects whose ID is greater, in order of ID
+
+    Raises:
+        GraphQLError: if the arguments are invalid
+    """
+    if limit is not None and limit < 0:
+        raise GraphQLError("limit must not be negative")
+    if offset is not None and offset < 0:
+        raise GraphQLError("offset must not be negative")
+
+    if after is not None:
+        try:
+            queryset = queryset.filter(pk__gt=after).order_by("pk")
+        except (ValidationError, ValueError):
+            raise GraphQLError(f"after must be the ID of an object, not {after!r}")
+    elif queryset._result_cache is None and not queryset.ordered:
+        # Pages are only consistent if the queryset is ordered
+        queryset = queryset.order_by("pk")
+
+    start = offset or 0
+    page_size = get_page_size(limit)
+    if page_size is not None:
+        return queryset[start : start + page_size]
+    return queryset[start:] if start else queryset
+
+
+class DjangoPaginatedListField(DjangoListField):
+    """A DjangoListField of related objects, accepting the pagination arguments of `get_pagination_args()`.
+
+    The related objects of each parent are prefetched along with their parents unless pagination arguments are given,
+    in which case only the page of each parent's objects is retrieved, by a query per parent.
+    """
+
+    def __init__(self, _type, *args, **kwargs):
+        kwargs = {**get_pagination_args(), **kwargs}
+        super().__init__(_type, *args, **kwargs)
+
+    @staticmethod
+    def list_resolver(
+        django_object_type, resolver, default_manager, root, info, limit=None, offset=None, after=None, **args
+    ):
+        queryset = DjangoListField.list_resolver(django_object_type, resolver, default_manager, root, info, **args)
+        if queryset is None:
+            return None
+        if isinstance(queryset, QuerySet) and queryset._result_cache is None:
+            # The related objects selected for the page's objects are retrieved along with the page
+            queryset = optimize_queryset(queryset, info)
+        return paginate_queryset(queryset, limit, offset, after)
@@ -9,6 +9,7 @@ import graphene
 from graphene.types import generic
 
 from nautobot.circuits.graphql.types import CircuitTerminationType
+from nautobot.core.graphql.loaders import get_loader, ConfigContextLoader, TagLoader
 from nautobot.core.graphql.utils import str_to_var_name
 from nautobot.core.graphql.generators import (
     generate_schema_type,
@@ -161,8 +162,8 @@ def extend_schema_type_tags(schema_type, model):
     if "tags" not in fields_name:
         return schema_type
 
-    def resolve_tags(self, args):
-        return self.tags.all()
+    def resolve_tags(self, info, **kwargs):
+        return get_loader(info, ("tags", model._meta.label), TagLoader, model).load(self.pk)
 
     setattr(schema_type, "resolve_tags", resolve_tags)
 
@@ -184,8 +185,8 @@ def extend_schema_type_config_context(schema_type, model):
     if "local_context_data" not in fields_name:
         return schema_type
 
-    def resolve_config_context(self, args):
-        return self.get_config_context()
+    def resolve_config_context(self, info, **kwargs):
+        return get_loader(info, ("config_context", model._meta.label), ConfigContextLoader, model).load(self.pk)
 
     schema_type._meta.fields["config_context"] = graphene.Field.mounted(generic.GenericScalar())
     setattr(schema_type, "resolve_config_context", resolve_config_context)
@@ -53,6 +53,8 @@ BANNER_TOP = ""
 # Base directory wherein all created files (jobs, git repositories, file uploads, static files) will be stored)
 NAUTOBOT_ROOT = os.environ.get("NAUTOBOT_ROOT", os.path.expanduser("~/.nautobot"))
 
+CHANGELOG_PURGE_BATCH_SIZE = 1000
+CHANGELOG_PURGE_RATE = 0
 CHANGELOG_RETENTION = 90
 DOCS_ROOT = os.path.join(os.path.dirname(BASE_DIR), "docs")
 HIDE_RESTRICTED_UI = False
@@ -120,6 +122,12 @@ SOCIAL_AUTH_POSTGRES_JSONFIELD = False
 STORAGE_BACKEND = None
 STORAGE_CONFIG = {}
 
+# Webhooks
+WEBHOOK_CONCURRENCY = 4
+WEBHOOK_MAX_RETRIES = 5
+WEBHOOK_RETRY_DELAY = 10
+WEBHOOK_TIMEOUT = 10
+
 
 #
 # Django cryptography
@@ -426,6 +434,11 @@ GRAPHENE = {
 }
 GRAPHQL_CUSTOM_FIELD_PREFIX = "cf"
 GRAPHQL_RELATIONSHIP_PREFIX = "rel"
+GRAPHQL_MAX_DEPTH = 10
+GRAPHQL_MAX_COST = 0
+GRAPHQL_MAX_PAGE_SIZE = None
+GRAPHQL_COST_BUDGET = 0
+GRAPHQL_COST_BUDGET_PERIOD = 3600
 
 
 #
@@ -1,21 +1,29 @@
+import hashlib
 import types
 import uuid
+from unittest.mock import patch
 
 from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
 from django.test import TestCase, override_settings
 from django.test.client import RequestFactory
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from graphene_django import DjangoObjectType
 from graphene_django.settings import graphene_settings
 from graphql.error.located_error import GraphQLLocatedError
-from graphql import get_default_backend
+from graphql import get_default_backend, parse, validate
+from promise import Promise
 from rest_framework import status
 from rest_framework.test import APIClient
 
+from nautobot.core.graphql.documents import document_cache
 from nautobot.core.graphql.generators import (
     generate_list_search_parameters,
+    generate_relationship_resolver,
     generate_schema_type,
 )
 from nautobot.core.graphql.utils import str_to_var_name
@@ -31,7 +39,15 @@ from nautobot.dcim.filters import DeviceFilterSet, SiteFilterSet
 from nautobot.dcim.graphql.types import DeviceType as DeviceTypeGraphQL
 from nautobot.dcim.models import Cable, Device, DeviceRole, DeviceType, Interface, Manufacturer, Rack, Region, Site
 from nautobot.extras.choices import CustomFieldTypeChoices
-from nautobot.extras.models import ChangeLoggedModel, CustomField, ConfigContext, Relationship, Status
+from nautobot.extras.models import (
+    ChangeLoggedModel,
+    CustomField,
+    ConfigContext,
+    Relationship,
+    RelationshipAssociation,
+    Status,
+    Tag,
+)
 from nautobot.ipam.models import IPAddress, VLAN
 from nautobot.users.models import ObjectPermission, Token
 from nautobot.tenancy.models import Tenant
@@ -233,6 +249,34 @@ class GraphQLExtendSchemaRelationship(TestCase):
             field_name = f"rel_{str_to_var_name(data['field_slug'])}"
             self.assertIn(field_name, schema._meta.fields.keys())
 
+    def test_relationship_resolver_batched(self):
+        """The peers of several objects are resolved together in a single batch of queries."""
+        for rack, vlan in zip(self.racks, self.vlans):
+            RelationshipAssociation.objects.create(relationship=self.m2m_1, source=rack, destination=vlan)
+        RelationshipAssociation.objects.create(relationship=self.m2m_1, source=self.racks[0], destination=self.vlans[1])
+        RelationshipAssociation.objects.create(relationship=self.o2o_1, source=self.racks[1], destination=self.sites[0])
+
+        info = types.SimpleNamespace(context=RequestFactory().get("/"))
+
+        def resolve_all(resolver, objects):
+            # Loads are batched when made within a promise chain, as they are when a query is executed
+            return Promise.resolve(None).then(lambda _: Promise.all([resolver(obj, info) for obj in objects])).get()
+
+        resolve_vlans = generate_relationship_resolver("vlans", "resolve_vlans", self.m2m_1, "source", VLAN)
+        resolve_site = generate_relationship_resolver("site", "resolve_site", self.o2o_1, "source", Site)
+
+        with self.assertNumQueries(2):
+            vlans = resolve_all(resolve_vlans, self.racks)
+        self.assertEqual(vlans, [self.vlans[0:2], [self.vlans[1]], [self.vlans[2]]])
+
+        with self.assertNumQueries(2):
+            sites = resolve_all(resolve_site, self.racks)
+        self.assertEqual(sites, [None, self.sites[0], None])
+
+        # Peers already loaded within the same request are not queried again
+        with self.assertNumQueries(0):
+            self.assertEqual(resolve_all(resolve_vlans, self.racks[1:2]), [[self.vlans[1]]])
+
 
 class GraphQLSearchParameters(TestCase):
     def setUp(self):
@@ -461,6 +505,21 @@ class GraphQLAPIPermissionTest(TestCase):
         rack_names = [item["name"] for item in response.data["data"]["sites"][0]["racks"]]
         self.assertEqual(rack_names, ["Rack 1-1", "Rack 1-2"])
 
+    def test_graphql_query_multi_level_restricted(self):
+        """Validate that related objects retrieved along with a list are restricted by the permissions."""
+        site_obj_permission = ObjectPermission.objects.create(
+            name="Permission Site 2 for User 1",
+            actions=["view"],
+            constraints={"slug": "test2"},
+        )
+        site_obj_permission.object_types.add(ContentType.objects.get_for_model(Site))
+        site_obj_permission.users.add(self.users[0])
+
+        response = self.clients[0].post(self.api_url, {"query": self.get_sites_racks_query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        racks = {item["name"]: [rack["name"] for rack in item["racks"]] for item in response.data["data"]["sites"]}
+        self.assertEqual(racks, {"Site 1": ["Rack 1-1", "Rack 1-2"], "Site 2": []})
+
     def test_graphql_query_format(self):
         """Validate application/graphql query is working properly."""
         client = APIClient()
@@ -476,6 +535,180 @@ class GraphQLAPIPermissionTest(TestCase):
         self.assertEqual(site_names, ["Site 1", "Site 2"])
 
 
+class GraphQLQueryLimitsTest(TestCase):
+    def setUp(self):
+        """Initialize the Database with sites and racks, and a user whose queries are limited."""
+        self.user = User.objects.create(username="Super User", is_active=True, is_superuser=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.api_url = reverse("graphql-api")
+
+        sites = (
+            Site.objects.create(name="Site 1", slug="test1"),
+            Site.objects.create(name="Site 2", slug="test2"),
+        )
+        for site in sites:
+            Rack.objects.create(name="Rack 1", site=site)
+            Rack.objects.create(name="Rack 2", site=site)
+
+        cache.delete_pattern("nautobot.graphql.*")
+
+    @override_settings(GRAPHQL_MAX_DEPTH=2)
+    def test_query_too_deep(self):
+        response = self.client.post(self.api_url, {"query": "query { sites { racks { name } } }"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        query = "query { sites { racks { site { name } } } }"
+        response = self.client.post(self.api_url, {"query": query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        error = response.data["errors"][0]
+        self.assertEqual(error["path"], ["sites", "racks", "site"])
+        self.assertEqual(error["extensions"], {"code": "QUERY_TOO_DEEP", "depth": 3, "max_depth": 2})
+
+    @override_settings(GRAPHQL_MAX_COST=5)
+    def test_query_too_expensive(self):
+        # 2 sites
+        response = self.client.post(self.api_url, {"query": "query { sites { name } }"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # 2 sites, 4 racks, and a site for each rack
+        query = """
+        query {
+            sites { name }
+            racks { name site { name } }
+        }
+        """
+        response = self.client.post(self.api_url, {"query": query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        error = response.data["errors"][0]
+        self.assertEqual(error["path"], ["racks"])
+        self.assertEqual(
+            error["extensions"],
+            {"code": "QUERY_TOO_EXPENSIVE", "cost": 10, "max_cost": 5, "subtree_cost": 8},
+        )
+
+        # 2 sites, and 2 racks for each site
+        query = "query { sites { racks_alias: racks { name } } }"
+        response = self.client.post(self.api_url, {"query": query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["path"], ["sites"])
+        self.assertEqual(response.data["errors"][0]["extensions"]["cost"], 6)
+
+    @override_settings(GRAPHQL_COST_BUDGET=10)
+    def test_query_budget(self):
+        query = "query { sites { racks { name } } }"
+        response = self.client.post(self.api_url, {"query": query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        response = self.client.post(self.api_url, {"query": query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        extensions = response.data["errors"][0]["extensions"]
+        self.assertEqual(extensions["code"], "BUDGET_EXCEEDED")
+        self.assertEqual(extensions["remaining"], 4)
+        self.assertLessEqual(extensions["retry_after"], 3600)
+
+        # The budget applies to each token separately
+        client = APIClient()
+        client.credentials(HTTP_AUTHORIZATION=f"Token {Token.objects.create(user=self.user).key}")
+        response = client.post(self.api_url, {"query": query}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    @override_settings(GRAPHQL_MAX_COST=5)
+    def test_query_cost_paginated(self):
+        # 1 site, and 1 rack for that site, rather than 2 sites and 2 racks for each site
+        query = "query ($limit: Int) { sites(limit: 1) { racks(limit: $limit) { name } } }"
+        response = self.client.post(self.api_url, {"query": query, "variables": {"limit": 1}}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"]["sites"], [{"racks": [{"name": "Rack 1"}]}])
+
+        with override_settings(GRAPHQL_MAX_PAGE_SIZE=1):
+            response = self.client.post(self.api_url, {"query": "query { sites { racks { name } } }"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        # 4 racks, whatever their limit, and a site for each rack
+        response = self.client.post(self.api_url, {"query": "query { racks(limit: 6) { name } }"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        response = self.client.post(
+            self.api_url, {"query": "query { racks(limit: 6) { site { name } } }"}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["extensions"]["cost"], 8)
+
+    @override_settings(GRAPHQL_MAX_DEPTH=1)
+    def test_graphiql_query_too_deep(self):
+        self.client.force_login(self.user)
+        response = self.client.post(reverse("graphql"), {"query": "query { sites { racks { name } } }"}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.json()["errors"][0]["extensions"]["code"], "QUERY_TOO_DEEP")
+
+
+class GraphQLDocumentTest(TestCase):
+    def setUp(self):
+        """Initialize the Database with a site, and a user whose queries are sent over the API."""
+        self.user = User.objects.create(username="Super User", is_active=True, is_superuser=True)
+        self.token = Token.objects.create(user=self.user)
+        self.client = APIClient()
+        self.client.credentials(HTTP_AUTHORIZATION=f"Token {self.token.key}")
+        self.api_url = reverse("graphql-api")
+
+        Site.objects.create(name="Site 1", slug="test1")
+
+        self.query = "query { sites { name } }"
+        self.query_hash = hashlib.sha256(self.query.encode()).hexdigest()
+
+        document_cache.clear()
+        cache.delete_pattern("nautobot.graphql.*")
+
+    def test_document_parsed_and_validated_once(self):
+        with patch("nautobot.core.graphql.documents.parse", wraps=parse) as mock_parse, patch(
+            "nautobot.core.graphql.documents.validate", wraps=validate
+        ) as mock_validate:
+            for _ in range(3):
+                response = self.client.post(self.api_url, {"query": self.query}, format="json")
+                self.assertEqual(response.status_code, status.HTTP_200_OK)
+                self.assertEqual(response.data["data"], {"sites": [{"name": "Site 1"}]})
+
+            # An invalid document is also validated only once
+            for _ in range(2):
+                response = self.client.post(self.api_url, {"query": "query { sites { missing } }"}, format="json")
+                self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+        self.assertEqual(mock_parse.call_count, 2)
+        self.assertEqual(mock_validate.call_count, 2)
+
+    def test_persisted_query(self):
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": self.query_hash}}
+
+        # The query must be registered before it can be sent by its hash
+        response = self.client.post(self.api_url, {"extensions": extensions}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["message"], "PersistedQueryNotFound")
+        self.assertEqual(response.data["errors"][0]["extensions"], {"code": "PERSISTED_QUERY_NOT_FOUND"})
+
+        response = self.client.post(self.api_url, {"query": self.query, "extensions": extensions}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], {"sites": [{"name": "Site 1"}]})
+
+        response = self.client.post(self.api_url, {"extensions": extensions}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], {"sites": [{"name": "Site 1"}]})
+
+        # Registered queries are shared by all processes
+        document_cache.clear()
+        response = self.client.post(self.api_url, {"extensions": extensions}, format="json")
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data["data"], {"sites": [{"name": "Site 1"}]})
+
+    def test_persisted_query_hash_mismatch(self):
+        extensions = {"persistedQuery": {"version": 1, "sha256Hash": self.query_hash}}
+        response = self.client.post(
+            self.api_url, {"query": "query { sites { slug } }", "extensions": extensions}, format="json"
+        )
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertEqual(response.data["errors"][0]["extensions"], {"code": "PERSISTED_QUERY_HASH_MISMATCH"})
+
+
 class GraphQLQuery(TestCase):
     def setUp(self):
         """Initialize the Database with some datas."""
@@ -816,3 +1049,148 @@ class GraphQLQuery(TestCase):
                 result = self.execute_query(query)
                 self.assertIsNone(result.errors)
                 self.assertEqual(len(result.data["interfaces"]), nbr_expected_results)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_query_devices_batched(self):
+        """The tags and config context of all devices are each loaded in a single batch of queries."""
+
+        query = "query { devices { name tags { name } config_context } interfaces { name tags { name } } }"
+
+        tag = Tag.objects.create(name="Tag 1", slug="tag-1")
+        self.device1.tags.add(tag)
+        self.interface11.tags.add(tag)
+        with CaptureQueriesContext(connection) as queries:
+            result = self.execute_query(query)
+        self.assertIsNone(result.errors)
+
+        devices = {item["name"]: item for item in result.data["devices"]}
+        self.assertEqual(devices["Device 1"]["tags"], [{"name": "Tag 1"}])
+        self.assertEqual(devices["Device 2"]["tags"], [])
+        self.assertEqual(devices["Device 1"]["config_context"], {"a": 123, "b": 456, "c": 777})
+        self.assertEqual(devices["Device 3"]["config_context"], {})
+        self.assertEqual([item["tags"] for item in result.data["interfaces"]].count([{"name": "Tag 1"}]), 1)
+
+        # Further devices and interfaces add no queries
+        for i in range(4, 8):
+            device = Device.objects.create(
+                name=f"Device {i}",
+                device_type=self.devicetype,
+                device_role=self.devicerole1,
+                site=self.site1,
+                status=self.status1,
+            )
+            device.tags.add(tag)
+            Interface.objects.create(name="Int1", type=InterfaceTypeChoices.TYPE_VIRTUAL, device=device)
+        self.request = RequestFactory().request(SERVER_NAME="WebRequestContext")
+        self.request.id = uuid.uuid4()
+        self.request.user = self.user
+        with self.assertNumQueries(len(queries)):
+            result = self.execute_query(query)
+        self.assertEqual(len(result.data["devices"]), 7)
+        self.assertEqual(len(result.data["interfaces"]), 10)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_query_devices_optimized(self):
+        """The related objects selected for each device are retrieved along with the devices."""
+
+        query = """
+        query {
+            devices {
+                name
+                site { name region { name } }
+                interfaces { name device { name } ip_addresses { address } }
+            }
+        }
+        """
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.execute_query(query)
+        self.assertIsNone(result.errors)
+
+        devices = {item["name"]: item for item in result.data["devices"]}
+        self.assertEqual(devices["Device 1"]["site"], {"name": "Site-1", "region": {"name": "Region1"}})
+        self.assertEqual(
+            devices["Device 1"]["interfaces"],
+            [
+                {"name": "Int1", "device": {"name": "Device 1"}, "ip_addresses": [{"address": "10.0.1.1/24"}]},
+                {"name": "Int2", "device": {"name": "Device 1"}, "ip_addresses": [{"address": "10.0.2.1/30"}]},
+            ],
+        )
+        self.assertEqual(devices["Device 3"]["site"], {"name": "Site-2", "region": {"name": "Region2"}})
+
+        # Further devices add no queries
+        for i in range(4, 8):
+            device = Device.objects.create(
+                name=f"Device {i}",
+                device_type=self.devicetype,
+                device_role=self.devicerole1,
+                site=self.site2,
+                status=self.status1,
+            )
+            interface = Interface.objects.create(name="Int1", type=InterfaceTypeChoices.TYPE_VIRTUAL, device=device)
+            IPAddress.objects.create(address=f"10.0.{i}.1/24", status=self.status1, assigned_object=interface)
+        with self.assertNumQueries(len(queries)):
+            result = self.execute_query(query)
+        self.assertEqual(len(result.data["devices"]), 7)
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_query_devices_paginated(self):
+        """Lists of devices and of their interfaces are paginated by limit and offset, or by limit and cursor."""
+
+        ids = sorted(str(device.pk) for device in Device.objects.all())
+        names = list(Device.objects.order_by("name").values_list("name", flat=True))
+
+        result = self.execute_query("query { devices(limit: 2) { name } }")
+        self.assertIsNone(result.errors)
+        self.assertEqual([item["name"] for item in result.data["devices"]], names[:2])
+
+        result = self.execute_query("query { devices(limit: 2, offset: 2) { name } }")
+        self.assertEqual([item["name"] for item in result.data["devices"]], names[2:])
+
+        result = self.execute_query("query ($after: ID) { devices(limit: 1, after: $after) { id } }", {"after": ids[0]})
+        self.assertEqual([item["id"] for item in result.data["devices"]], ids[1:2])
+
+        query = 'query { devices(name: "Device 1") { interfaces(limit: 1, offset: 1) { name } } }'
+        result = self.execute_query(query)
+        self.assertIsNone(result.errors)
+        self.assertEqual(result.data["devices"], [{"interfaces": [{"name": "Int2"}]}])
+
+        query = f'query {{ device(id: "{self.device1.pk}") {{ interfaces(after: "{self.interface11.pk}") {{ id }} }} }}'
+        result = self.execute_query(query)
+        self.assertIsNone(result.errors)
+        interface_ids = sorted(str(pk) for pk in self.device1.interfaces.values_list("pk", flat=True))
+        self.assertEqual(
+            [item["id"] for item in result.data["device"]["interfaces"]],
+            [pk for pk in interface_ids if pk > str(self.interface11.pk)],
+        )
+
+        with override_settings(GRAPHQL_MAX_PAGE_SIZE=2):
+            result = self.execute_query("query { devices(limit: 10) { name } }")
+        self.assertEqual(len(result.data["devices"]), 2)
+
+        result = self.execute_query('query { devices(after: "invalid") { name } }')
+        self.assertIsNone(result.data["devices"])
+        self.assertIn("after must be the ID of an object", str(result.errors[0]))
+
+        result = self.execute_query("query { devices(limit: -1) { name } }")
+        self.assertIn("limit must not be negative", str(result.errors[0]))
+
+    @override_settings(EXEMPT_VIEW_PERMISSIONS=["*"])
+    def test_query_sites_devices_paginated(self):
+        """Only a page of the devices of each site is retrieved, rather than every device prefetched."""
+
+        query = "query { sites { name devices(limit: 1) { name site { name } } } }"
+
+        with CaptureQueriesContext(connection) as queries:
+            result = self.execute_query(query)
+        self.assertIsNone(result.errors)
+        for site in result.data["sites"]:
+            self.assertEqual(len(site["devices"]), 1)
+            self.assertEqual(site["devices"][0]["site"], {"name": site["name"]})
+
+        # One query for the sites, and one query for a single device (with its site) of each site
+        device_queries = [query["sql"] for query in queries if 'FROM "dcim_device"' in query["sql"]]
+        self.assertEqual(len(device_queries), Site.objects.count())
+        for sql in device_queries:
+            self.assertIn("LIMIT 1", sql)
+            self.assertIn('INNER JOIN "dcim_site"', sql)
@@ -2,9 +2,8 @@ from django.conf import settings
 from django.conf.urls import include
 from django.urls import path, re_path
 from django.views.static import serve
-from graphene_django.views import GraphQLView
 
-from nautobot.core.views import HomeView, StaticMediaFailureView, SearchView
+from nautobot.core.views import GraphQLView, HomeView, StaticMediaFailureView, SearchView
 from nautobot.extras.plugins.urls import (
     plugin_admin_patterns,
     plugin_patterns,
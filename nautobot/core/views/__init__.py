@@ -11,6 +11,8 @@ from django.urls import reverse
 from django.views.decorators.csrf import requires_csrf_token
 from django.views.defaults import ERROR_500_TEMPLATE_NAME
 from django.views.generic import TemplateView, View
+from graphene_django.views import GraphQLView as GraphQLView_
+from graphql.execution import ExecutionResult
 from packaging import version
 
 from nautobot.circuits.models import Circuit, Provider
@@ -28,6 +30,8 @@ from nautobot.dcim.models import (
 )
 from nautobot.core.constants import SEARCH_MAX_RESULTS, SEARCH_TYPES
 from nautobot.core.forms import SearchForm
+from nautobot.core.graphql.documents import CachedDocumentBackend
+from nautobot.core.graphql.limits import check_query_limits, QueryRejectedError
 from nautobot.core.releases import get_latest_release
 from nautobot.extras.choices import JobResultStatusChoices
 from nautobot.extras.models import GitRepository, ObjectChange, JobResult
@@ -179,6 +183,28 @@ class SearchView(View):
         )
 
 
+class GraphQLView(GraphQLView_):
+    """
+    The GraphiQL interface and its GraphQL endpoint, rejecting queries which exceed the limits of depth and cost.
+    """
+
+    def __init__(self, *args, backend=None, **kwargs):
+        super().__init__(*args, backend=backend or CachedDocumentBackend(), **kwargs)
+
+    def execute_graphql_request(self, request, data, query, variables, operation_name, show_graphiql=False):
+        if query and not show_graphiql:
+            try:
+                document = self.get_backend(request).document_from_string(self.schema, query)
+                check_query_limits(self.schema, document.document_ast, operation_name, request, variables)
+            except QueryRejectedError as e:
+                return ExecutionResult(errors=[e], invalid=True)
+            except Exception:
+                # Invalid queries are reported as usual
+                pass
+
+        return super().execute_graphql_request(request, data, query, variables, operation_name, show_graphiql)
+
+
 class StaticMediaFailureView(View):
     """
     Display a user-friendly error message with troubleshooting tips when a static media file fails to load.
@@ -12,14 +12,18 @@ from django.core.exceptions import (
 from django.db import transaction, IntegrityError
 from django.db.models import ManyToManyField, ProtectedError
 from django.forms import Form, ModelMultipleChoiceField, MultipleHiddenInput, Textarea
-from django.http import HttpResponse
+from django.http import HttpResponse, StreamingHttpResponse
 from django.shortcuts import get_object_or_404, redirect, render
 from django.utils.html import escape
 from django.utils.http import is_safe_url
 from django.utils.safestring import mark_safe
 from django.views.generic import View
+from django_rq.queues import get_connection
 from django_tables2 import RequestConfig
+from rq import Worker
 
+from nautobot.core.settings_funcs import is_truthy
+from nautobot.extras.exports import enqueue_export, get_export_filename
 from nautobot.extras.models import CustomField, ExportTemplate
 from nautobot.utilities.error_handlers import handle_protectederror
 from nautobot.utilities.exceptions import AbortTransaction
@@ -35,9 +39,11 @@ from nautobot.utilities.forms import (
 from nautobot.utilities.paginator import EnhancedPaginator, get_paginate_count
 from nautobot.utilities.permissions import get_permission_for_model
 from nautobot.utilities.utils import (
+    buffer_stream,
     csv_format,
     normalize_querydict,
     prepare_cloned_fields,
+    queryset_iterator,
 )
 from nautobot.utilities.views import GetReturnURLMixin, ObjectPermissionRequiredMixin
 
@@ -114,17 +120,16 @@ class ObjectListView(ObjectPermissionRequiredMixin, View):
 
     def queryset_to_yaml(self):
         """
-        Export the queryset of objects as concatenated YAML documents.
+        Export the queryset of objects as concatenated YAML documents, yielded one document at a time.
         """
-        yaml_data = [obj.to_yaml() for obj in self.queryset]
-
-        return "---\n".join(yaml_data)
+        for i, obj in enumerate(queryset_iterator(self.queryset)):
+            yield ("---\n" if i else "") + obj.to_yaml()
 
     def queryset_to_csv(self):
         """
-        Export the queryset of objects as comma-separated value (CSV), using the model's to_csv() method.
+        Export the queryset of objects as comma-separated value (CSV), using the model's to_csv() method. The CSV is
+        yielded one line at a time.
         """
-        csv_data = []
         custom_fields = []
 
         # Start with the column headers
@@ -136,18 +141,16 @@ class ObjectListView(ObjectPermissionRequiredMixin, View):
                 headers.append(custom_field.name)
                 custom_fields.append(custom_field.name)
 
-        csv_data.append(",".join(headers))
+        yield ",".join(headers)
 
-        # Iterate through the queryset appending each object
-        for obj in self.queryset:
+        # Iterate through the queryset, fetching objects in chunks rather than all at once
+        for obj in queryset_iterator(self.queryset):
             data = obj.to_csv()
 
             for custom_field in custom_fields:
                 data += (obj.cf.get(custom_field, ""),)
 
-            csv_data.append(csv_format(data))
-
-        return "\n".join(csv_data)
+            yield "\n" + csv_format(data)
 
     def get(self, request):
 
@@ -157,6 +160,25 @@ class ObjectListView(ObjectPermissionRequiredMixin, View):
         if self.filterset:
             self.queryset = self.filterset(request.GET, self.queryset).qs
 
+        # Export in the background if requested (and if an RQ worker is running to do so), rather than streaming the
+        # export from this process
+        if (
+            "export" in request.GET
+            and is_truthy(request.GET.get("async", False))
+            and Worker.count(get_connection("default"))
+        ):
+            et = None
+            if request.GET.get("export"):
+                et = get_object_or_404(ExportTemplate, content_type=content_type, name=request.GET.get("export"))
+            if et is not None or get_export_filename(model) is not None:
+                job_result = enqueue_export(
+                    self.queryset,
+                    request.user,
+                    export_template=et,
+                    view_class=f"{type(self).__module__}.{type(self).__qualname__}",
+                )
+                return redirect(job_result.get_absolute_url())
+
         # Check for export template rendering
         if request.GET.get("export"):
             et = get_object_or_404(
@@ -174,14 +196,14 @@ class ObjectListView(ObjectPermissionRequiredMixin, View):
 
         # Check for YAML export support
         elif "export" in request.GET and hasattr(model, "to_yaml"):
-            response = HttpResponse(self.queryset_to_yaml(), content_type="text/yaml")
+            response = StreamingHttpResponse(buffer_stream(self.queryset_to_yaml()), content_type="text/yaml")
             filename = "nautobot_{}.yaml".format(self.queryset.model._meta.verbose_name_plural)
             response["Content-Disposition"] = 'attachment; filename="{}"'.format(filename)
             return response
 
         # Fall back to built-in CSV formatting if export requested but no template specified
         elif "export" in request.GET and hasattr(model, "to_csv"):
-            response = HttpResponse(self.queryset_to_csv(), content_type="text/csv")
+            response = StreamingHttpResponse(buffer_stream(self.queryset_to_csv()), content_type="text/csv")
             filename = "nautobot_{}.csv".format(self.queryset.model._meta.verbose_name_plural)
             response["Content-Disposition"] = 'attachment; filename="{}"'.format(filename)
             return response
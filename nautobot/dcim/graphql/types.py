@@ -2,6 +2,7 @@ import graphene
 from graphene_django import DjangoObjectType
 from graphene_django.converter import convert_django_field
 
+from nautobot.core.graphql.pagination import DjangoPaginatedListField
 from nautobot.dcim.fields import MACAddressField
 from nautobot.dcim.models import Site, Device, Interface, Rack, Cable, ConsoleServerPort
 from nautobot.dcim.filters import (
@@ -83,10 +84,7 @@ class InterfaceType(DjangoObjectType, CableTerminationMixin):
         filterset_class = InterfaceFilterSet
         exclude = ["_name"]
 
-    ip_addresses = graphene.List(IPAddressType)
-
-    def resolve_ip_addresses(self, args):
-        return self.ip_addresses.all()
+    ip_addresses = DjangoPaginatedListField(IPAddressType)
 
 
 class ConsoleServerPortType(DjangoObjectType, CableTerminationMixin):
@@ -1,6 +1,13 @@
+import itertools
+import multiprocessing
+import time
+import uuid
+
+from django.apps import apps
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.management.base import BaseCommand
-from django.core.management.color import no_style
-from django.db import connection
+from django.db import connections, transaction
 
 from nautobot.circuits.models import CircuitTermination
 from nautobot.dcim.models import (
@@ -12,7 +19,6 @@ from nautobot.dcim.models import (
     PowerOutlet,
     PowerPort,
 )
-from nautobot.dcim.signals import create_cablepath
 
 ENDPOINT_MODELS = (
     CircuitTermination,
@@ -24,6 +30,85 @@ ENDPOINT_MODELS = (
     PowerPort,
 )
 
+# The number of origins traced together by CablePath.from_origins()
+BATCH_SIZE = 1000
+
+# Origins of each model are divided into this many shards by primary key range. Progress is recorded per shard, so the
+# number of shards must not depend on the number of workers for an interrupted run to be resumed.
+SHARD_COUNT = 64
+
+CHECKPOINT_CACHE_KEY = "nautobot.dcim.trace_paths.{model}.{shard}"
+
+
+def get_shard_bounds(shard):
+    """
+    Return the lower (inclusive) and upper (exclusive, or None) primary key bounds of the given shard. Primary keys
+    are random UUIDs, so dividing the UUID space evenly yields evenly sized shards.
+    """
+    step = 2 ** 128 // SHARD_COUNT
+    lower = uuid.UUID(int=shard * step)
+    upper = uuid.UUID(int=(shard + 1) * step) if shard < SHARD_COUNT - 1 else None
+    return lower, upper
+
+
+def save_paths(model, origins, replace=False):
+    """
+    Trace and save the CablePaths originating from a batch of `model` instances. If `replace` is True, any existing
+    CablePaths originating from these instances are deleted first.
+    """
+    cable_paths = [cp for cp in CablePath.from_origins(origins) if cp is not None]
+    with transaction.atomic():
+        if replace:
+            CablePath.objects.filter(
+                origin_type=ContentType.objects.get_for_model(model), origin_id__in=[origin.pk for origin in origins]
+            ).delete()
+        CablePath.objects.bulk_create(cable_paths, batch_size=BATCH_SIZE)
+        # Record a direct reference to each CablePath on its originating object
+        for cp in cable_paths:
+            cp.origin._path = cp
+        model.objects.bulk_update([cp.origin for cp in cable_paths], ["_path"], batch_size=BATCH_SIZE)
+
+
+def trace_shard(model_label, shard, force=False, resume=False):
+    """
+    Trace the CablePaths originating from all cabled `model_label` instances within the given shard, in order of
+    primary key. When forcing recalculation of existing paths, progress is recorded after each batch so that an
+    interrupted run may be resumed. Returns the number of origins traced.
+    """
+    model = apps.get_model(model_label)
+    checkpoint_key = CHECKPOINT_CACHE_KEY.format(model=model._meta.label_lower, shard=shard)
+    lower, upper = get_shard_bounds(shard)
+
+    origins = model.objects.filter(cable__isnull=False, pk__gte=lower).order_by("pk")
+    if upper is not None:
+        origins = origins.filter(pk__lt=upper)
+    if not force:
+        origins = origins.filter(_path__isnull=True)
+    elif resume and cache.get(checkpoint_key) is not None:
+        origins = origins.filter(pk__gt=cache.get(checkpoint_key))
+
+    count = 0
+    origins = origins.iterator()
+    while True:
+        batch = list(itertools.islice(origins, BATCH_SIZE))
+        if not batch:
+            break
+        save_paths(model, batch, replace=force)
+        if force:
+            cache.set(checkpoint_key, batch[-1].pk, timeout=None)
+        count += len(batch)
+
+    return count
+
+
+def trace_shard_star(args):
+    return trace_shard(*args)
+
+
+def init_worker():
+    # Each worker process must open its own database connections rather than share those inherited from the parent.
+    connections.close_all()
+
 
 class Command(BaseCommand):
     help = "Generate any missing cable paths among all cable termination objects in Nautobot"
@@ -35,6 +120,19 @@ class Command(BaseCommand):
             dest="force",
             help="Force recalculation of all existing cable paths",
         )
+        parser.add_argument(
+            "--resume",
+            action="store_true",
+            dest="resume",
+            help="Resume an interrupted --force run instead of starting over",
+        )
+        parser.add_argument(
+            "--workers",
+            type=int,
+            default=1,
+            dest="workers",
+            help="Number of worker processes among which to divide the tracing (default: 1)",
+        )
         parser.add_argument(
             "--no-input",
             action="store_true",
@@ -51,50 +149,83 @@ class Command(BaseCommand):
 
     def handle(self, *model_names, **options):
 
-        # If --force was passed, first delete all existing CablePaths
-        if options["force"]:
-            cable_paths = CablePath.objects.all()
-            paths_count = cable_paths.count()
+        force = options["force"]
+        resume = force and options["resume"]
+
+        if force and not resume:
+            paths_count = CablePath.objects.count()
 
             # Prompt the user to confirm recalculation of all paths
             if paths_count and not options["no_input"]:
                 self.stdout.write(self.style.ERROR("WARNING: Forcing recalculation of all cable paths."))
-                self.stdout.write(
-                    f"This will delete and recalculate all {paths_count} existing cable paths. Are you sure?"
-                )
+                self.stdout.write(f"This will recalculate all {paths_count} existing cable paths. Are you sure?")
                 confirmation = input("Type yes to confirm: ")
                 if confirmation != "yes":
                     self.stdout.write(self.style.SUCCESS("Aborting"))
                     return
 
-            # Delete all existing CablePath instances
-            self.stdout.write(f"Deleting {paths_count} existing cable paths...")
-            deleted_count, _ = CablePath.objects.all().delete()
-            self.stdout.write((self.style.SUCCESS(f"  Deleted {deleted_count} paths")))
-
-            # Reinitialize the model's PK sequence
-            self.stdout.write("Resetting database sequence for CablePath model")
-            sequence_sql = connection.ops.sequence_reset_sql(no_style(), [CablePath])
-            with connection.cursor() as cursor:
-                for sql in sequence_sql:
-                    cursor.execute(sql)
-
-        # Retrace paths
-        for model in ENDPOINT_MODELS:
-            origins = model.objects.filter(cable__isnull=False)
-            if not options["force"]:
-                origins = origins.filter(_path__isnull=True)
-            origins_count = origins.count()
-            if not origins_count:
-                self.stdout.write(f"Found no missing {model._meta.verbose_name} paths; skipping")
-                continue
-            self.stdout.write(f"Retracing {origins_count} cabled {model._meta.verbose_name_plural}...")
-            i = 0
-            for i, obj in enumerate(origins, start=1):
-                create_cablepath(obj)
-                if not i % 100:
-                    self.draw_progress_bar(i * 100 / origins_count)
-            self.draw_progress_bar(100)
-            self.stdout.write(self.style.SUCCESS(f"\n  Retraced {i} {model._meta.verbose_name_plural}"))
+            # Discard the progress of any previous run
+            cache.delete_many(
+                [
+                    CHECKPOINT_CACHE_KEY.format(model=model._meta.label_lower, shard=shard)
+                    for model in ENDPOINT_MODELS
+                    for shard in range(SHARD_COUNT)
+                ]
+            )
+
+        pool = None
+        if options["workers"] > 1:
+            # Connections must not be shared with the forked worker processes
+            connections.close_all()
+            pool = multiprocessing.get_context("fork").Pool(options["workers"], initializer=init_worker)
+
+        try:
+            for model in ENDPOINT_MODELS:
+                self.trace_model(model, force, resume, pool)
+        finally:
+            if pool is not None:
+                pool.close()
+                pool.join()
 
         self.stdout.write(self.style.SUCCESS("Finished."))
+
+    def trace_model(self, model, force, resume, pool):
+        """
+        Retrace the paths originating from all cabled instances of the given model, one shard at a time or in parallel
+        across the worker pool.
+        """
+        if force:
+            # Delete any paths whose origins are no longer cabled
+            stale_paths = CablePath.objects.filter(origin_type=ContentType.objects.get_for_model(model)).exclude(
+                origin_id__in=model.objects.filter(cable__isnull=False).values("pk")
+            )
+            stale_paths.delete()
+
+        origins = model.objects.filter(cable__isnull=False)
+        if not force:
+            origins = origins.filter(_path__isnull=True)
+        origins_count = origins.count()
+        if not origins_count:
+            self.stdout.write(f"Found no missing {model._meta.verbose_name} paths; skipping")
+            return
+        self.stdout.write(f"Retracing {origins_count} cabled {model._meta.verbose_name_plural}...")
+
+        start_time = time.monotonic()
+        args = [(model._meta.label, shard, force, resume) for shard in range(SHARD_COUNT)]
+        if pool is not None:
+            results = pool.imap_unordered(trace_shard_star, args)
+        else:
+            results = (trace_shard(*arg) for arg in args)
+        i = 0
+        for count in results:
+            i += count
+            self.draw_progress_bar(min(i * 100 / origins_count, 100))
+        elapsed = time.monotonic() - start_time
+
+        self.draw_progress_bar(100)
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"\n  Retraced {i} {model._meta.verbose_name_plural} in {elapsed:.1f} seconds "
+                f"({i / elapsed if elapsed else 0:.0f} per second)"
+            )
+        )
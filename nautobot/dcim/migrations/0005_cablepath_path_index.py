@@ -0,0 +1,26 @@
+from django.db import migrations
+
+
+def create_path_index(apps, schema_editor):
+    """
+    Index the nodes of each CablePath so that `path__contains` lookups need not scan every path. This is only
+    supported on PostgreSQL, where a GIN index serves the `?` (key exists) operator used by the lookup.
+    """
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("CREATE INDEX dcim_cablepath_path_gin ON dcim_cablepath USING gin (path)")
+
+
+def drop_path_index(apps, schema_editor):
+    if schema_editor.connection.vendor == "postgresql":
+        schema_editor.execute("DROP INDEX IF EXISTS dcim_cablepath_path_gin")
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("dcim", "0004_initial_part_4"),
+    ]
+
+    operations = [
+        migrations.RunPython(create_path_index, drop_path_index),
+    ]
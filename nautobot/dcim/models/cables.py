@@ -12,6 +12,7 @@ from nautobot.dcim.choices import *
 from nautobot.dcim.constants import *
 from nautobot.dcim.fields import JSONPathField
 from nautobot.dcim.utils import (
+    compile_path_node,
     decompile_path_node,
     object_to_path_node,
     path_node_to_object,
@@ -361,17 +362,20 @@ class CablePath(BaseModel):
         if origin is None or origin.cable is None:
             return None
 
+        return cls._trace(origin, origin, path=[], position_stack=[], is_active=True, visited_nodes=set())
+
+    @classmethod
+    def _trace(cls, origin, node, path, position_stack, is_active, visited_nodes):
+        """
+        Trace a CablePath onward from `node`, the termination at the end of the partial `path` from `origin`.
+        `position_stack`, `is_active` and `visited_nodes` reflect the state of the trace along the partial path.
+        """
         # Import added here to avoid circular imports with Cable.
         from nautobot.circuits.models import CircuitTermination
 
         destination = None
-        path = []
-        position_stack = []
-        is_active = True
         is_split = False
 
-        node = origin
-        visited_nodes = set()
         while node.cable is not None:
             if node.id in visited_nodes:
                 raise ValidationError("a loop is detected in the path")
@@ -439,6 +443,196 @@ class CablePath(BaseModel):
             is_split=is_split,
         )
 
+    @classmethod
+    def from_origins(cls, origins):
+        """
+        Create new CablePath instances as traced from each of the given path origins. This is equivalent to calling
+        `from_origin()` for each origin, but rather than querying for each node along each path in turn, every hop is
+        resolved for all paths at once using one query per model type. Returns a list with a CablePath (or None) for
+        each origin.
+        """
+        # Import added here to avoid circular imports with Cable.
+        from nautobot.circuits.models import CircuitTermination
+
+        origins = list(origins)
+        cable_ct = ContentType.objects.get_for_model(Cable)
+        connected_status = Cable.STATUS_CONNECTED
+        traces = [
+            {
+                "origin": origin,
+                "node": origin,
+                "path": [],
+                "position_stack": [],
+                "is_active": True,
+                "is_split": False,
+                "visited_nodes": set(),
+                "destination": None,
+            }
+            for origin in origins
+            if origin is not None and origin.cable_id is not None
+        ]
+
+        pending = traces
+        while pending:
+            cable_statuses = dict(
+                Cable.objects.filter(pk__in={t["node"].cable_id for t in pending}).values_list("pk", "status_id")
+            )
+            peer_ids = defaultdict(set)
+            for trace in pending:
+                peer_ids[trace["node"]._cable_peer_type_id].add(trace["node"]._cable_peer_id)
+            peers = {}
+            for ct_id, object_ids in peer_ids.items():
+                if ct_id is not None:
+                    model = ContentType.objects.get_for_id(ct_id).model_class()
+                    peers.update(model.objects.in_bulk(object_ids))
+
+            # Follow each cable to its far-end termination
+            for trace in pending:
+                node = trace["node"]
+                if node.id in trace["visited_nodes"]:
+                    raise ValidationError("a loop is detected in the path")
+                trace["visited_nodes"].add(node.id)
+                if cable_statuses.get(node.cable_id) != connected_status.pk:
+                    trace["is_active"] = False
+                trace["path"].append(compile_path_node(cable_ct.pk, node.cable_id))
+                trace["peer"] = peers.get(node._cable_peer_id)
+
+            # Resolve the next node of each path, using one query per model type
+            front_port_peers = [t for t in pending if isinstance(t["peer"], FrontPort)]
+            rear_port_peers = [t for t in pending if isinstance(t["peer"], RearPort)]
+            circuit_termination_peers = [t for t in pending if isinstance(t["peer"], CircuitTermination)]
+            rear_ports = RearPort.objects.in_bulk({t["peer"].rear_port_id for t in front_port_peers})
+            for trace in rear_port_peers:
+                # Determine the peer FrontPort's position
+                if trace["peer"].positions == 1:
+                    trace["position"] = 1
+                elif trace["position_stack"]:
+                    trace["position"] = trace["position_stack"].pop()
+                else:
+                    trace["position"] = None
+            front_ports = {
+                (front_port.rear_port_id, front_port.rear_port_position): front_port
+                for front_port in FrontPort.objects.filter(
+                    rear_port__in={t["peer"].pk for t in rear_port_peers if t["position"] is not None},
+                    rear_port_position__in={t["position"] for t in rear_port_peers if t["position"] is not None},
+                )
+            }
+            circuit_terminations = {
+                (circuit_termination.circuit_id, circuit_termination.term_side): circuit_termination
+                for circuit_termination in CircuitTermination.objects.filter(
+                    circuit__in={t["peer"].circuit_id for t in circuit_termination_peers}
+                )
+            }
+
+            next_pending = []
+            for trace in pending:
+                peer_termination = trace.pop("peer")
+                path = trace["path"]
+
+                # Follow a FrontPort to its corresponding RearPort
+                if isinstance(peer_termination, FrontPort):
+                    path.append(object_to_path_node(peer_termination))
+                    node = rear_ports[peer_termination.rear_port_id]
+                    if node.positions > 1:
+                        trace["position_stack"].append(peer_termination.rear_port_position)
+                    path.append(object_to_path_node(node))
+
+                # Follow a RearPort to its corresponding FrontPort (if any)
+                elif isinstance(peer_termination, RearPort):
+                    path.append(object_to_path_node(peer_termination))
+                    position = trace.pop("position")
+                    if position is None:
+                        # No position indicated: path has split, so we stop at the RearPort
+                        trace["is_split"] = True
+                        continue
+                    node = front_ports.get((peer_termination.pk, position))
+                    if node is None:
+                        # No corresponding FrontPort found for the RearPort
+                        continue
+                    path.append(object_to_path_node(node))
+
+                # Follow a Circuit Termination if there is a corresponding Circuit Termination
+                elif isinstance(peer_termination, CircuitTermination):
+                    peer_side = "Z" if peer_termination.term_side == "A" else "A"
+                    node = circuit_terminations.get((peer_termination.circuit_id, peer_side))
+                    # A Circuit Termination does not require a peer.
+                    if node is None:
+                        trace["destination"] = peer_termination
+                        continue
+                    path.append(object_to_path_node(peer_termination))
+                    path.append(object_to_path_node(node))
+
+                # Anything else marks the end of the path
+                else:
+                    trace["destination"] = peer_termination
+                    continue
+
+                if node.cable_id is not None:
+                    trace["node"] = node
+                    next_pending.append(trace)
+
+            pending = next_pending
+
+        cable_paths = {
+            id(trace["origin"]): cls(
+                origin=trace["origin"],
+                destination=trace["destination"],
+                path=trace["path"],
+                is_active=trace["is_active"] and trace["destination"] is not None,
+                is_split=trace["is_split"],
+            )
+            for trace in traces
+        }
+        return [cable_paths.get(id(origin)) for origin in origins]
+
+    def retrace(self, node):
+        """
+        Re-trace this CablePath after a change to `node`, one of the objects within its path. Only the portion of the
+        path from the segment containing `node` onward is traced again; the segments preceding it are reused. Returns a
+        new, unsaved CablePath instance, or None if the origin is no longer connected.
+        """
+        node = object_to_path_node(node)
+        # Each segment of the path comprises a Cable followed by the pair of nodes on its far end, so the segment
+        # containing `node` begins with the Cable at the nearest preceding multiple of three.
+        start = self.path.index(node) // 3 * 3 if node in self.path else 0
+        if start == 0:
+            return CablePath.from_origin(self.origin)
+
+        # Replay the state of the trace along the preserved segments
+        prefix = self.path[:start]
+        nodes = [decompile_path_node(n) for n in prefix]
+        front_port_ct = ContentType.objects.get_for_model(FrontPort)
+        rear_port_ct = ContentType.objects.get_for_model(RearPort)
+        rear_port_positions = dict(
+            FrontPort.objects.filter(pk__in=[pk for ct, pk in nodes if ct == front_port_ct.pk]).values_list(
+                "pk", "rear_port_position"
+            )
+        )
+        rear_port_sizes = dict(
+            RearPort.objects.filter(pk__in=[pk for ct, pk in nodes if ct == rear_port_ct.pk]).values_list(
+                "pk", "positions"
+            )
+        )
+        position_stack = []
+        for (_, _), (near_ct, near_pk), (far_ct, far_pk) in zip(nodes[::3], nodes[1::3], nodes[2::3]):
+            if near_ct == front_port_ct.pk and rear_port_sizes[far_pk] > 1:
+                position_stack.append(rear_port_positions[near_pk])
+            elif near_ct == rear_port_ct.pk and rear_port_sizes[near_pk] > 1:
+                position_stack.pop()
+
+        cable_pks = [pk for _, pk in nodes[::3]]
+        is_active = not Cable.objects.filter(pk__in=cable_pks).exclude(status=Cable.STATUS_CONNECTED).exists()
+        visited_nodes = {self.origin_id} | {pk for _, pk in nodes[2:-1:3]}
+
+        return CablePath._trace(
+            self.origin,
+            path_node_to_object(prefix[-1]),
+            path=prefix,
+            position_stack=position_stack,
+            is_active=is_active,
+            visited_nodes=visited_nodes,
+        )
+
     def get_path(self):
         """
         Return the path as a list of prefetched objects.
@@ -35,6 +35,25 @@ def create_cablepath(node, rebuild=True):
         rebuild_paths(node)
 
 
+def retrace_cablepath(cablepath, node):
+    """
+    Re-trace an existing CablePath following a change to the specified node within it, updating it in place. Only the
+    portion of the path from the node onward is traced again. The CablePath is deleted if its origin is no longer
+    connected.
+    """
+    cp = cablepath.retrace(node)
+    if cp:
+        CablePath.objects.filter(pk=cablepath.pk).update(
+            path=cp.path,
+            destination_type=ContentType.objects.get_for_model(cp.destination) if cp.destination else None,
+            destination_id=cp.destination.pk if cp.destination else None,
+            is_active=cp.is_active,
+            is_split=cp.is_split,
+        )
+    else:
+        cablepath.delete()
+
+
 def rebuild_paths(obj):
     """
     Rebuild all CablePaths which traverse the specified node
@@ -44,9 +63,7 @@ def rebuild_paths(obj):
     with transaction.atomic():
         for cp in cable_paths:
             invalidate_obj(cp.origin)
-            cp.delete()
-            # Prevent looping back to rebuild_paths during the atomic transaction.
-            create_cablepath(cp.origin, rebuild=False)
+            retrace_cablepath(cp, obj)
 
 
 #
@@ -178,14 +195,4 @@ def nullify_connected_endpoints(instance, **kwargs):
 
     # Delete and retrace any dependent cable paths
     for cablepath in CablePath.objects.filter(path__contains=instance):
-        cp = CablePath.from_origin(cablepath.origin)
-        if cp:
-            CablePath.objects.filter(pk=cablepath.pk).update(
-                path=cp.path,
-                destination_type=ContentType.objects.get_for_model(cp.destination) if cp.destination else None,
-                destination_id=cp.destination.pk if cp.destination else None,
-                is_active=cp.is_active,
-                is_split=cp.is_split,
-            )
-        else:
-            cablepath.delete()
+        retrace_cablepath(cablepath, instance)
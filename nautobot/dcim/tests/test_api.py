@@ -1,3 +1,5 @@
+import json
+
 from django.contrib.auth import get_user_model
 from django.urls import reverse
 from rest_framework import status
@@ -1037,6 +1039,23 @@ class DeviceTest(APIViewTestCases.APIViewTestCase):
 
         self.assertFalse("config_context" in response.data["results"][0])
 
+    def test_config_context_bulk(self):
+        """
+        Check that the config contexts of all matching devices can be retrieved in a single request.
+        """
+        self.add_permissions("dcim.view_device")
+        url = reverse("dcim-api:device-config-context")
+        response = self.client.get(url, **self.header)
+        self.assertHttpStatus(response, status.HTTP_200_OK)
+
+        config_contexts = json.loads(b"".join(response.streaming_content))
+        self.assertEqual(
+            config_contexts, {str(device.pk): device.get_config_context() for device in Device.objects.all()}
+        )
+
+        response = self.client.get(url + "?name=Device 1", **self.header)
+        self.assertEqual(list(json.loads(b"".join(response.streaming_content)).values()), [{"A": 1}])
+
     def test_unique_name_per_site_constraint(self):
         """
         Check that creating a device with a duplicate name within a site fails.
@@ -1,10 +1,19 @@
+import uuid
+from io import StringIO
+from unittest.mock import patch
+
+from django.apps import apps
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.exceptions import ValidationError
-from django.test import TestCase
+from django.core.management import call_command
+from django.test import TestCase, TransactionTestCase
 
 from nautobot.circuits.models import *
 from nautobot.dcim.models import *
+from nautobot.dcim.management.commands import trace_paths
 from nautobot.dcim.utils import object_to_path_node
+from nautobot.extras.management import create_custom_statuses
 from nautobot.extras.models import Status
 
 
@@ -1458,3 +1467,232 @@ class CablePathTestCase(TestCase):
                 rearport1: 2,
             }
         )
+
+    def test_303_retrace_path_from_changed_node(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C3-- [RP2] [FP2:1] --C4-- [IF3]
+        [IF2] --C2-- [FP1:2]                    [FP2:2] --C5-- [IF4]
+        """
+        interface1 = Interface.objects.create(device=self.device, name="Interface 1")
+        interface2 = Interface.objects.create(device=self.device, name="Interface 2")
+        interface3 = Interface.objects.create(device=self.device, name="Interface 3")
+        interface4 = Interface.objects.create(device=self.device, name="Interface 4")
+        rearport1 = RearPort.objects.create(device=self.device, name="Rear Port 1", positions=4)
+        rearport2 = RearPort.objects.create(device=self.device, name="Rear Port 2", positions=4)
+        frontport1_1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1:1", rear_port=rearport1, rear_port_position=1
+        )
+        frontport1_2 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1:2", rear_port=rearport1, rear_port_position=2
+        )
+        frontport2_1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 2:1", rear_port=rearport2, rear_port_position=1
+        )
+        frontport2_2 = FrontPort.objects.create(
+            device=self.device, name="Front Port 2:2", rear_port=rearport2, rear_port_position=2
+        )
+        cable1 = Cable.objects.create(termination_a=interface1, termination_b=frontport1_1, status=self.status)
+        Cable.objects.create(termination_a=interface2, termination_b=frontport1_2, status=self.status)
+        cable3 = Cable.objects.create(termination_a=rearport1, termination_b=rearport2, status=self.status)
+        cable4 = Cable.objects.create(termination_a=frontport2_1, termination_b=interface3, status=self.status)
+        Cable.objects.create(termination_a=frontport2_2, termination_b=interface4, status=self.status)
+
+        # Re-tracing from any node within any path must match a complete trace from its origin
+        for cablepath in CablePath.objects.all():
+            expected = CablePath.from_origin(cablepath.origin)
+            for node in cablepath.get_path():
+                cp = cablepath.retrace(node)
+                self.assertEqual(cp.path, expected.path)
+                self.assertEqual(cp.destination, expected.destination)
+                self.assertEqual((cp.is_active, cp.is_split), (expected.is_active, expected.is_split))
+
+        # Replacing the trunk cable updates the existing paths in place
+        interface1.refresh_from_db()
+        path_pk = interface1._path_id
+        cable3.delete()
+        self.assertPathExists(
+            origin=interface1, destination=None, path=(cable1, frontport1_1, rearport1), is_active=False
+        )
+        cable3 = Cable.objects.create(termination_a=rearport1, termination_b=rearport2, status=self.status_planned)
+        cablepath = self.assertPathExists(
+            origin=interface1,
+            destination=interface3,
+            path=(cable1, frontport1_1, rearport1, cable3, rearport2, frontport2_1, cable4),
+            is_active=False,
+        )
+        self.assertEqual(cablepath.pk, path_pk)
+
+    def test_304_trace_paths_from_multiple_origins(self):
+        """
+        [IF1] --C1-- [FP1:1] [RP1] --C3-- [RP2] [FP2:1] --C4-- [CT1A] [CT1Z] --C5-- [IF3]
+        [IF2] --C2-- [FP1:2]                    [FP2:2]
+        [IF4] --C6-- [RP3]
+        """
+        interface1 = Interface.objects.create(device=self.device, name="Interface 1")
+        interface2 = Interface.objects.create(device=self.device, name="Interface 2")
+        interface3 = Interface.objects.create(device=self.device, name="Interface 3")
+        interface4 = Interface.objects.create(device=self.device, name="Interface 4")
+        interface5 = Interface.objects.create(device=self.device, name="Interface 5")
+        rearport1 = RearPort.objects.create(device=self.device, name="Rear Port 1", positions=4)
+        rearport2 = RearPort.objects.create(device=self.device, name="Rear Port 2", positions=4)
+        rearport3 = RearPort.objects.create(device=self.device, name="Rear Port 3", positions=4)
+        frontport1_1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1:1", rear_port=rearport1, rear_port_position=1
+        )
+        frontport1_2 = FrontPort.objects.create(
+            device=self.device, name="Front Port 1:2", rear_port=rearport1, rear_port_position=2
+        )
+        frontport2_1 = FrontPort.objects.create(
+            device=self.device, name="Front Port 2:1", rear_port=rearport2, rear_port_position=1
+        )
+        FrontPort.objects.create(device=self.device, name="Front Port 2:2", rear_port=rearport2, rear_port_position=2)
+        circuittermination1 = CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side="A")
+        circuittermination2 = CircuitTermination.objects.create(circuit=self.circuit, site=self.site, term_side="Z")
+        Cable.objects.create(termination_a=interface1, termination_b=frontport1_1, status=self.status)
+        Cable.objects.create(termination_a=interface2, termination_b=frontport1_2, status=self.status_planned)
+        Cable.objects.create(termination_a=rearport1, termination_b=rearport2, status=self.status)
+        Cable.objects.create(termination_a=frontport2_1, termination_b=circuittermination1, status=self.status)
+        Cable.objects.create(termination_a=circuittermination2, termination_b=interface3, status=self.status)
+        Cable.objects.create(termination_a=interface4, termination_b=rearport3, status=self.status)
+
+        origins = [
+            interface1,
+            interface2,
+            interface3,
+            interface4,
+            interface5,
+            circuittermination1,
+            circuittermination2,
+        ]
+        for origin in origins:
+            origin.refresh_from_db()
+        cable_paths = CablePath.from_origins(origins)
+        self.assertEqual(len(cable_paths), len(origins))
+        self.assertIsNone(cable_paths[4])
+
+        # Bulk tracing must match tracing each origin in turn
+        for origin, cp in zip(origins, cable_paths):
+            expected = CablePath.from_origin(origin)
+            if expected is None:
+                self.assertIsNone(cp)
+                continue
+            self.assertEqual(cp.origin, origin)
+            self.assertEqual(cp.path, expected.path)
+            self.assertEqual(cp.destination, expected.destination)
+            self.assertEqual((cp.is_active, cp.is_split), (expected.is_active, expected.is_split))
+
+
+class TracePathsCommandTestMixin:
+    """
+    Create cabled interfaces and console ports, whose paths are then traced by the `trace_paths` command.
+    """
+
+    def create_cabled_ports(self):
+        site = Site.objects.create(name="Site", slug="site")
+        manufacturer = Manufacturer.objects.create(name="Generic", slug="generic")
+        device_type = DeviceType.objects.create(manufacturer=manufacturer, model="Test Device")
+        device_role = DeviceRole.objects.create(name="Device Role", slug="device-role")
+        device = Device.objects.create(
+            site=site,
+            device_type=device_type,
+            device_role=device_role,
+            name="Test Device",
+            status=Status.objects.get_for_model(Device).get(slug="active"),
+        )
+        status = Status.objects.get_for_model(Cable).get(slug="connected")
+        for i in range(1, 11):
+            Cable.objects.create(
+                termination_a=Interface.objects.create(device=device, name=f"Interface {i}A"),
+                termination_b=Interface.objects.create(device=device, name=f"Interface {i}B"),
+                status=status,
+            )
+        for i in range(1, 4):
+            Cable.objects.create(
+                termination_a=ConsolePort.objects.create(device=device, name=f"Console Port {i}"),
+                termination_b=ConsoleServerPort.objects.create(device=device, name=f"Console Server Port {i}"),
+                status=status,
+            )
+
+    def get_paths(self):
+        return sorted(
+            (str(cp.origin_id), str(cp.destination_id), cp.path, cp.is_active, cp.is_split)
+            for cp in CablePath.objects.all()
+        )
+
+    def clear_paths(self):
+        CablePath.objects.all().delete()
+        for model in trace_paths.ENDPOINT_MODELS:
+            model.objects.update(_path=None)
+
+    def trace_paths(self, **options):
+        call_command("trace_paths", no_input=True, stdout=StringIO(), **options)
+
+
+class TracePathsCommandTestCase(TracePathsCommandTestMixin, TestCase):
+    def setUp(self):
+        self.create_cabled_ports()
+
+    def test_shard_bounds(self):
+        bounds = [trace_paths.get_shard_bounds(shard) for shard in range(trace_paths.SHARD_COUNT)]
+        self.assertEqual(bounds[0][0], uuid.UUID(int=0))
+        self.assertIsNone(bounds[-1][1])
+        for (_, upper), (lower, _) in zip(bounds, bounds[1:]):
+            self.assertEqual(upper, lower)
+
+    def test_trace_missing_paths(self):
+        paths = self.get_paths()
+        self.assertEqual(len(paths), 26)
+        self.clear_paths()
+
+        self.trace_paths()
+        self.assertEqual(self.get_paths(), paths)
+
+    @patch.object(trace_paths, "SHARD_COUNT", 1)
+    def test_force_resume(self):
+        self.trace_paths(force=True)
+        interface_ids = sorted(Interface.objects.values_list("pk", flat=True))
+        self.assertEqual(
+            cache.get(trace_paths.CHECKPOINT_CACHE_KEY.format(model="dcim.interface", shard=0)), interface_ids[-1]
+        )
+
+        # An interrupted run recorded its progress up to the eighth interface
+        cache.set(trace_paths.CHECKPOINT_CACHE_KEY.format(model="dcim.interface", shard=0), interface_ids[7])
+        traced = []
+        save_paths = trace_paths.save_paths
+
+        def record_save_paths(model, origins, replace=False):
+            traced.extend(origin.pk for origin in origins)
+            save_paths(model, origins, replace=replace)
+
+        with patch.object(trace_paths, "save_paths", record_save_paths):
+            self.trace_paths(force=True, resume=True)
+
+        # Only the interfaces beyond the checkpoint are retraced, as every other model was traced to completion
+        self.assertEqual(traced, interface_ids[8:])
+
+        # Without --resume, all origins are retraced
+        traced.clear()
+        with patch.object(trace_paths, "save_paths", record_save_paths):
+            self.trace_paths(force=True)
+        self.assertEqual(len(traced), 26)
+
+
+class TracePathsCommandWorkersTestCase(TracePathsCommandTestMixin, TransactionTestCase):
+    """
+    Worker processes use their own database connections, so the data they trace must be committed.
+    """
+
+    def setUp(self):
+        # Statuses are created by a data migration, so must be recreated once flushed by a preceding test case
+        create_custom_statuses(apps.get_app_config("extras"), verbosity=-1)
+        self.create_cabled_ports()
+
+    def test_trace_paths_sharded(self):
+        self.trace_paths(force=True)
+        paths = self.get_paths()
+        self.clear_paths()
+
+        # Tracing divided among worker processes yields the same paths as tracing in this process
+        self.trace_paths(force=True, workers=3)
+        self.assertEqual(self.get_paths(), paths)
+        self.assertEqual(len(paths), 26)
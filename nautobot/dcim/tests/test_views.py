@@ -604,7 +604,7 @@ device-bays:
 
         response = self.client.get("{}?export".format(url))
         self.assertEqual(response.status_code, 200)
-        data = list(yaml.load_all(response.content, Loader=yaml.SafeLoader))
+        data = list(yaml.load_all(response.getvalue(), Loader=yaml.SafeLoader))
         self.assertEqual(len(data), 3)
         self.assertEqual(data[0]["manufacturer"], "Manufacturer 1")
         self.assertEqual(data[0]["model"], "Device Type 1")
@@ -1932,7 +1932,7 @@ device,console_port,console_server,port,reachable
 Device 1,Console Port 1,Device 2,Console Server Port 1,True
 Device 1,Console Port 2,Device 2,Console Server Port 2,True
 Device 1,Console Port 3,,,False""",
-            response.content.decode(response.charset),
+            response.getvalue().decode(response.charset),
         )
 
 
@@ -1990,7 +1990,7 @@ device,power_port,pdu,outlet,reachable
 Device 1,Power Port 1,Device 2,Power Outlet 1,True
 Device 1,Power Port 2,Device 2,Power Outlet 2,True
 Device 1,Power Port 3,,Power Feed 1,True""",
-            response.content.decode(response.charset),
+            response.getvalue().decode(response.charset),
         )
 
 
@@ -2047,7 +2047,7 @@ device_a,interface_a,device_b,interface_b,reachable
 Device 1,Interface 1,Device 2,Interface 1,True
 Device 1,Interface 2,,,True
 Device 1,Interface 3,,,False""",
-            response.content.decode(response.charset),
+            response.getvalue().decode(response.charset),
         )
 
     @override_settings(EXEMPT_VIEW_PERMISSIONS=[])
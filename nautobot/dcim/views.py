@@ -24,7 +24,7 @@ from nautobot.ipam.tables import InterfaceIPAddressTable, InterfaceVLANTable
 from nautobot.utilities.forms import ConfirmationForm
 from nautobot.utilities.paginator import EnhancedPaginator, get_paginate_count
 from nautobot.utilities.permissions import get_permission_for_model
-from nautobot.utilities.utils import csv_format, count_related
+from nautobot.utilities.utils import csv_format, count_related, queryset_iterator
 from nautobot.utilities.views import GetReturnURLMixin, ObjectPermissionRequiredMixin
 from nautobot.virtualization.models import VirtualMachine
 from . import filters, forms, tables
@@ -2437,10 +2437,11 @@ class ConnectionsListView(generic.ObjectListView):
 
     def queryset_to_csv_body_data(self):
         """
-        The headers may differ from view to view but the formatting of the CSV data is the same.
+        The headers may differ from view to view but the formatting of the CSV data is the same. The rows are sorted,
+        so are collected in full, but the objects from which they are formatted are fetched in chunks.
         """
         csv_body_data = []
-        for obj in self.queryset:
+        for obj in queryset_iterator(self.queryset):
             # The connected endpoint may or may not be associated with a Device (e.g., CircuitTerminations are not)
             # and may or may not have a name of its own (e.g., CircuitTerminations do not)
             dest_device = None
@@ -2493,13 +2494,10 @@ class ConsoleConnectionsListView(ConnectionsListView):
     template_name = "dcim/connections_list.html"
 
     def queryset_to_csv(self):
-        csv_data = [
-            # Headers
-            ",".join(["device", "console_port", "console_server", "port", "reachable"])
-        ]
-        csv_data.extend(self.queryset_to_csv_body_data())
-
-        return "\n".join(csv_data)
+        # Headers
+        yield ",".join(["device", "console_port", "console_server", "port", "reachable"])
+        for row in self.queryset_to_csv_body_data():
+            yield "\n" + row
 
     def extra_context(self):
         return {"title": "Console Connections"}
@@ -2513,13 +2511,10 @@ class PowerConnectionsListView(ConnectionsListView):
     template_name = "dcim/connections_list.html"
 
     def queryset_to_csv(self):
-        csv_data = [
-            # Headers
-            ",".join(["device", "power_port", "pdu", "outlet", "reachable"])
-        ]
-        csv_data.extend(self.queryset_to_csv_body_data())
-
-        return "\n".join(csv_data)
+        # Headers
+        yield ",".join(["device", "power_port", "pdu", "outlet", "reachable"])
+        for row in self.queryset_to_csv_body_data():
+            yield "\n" + row
 
     def extra_context(self):
         return {"title": "Power Connections"}
@@ -2556,13 +2551,10 @@ class InterfaceConnectionsListView(ConnectionsListView):
         return self.queryset
 
     def queryset_to_csv(self):
-        csv_data = [
-            # Headers
-            ",".join(["device_a", "interface_a", "device_b", "interface_b", "reachable"])
-        ]
-        csv_data.extend(self.queryset_to_csv_body_data())
-
-        return "\n".join(csv_data)
+        # Headers
+        yield ",".join(["device_a", "interface_a", "device_b", "interface_b", "reachable"])
+        for row in self.queryset_to_csv_body_data():
+            yield "\n" + row
 
     def extra_context(self):
         return {"title": "Interface Connections"}
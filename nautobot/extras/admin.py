@@ -69,6 +69,8 @@ class WebhookAdmin(admin.ModelAdmin):
                     "http_content_type",
                     "additional_headers",
                     "body_template",
+                    "batch_size",
+                    "rate_limit",
                     "secret",
                 ),
                 "classes": ("monospace",),
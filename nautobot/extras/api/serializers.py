@@ -573,6 +573,8 @@ class WebhookSerializer(ValidatedModelSerializer):
             "http_content_type",
             "additional_headers",
             "body_template",
+            "batch_size",
+            "rate_limit",
             "secret",
             "ssl_verification",
             "ca_file_path",
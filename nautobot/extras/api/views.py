@@ -1,13 +1,18 @@
+import json
+import os
+
 from django.contrib.contenttypes.models import ContentType
-from django.http import Http404
+from django.http import FileResponse, Http404, StreamingHttpResponse
 from django.shortcuts import get_object_or_404
 from django_rq.queues import get_connection
+from drf_yasg import openapi
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework.decorators import action
 from rest_framework.exceptions import PermissionDenied
 from rest_framework.permissions import IsAuthenticated
 from rest_framework.response import Response
 from rest_framework.routers import APIRootView
+from rest_framework.utils.encoders import JSONEncoder
 from rest_framework.viewsets import ReadOnlyModelViewSet, ViewSet
 from rq import Worker
 
@@ -16,6 +21,7 @@ from nautobot.core.api.views import ModelViewSet
 from nautobot.extras import filters
 from nautobot.extras.choices import JobResultStatusChoices
 from nautobot.extras.datasources import enqueue_pull_git_repository_and_refresh_data
+from nautobot.extras.exports import get_export_path
 from nautobot.extras.models import (
     ConfigContext,
     CustomLink,
@@ -65,10 +71,33 @@ class ConfigContextQuerySetMixin:
         """
         queryset = super().get_queryset()
         request = self.get_serializer_context()["request"]
-        if self.brief or "config_context" in request.query_params.get("exclude", []):
+        if self.brief or "config_context" in request.query_params.get("exclude", []) or self.action == "config_context":
             return queryset
         return queryset.annotate_config_context_data()
 
+    @swagger_auto_schema(
+        responses={
+            200: openapi.Schema(
+                type=openapi.TYPE_OBJECT, additional_properties=openapi.Schema(type=openapi.TYPE_OBJECT)
+            )
+        }
+    )
+    @action(detail=False, url_path="config-context", pagination_class=None)
+    def config_context(self, request):
+        """
+        Return the rendered config context of every matching object, as a mapping of ID to config context. The
+        response is streamed rather than paginated.
+        """
+        queryset = self.filter_queryset(self.get_queryset())
+
+        def render():
+            yield "{"
+            for i, (pk, data) in enumerate(queryset.render_config_contexts()):
+                yield f'{"," if i else ""}"{pk}":{json.dumps(data, cls=JSONEncoder)}'
+            yield "}"
+
+        return StreamingHttpResponse(render(), content_type="application/json")
+
 
 #
 # Custom fields
@@ -321,6 +350,19 @@ class JobResultViewSet(ModelViewSet):
     serializer_class = serializers.JobResultSerializer
     filterset_class = filters.JobResultFilterSet
 
+    @action(detail=True)
+    def export(self, request, pk):
+        """
+        Download the file exported by a JobResult, which only its own user may do.
+        """
+        job_result = get_object_or_404(self.queryset, pk=pk)
+        path = get_export_path(job_result)
+        if path is None or job_result.status != JobResultStatusChoices.STATUS_COMPLETED or not os.path.exists(path):
+            raise Http404
+        if not request.user.is_superuser and job_result.user_id != request.user.pk:
+            raise PermissionDenied("Only the user who requested an export may download it.")
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=os.path.basename(path))
+
 
 #
 # ContentTypes
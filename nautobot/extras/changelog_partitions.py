@@ -0,0 +1,223 @@
+"""
+Optional partitioning of the change log (ObjectChange) table by month, on PostgreSQL 11 or later.
+
+Once the table has been converted with `partition_table()`, each month's changes are stored in their own partition,
+so that queries ordered or filtered by time need only read the most recent partitions, and an entire month of expired
+changes can be discarded by dropping its partition rather than by deleting each change. Changes which fall outside
+any monthly partition are stored in a default partition.
+
+The table remains a single table to Django. As a partitioned table's primary key must include the partition key, the
+primary key constraint covers both `id` and `time`; all other indexes and constraints are preserved under their
+original names, so that later migrations may alter them as usual.
+"""
+import datetime
+import gzip
+import os
+import re
+
+from cacheops import invalidate_model
+from django.db import connection, transaction
+from django.utils import timezone
+
+
+# The number of months beyond the current one for which partitions are created in advance
+PARTITION_MONTHS_AHEAD = 3
+
+
+def _get_model():
+    from nautobot.extras.models import ObjectChange
+
+    return ObjectChange
+
+
+def _add_months(month, count):
+    """
+    Return the first instant (in UTC) of the month `count` months after that containing the datetime `month`.
+    """
+    index = month.year * 12 + month.month - 1 + count
+    return datetime.datetime(index // 12, index % 12 + 1, 1, tzinfo=datetime.timezone.utc)
+
+
+def is_partitioning_supported():
+    return connection.vendor == "postgresql" and connection.pg_version >= 110000
+
+
+def is_partitioned():
+    """
+    Return True if the change log table has been partitioned.
+    """
+    if not is_partitioning_supported():
+        return False
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT EXISTS (SELECT 1 FROM pg_partitioned_table WHERE partrelid = to_regclass(%s))",
+            [_get_model()._meta.db_table],
+        )
+        return cursor.fetchone()[0]
+
+
+def get_partitions():
+    """
+    Return a list of `(name, start, end)` tuples describing each monthly partition of the change log table, in order
+    of time. The default partition is not included.
+    """
+    table = _get_model()._meta.db_table
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = %s::regclass",
+            [table],
+        )
+        names = [name for name, in cursor.fetchall()]
+
+    partitions = []
+    for name in names:
+        match = re.fullmatch(rf"{table}_p(\d{{4}})(\d{{2}})", name)
+        if match:
+            start = datetime.datetime(int(match[1]), int(match[2]), 1, tzinfo=datetime.timezone.utc)
+            partitions.append((name, start, _add_months(start, 1)))
+
+    return sorted(partitions, key=lambda partition: partition[1])
+
+
+def create_partitions(start=None, months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Create any missing monthly partitions of the change log table, from the month containing `start` (defaulting to
+    the current month) to `months_ahead` months beyond the current month. Returns the names of the partitions created.
+
+    Any changes within a new partition's month which were stored in the default partition, for want of a partition when
+    they were logged, are moved into the new partition.
+    """
+    table = _get_model()._meta.db_table
+    default = f"{table}_default"
+    qn = connection.ops.quote_name
+    existing = {name for name, _, _ in get_partitions()}
+    month = _add_months(start or timezone.now(), 0)
+    end = _add_months(timezone.now(), months_ahead + 1)
+
+    created = []
+    while month < end:
+        name = f"{table}_p{month:%Y%m}"
+        if name not in existing:
+            bounds = f"FOR VALUES FROM ('{month.isoformat()}') TO ('{_add_months(month, 1).isoformat()}')"
+            with transaction.atomic(), connection.cursor() as cursor:
+                cursor.execute(
+                    f'SELECT EXISTS (SELECT 1 FROM {qn(default)} WHERE "time" >= %s AND "time" < %s)',
+                    [month, _add_months(month, 1)],
+                )
+                if cursor.fetchone()[0]:
+                    # A partition cannot be created while the default partition holds changes within its bounds, so
+                    # the partition is filled with those changes before it is attached
+                    cursor.execute(
+                        f"CREATE TABLE {qn(name)} (LIKE {qn(table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS)"
+                    )
+                    cursor.execute(
+                        f'WITH moved AS (DELETE FROM {qn(default)} WHERE "time" >= %s AND "time" < %s RETURNING *) '
+                        f"INSERT INTO {qn(name)} SELECT * FROM moved",
+                        [month, _add_months(month, 1)],
+                    )
+                    cursor.execute(f"ALTER TABLE {qn(table)} ATTACH PARTITION {qn(name)} {bounds}")
+                else:
+                    cursor.execute(f"CREATE TABLE IF NOT EXISTS {qn(name)} PARTITION OF {qn(table)} {bounds}")
+            created.append(name)
+        month = _add_months(month, 1)
+
+    return created
+
+
+def partition_table(months_ahead=PARTITION_MONTHS_AHEAD):
+    """
+    Convert the change log table into a partitioned table, with a partition for each month from that of the oldest
+    change to `months_ahead` months beyond the current month. All existing changes are copied into the partitioned
+    table, which is locked against all access meanwhile.
+    """
+    table = _get_model()._meta.db_table
+    old_table = f"{table}_unpartitioned"
+    qn = connection.ops.quote_name
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f"LOCK TABLE {qn(table)} IN ACCESS EXCLUSIVE MODE")
+        # The table cannot be dropped while the checks of any deferred constraints upon it are pending
+        cursor.execute("SET CONSTRAINTS ALL IMMEDIATE")
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'p'",
+            [table],
+        )
+        primary_key_name, _ = cursor.fetchone()
+        cursor.execute(
+            "SELECT conname, pg_get_constraintdef(oid) FROM pg_constraint "
+            "WHERE conrelid = %s::regclass AND contype = 'f'",
+            [table],
+        )
+        foreign_keys = cursor.fetchall()
+        # The definitions of all other indexes, which refer to the table by its current name
+        cursor.execute(
+            "SELECT pg_get_indexdef(indexrelid) FROM pg_index WHERE indrelid = %s::regclass AND NOT indisprimary",
+            [table],
+        )
+        indexes = [definition for definition, in cursor.fetchall()]
+        cursor.execute(f'SELECT min("time") FROM {qn(table)}')
+        oldest = cursor.fetchone()[0]
+
+        cursor.execute(f"ALTER TABLE {qn(table)} RENAME TO {qn(old_table)}")
+        cursor.execute(
+            f"CREATE TABLE {qn(table)} (LIKE {qn(old_table)} INCLUDING DEFAULTS INCLUDING CONSTRAINTS) "
+            'PARTITION BY RANGE ("time")'
+        )
+        cursor.execute(f"CREATE TABLE {qn(table + '_default')} PARTITION OF {qn(table)} DEFAULT")
+        create_partitions(start=oldest, months_ahead=months_ahead)
+        cursor.execute(f"INSERT INTO {qn(table)} SELECT * FROM {qn(old_table)}")
+        cursor.execute(f"DROP TABLE {qn(old_table)}")
+
+        # Indexes created on the partitioned table are created on each of its partitions
+        cursor.execute(f'ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(primary_key_name)} PRIMARY KEY (id, "time")')
+        for definition in indexes:
+            cursor.execute(definition)
+        for name, definition in foreign_keys:
+            cursor.execute(f"ALTER TABLE {qn(table)} ADD CONSTRAINT {qn(name)} {definition}")
+
+
+def drop_partitions(before, export_dir=None):
+    """
+    Drop all monthly partitions of the change log table which end no later than `before`, deleting the changes within
+    them. If `export_dir` is given, the changes within each partition are first exported to a gzip-compressed file
+    there named after the partition, as one JSON object per line. Returns a list of `(name, count)` tuples giving the
+    name of each partition dropped and the number of changes within it.
+    """
+    table = _get_model()._meta.db_table
+    qn = connection.ops.quote_name
+
+    dropped = []
+    for name, _, end in get_partitions():
+        if end > before:
+            break
+        with transaction.atomic(), connection.cursor() as cursor:
+            if export_dir is not None:
+                count = export_partition(name, os.path.join(export_dir, f"{name}.jsonl.gz"))
+            else:
+                cursor.execute(f"SELECT count(*) FROM {qn(name)}")
+                count = cursor.fetchone()[0]
+            cursor.execute(f"ALTER TABLE {qn(table)} DETACH PARTITION {qn(name)}")
+            cursor.execute(f"DROP TABLE {qn(name)}")
+        dropped.append((name, count))
+
+    if dropped:
+        # Changes were deleted without the ORM
+        invalidate_model(_get_model())
+    return dropped
+
+
+def export_partition(name, path):
+    """
+    Write each change within the given partition to the gzip-compressed file at `path`, as one JSON object per line.
+    Returns the number of changes written.
+    """
+    count = 0
+    with transaction.atomic(), connection.chunked_cursor() as cursor, gzip.open(path, "wt") as f:
+        cursor.execute(f'SELECT row_to_json(t)::text FROM {connection.ops.quote_name(name)} t ORDER BY "time"')
+        for (row,) in cursor:
+            f.write(row + "\n")
+            count += 1
+
+    return count
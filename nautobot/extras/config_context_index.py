@@ -0,0 +1,186 @@
+"""
+An index of all active ConfigContexts, keyed by each of the dimensions to which they may be assigned, which allows the
+ConfigContexts applicable to a Device or VirtualMachine to be resolved by set intersection rather than by querying the
+database.
+
+The index is shared among processes through the Django cache. A version token, replaced whenever a ConfigContext or
+one of its assignments changes, identifies the current index; each process keeps its own copy of the index in memory
+for as long as the version remains current.
+
+The rendered config context of each Device and VirtualMachine is cached as well, and remains valid for as long as the
+version of the index from which it was rendered. It is invalidated individually when the object itself changes, or when
+the site, region, tenant or cluster to which it belongs is moved to another region, group or site.
+"""
+import threading
+import uuid
+
+from django.core.cache import cache
+from django.db import connection, transaction
+
+
+VERSION_CACHE_KEY = "nautobot.extras.config_context_index.version"
+INDEX_CACHE_KEY = "nautobot.extras.config_context_index.{version}"
+RENDERED_CACHE_KEY = "nautobot.extras.config_context.{model}.{pk}"
+# Bounds how long the index may be used after the database is changed by other means than the ORM (e.g. a restore)
+INDEX_CACHE_TIMEOUT = 60 * 15
+
+# The ConfigContext assignment fields, each of which must match an object for a ConfigContext to apply to it
+DIMENSIONS = (
+    "regions",
+    "sites",
+    "roles",
+    "platforms",
+    "cluster_groups",
+    "clusters",
+    "tenant_groups",
+    "tenants",
+    "tags",
+)
+
+_local = threading.local()
+_index = (None, None)
+
+
+def build_config_context_index():
+    """
+    Build an index of all active ConfigContexts from the database. Returns a dict with the following keys (to which
+    `get_config_context_index()` adds the `version` of the index):
+
+      contexts: A dict mapping the PK of each ConfigContext to a `(position, data)` tuple, where `position` is the
+        ConfigContext's position when ordered by weight and name
+      assigned: For each dimension, a dict mapping each assigned object's PK to the set of ConfigContext PKs assigned
+        to it
+      unassigned: For each dimension, the set of ConfigContext PKs which are not assigned to any object of that
+        dimension (and therefore match every object)
+    """
+    from nautobot.extras.models import ConfigContext
+
+    # The database determines the order of ConfigContexts, so that names are collated as they are by queries
+    contexts = {
+        pk: (position, data)
+        for position, (pk, data) in enumerate(
+            ConfigContext.objects.filter(is_active=True).order_by("weight", "name").values_list("pk", "data")
+        )
+    }
+    index = {"contexts": contexts, "assigned": {}, "unassigned": {}}
+    for dimension in DIMENSIONS:
+        field = ConfigContext._meta.get_field(dimension)
+        through = field.remote_field.through
+        assigned = {}
+        for context_pk, object_pk in through.objects.filter(
+            **{f"{field.m2m_field_name()}__is_active": True}
+        ).values_list(field.m2m_column_name(), field.m2m_reverse_name()):
+            assigned.setdefault(object_pk, set()).add(context_pk)
+        index["assigned"][dimension] = assigned
+        index["unassigned"][dimension] = set(contexts).difference(*assigned.values())
+
+    return index
+
+
+def get_object_dimensions(obj, region_parents=None):
+    """
+    Return a dict mapping each dimension to the PKs of the objects of that dimension to which the given Device or
+    VirtualMachine belongs. If `region_parents`, a dict mapping the PK of each Region to that of its parent, is given,
+    the ancestors of the object's region are found within it rather than queried.
+    """
+    # `device_role` for Device; `role` for VirtualMachine
+    role_id = getattr(obj, "device_role_id", None) or getattr(obj, "role_id", None)
+
+    # Virtualization cluster for VirtualMachine
+    cluster = getattr(obj, "cluster", None)
+
+    # Match against the directly assigned region as well as any parent regions.
+    region_id = getattr(obj.site, "region_id", None)
+    if region_id is None:
+        regions = []
+    elif region_parents is not None:
+        regions = []
+        while region_id is not None:
+            regions.append(region_id)
+            region_id = region_parents.get(region_id)
+    else:
+        regions = obj.site.region.get_ancestors(include_self=True).values_list("pk", flat=True)
+
+    return {
+        "regions": regions,
+        "sites": [obj.site.pk] if obj.site else [],
+        "roles": [role_id] if role_id else [],
+        "platforms": [obj.platform_id] if obj.platform_id else [],
+        "cluster_groups": [cluster.group_id] if cluster and cluster.group_id else [],
+        "clusters": [cluster.pk] if cluster else [],
+        "tenant_groups": [obj.tenant.group_id] if obj.tenant and obj.tenant.group_id else [],
+        "tenants": [obj.tenant_id] if obj.tenant_id else [],
+        "tags": [tag.pk for tag in obj.tags.all()],
+    }
+
+
+def resolve_config_contexts(index, dimensions):
+    """
+    Return the PKs of all ConfigContexts in `index` which apply to an object having the given `dimensions`, ordered by
+    weight and name.
+    """
+    matches = None
+    for dimension in DIMENSIONS:
+        dimension_matches = set(index["unassigned"][dimension])
+        for object_pk in dimensions[dimension]:
+            dimension_matches |= index["assigned"][dimension].get(object_pk, set())
+        matches = dimension_matches if matches is None else matches & dimension_matches
+
+    return sorted(matches, key=lambda pk: index["contexts"][pk][0])
+
+
+def get_config_context_index():
+    """
+    Return the current index of active ConfigContexts, building it if necessary. Returns None if ConfigContexts have
+    been changed within the current transaction, as the shared index cannot reflect uncommitted changes.
+    """
+    global _index
+
+    if getattr(_local, "dirty", False):
+        if connection.in_atomic_block:
+            return None
+        # The transaction has since been committed (and the index invalidated) or rolled back
+        _local.dirty = False
+
+    cache.add(VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=INDEX_CACHE_TIMEOUT)
+    version = cache.get(VERSION_CACHE_KEY)
+    if _index[0] == version:
+        return _index[1]
+
+    index = cache.get(INDEX_CACHE_KEY.format(version=version))
+    if index is None:
+        index = build_config_context_index()
+        index["version"] = version
+        cache.set(INDEX_CACHE_KEY.format(version=version), index, timeout=INDEX_CACHE_TIMEOUT)
+    _index = (version, index)
+
+    return index
+
+
+def invalidate_config_context_index():
+    """
+    Discard the current index of active ConfigContexts, in all processes. If called within a transaction, the index is
+    invalidated once the transaction is committed, and is not used until then by the current thread.
+    """
+    if connection.in_atomic_block:
+        _local.dirty = True
+        transaction.on_commit(lambda: cache.delete(VERSION_CACHE_KEY))
+    else:
+        cache.delete(VERSION_CACHE_KEY)
+
+
+def get_rendered_config_context_cache_key(model, pk):
+    return RENDERED_CACHE_KEY.format(model=model._meta.label_lower, pk=pk)
+
+
+def invalidate_rendered_config_contexts(model, pks):
+    """
+    Discard the cached rendered config contexts of the given `model` instances. If called within a transaction, they
+    are discarded again once the transaction is committed, and neither they nor the index are used until then by the
+    current thread.
+    """
+    cache_keys = [get_rendered_config_context_cache_key(model, pk) for pk in pks]
+    cache.delete_many(cache_keys)
+    if connection.in_atomic_block:
+        _local.dirty = True
+        transaction.on_commit(lambda: cache.delete_many(cache_keys))
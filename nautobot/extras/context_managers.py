@@ -1,39 +1,230 @@
+import copy
 import uuid
+from collections import defaultdict
 from contextlib import contextmanager
 
 from django.contrib.auth import get_user_model
 from django.core.handlers.wsgi import WSGIRequest
+from django.db import connection, transaction
+from django.db.models import prefetch_related_objects
 from django.db.models.signals import m2m_changed, pre_delete, post_save
 from django.test.client import RequestFactory
 
-from nautobot.extras.signals import _handle_changed_object, _handle_deleted_object
+from nautobot.extras.choices import ObjectChangeActionChoices
+from nautobot.extras.models import ObjectChange
+from nautobot.extras.signals import _get_user_if_authenticated, _handle_changed_object, _handle_deleted_object
+from nautobot.extras.tasks import schedule_purge_changelog
+from nautobot.extras.utils import is_taggable
+from nautobot.extras.webhooks import enqueue_webhook_batch, get_webhooks, serialize_for_webhooks, webhook_uses_data
 from nautobot.utilities.utils import curry
 
+# The number of changes buffered without being serialized, after which they are serialized together and their objects
+# released, so that a long-running request or job does not hold every object it has changed in memory
+SERIALIZE_BATCH_SIZE = 1000
+
+
+def _snapshot(instance):
+    """
+    Return a copy of a model instance as it is now, unaffected by any later changes to the fields of the instance.
+    """
+    snapshot = copy.copy(instance)
+    snapshot._state = copy.copy(instance._state)
+    snapshot._state.fields_cache = instance._state.fields_cache.copy()
+    # Many-to-many relations are retrieved as of the serialization of the change
+    snapshot.__dict__.pop("_prefetched_objects_cache", None)
+    for field in instance._meta.concrete_fields:
+        value = snapshot.__dict__.get(field.attname)
+        if isinstance(value, (dict, list)):
+            snapshot.__dict__[field.attname] = copy.deepcopy(value)
+    return snapshot
+
+
+class _BufferedChange:
+    """
+    A change to an object, awaiting the commit of the transaction in which it was made.
+
+    A snapshot of the object is taken when the change is recorded, and is serialized, for its ObjectChange and for any
+    webhooks which apply to the change, only once the change is saved (or once SERIALIZE_BATCH_SIZE changes are
+    awaiting serialization); deletions are serialized immediately, as the object will no longer exist by then.
+    """
+
+    def __init__(self, action, instance):
+        self.action = action
+        self.model = instance._meta.model
+        self.instance = _snapshot(instance)
+        self.objectchange = None
+        self.has_webhooks = False
+        self.webhook_data = None
+        self.committed = not connection.in_atomic_block
+        if not self.committed:
+            self.savepoint_ids = tuple(connection.savepoint_ids)
+            # Django replaces this list upon each commit or rollback, and discards the callbacks registered within any
+            # transaction or savepoint which is rolled back
+            self.run_on_commit = connection.run_on_commit
+            transaction.on_commit(self.commit)
+
+    def commit(self):
+        self.committed = True
+
+    def is_current(self):
+        """
+        Return True if the change was made within the current transaction and savepoint (or outside any transaction),
+        such that further changes to the object may be coalesced into it.
+        """
+        if not connection.in_atomic_block:
+            return self.committed
+        return (
+            not self.committed
+            and self.savepoint_ids == tuple(connection.savepoint_ids)
+            and self.run_on_commit is connection.run_on_commit
+        )
+
+    def update(self, instance):
+        """
+        Coalesce a further change to the object into this change, which is then serialized as of the further change.
+        """
+        self.instance = _snapshot(instance)
+        self.objectchange = None
+        self.webhook_data = None
+
+    def serialize(self):
+        if self.objectchange is None:
+            self.objectchange = self.instance.to_objectchange(self.action)
+            webhooks = get_webhooks(self.model, self.action)
+            self.has_webhooks = bool(webhooks)
+            if any(webhook_uses_data(webhook) for webhook in webhooks):
+                self.webhook_data = serialize_for_webhooks(self.instance)
+            # Release the object, and any related objects cached by the ObjectChange
+            self.objectchange._state.fields_cache.clear()
+            self.instance = None
+
+
+class ObjectChangeBuffer:
+    """
+    Collect the changes made to objects during a request, so that their ObjectChanges may be saved together, and their
+    webhooks enqueued, once the request has completed. Further changes to an object within the same transaction are
+    coalesced into its previous change, and changes which are rolled back are discarded.
+    """
+
+    def __init__(self, request):
+        self.request = request
+        self.changes = []
+        # The latest change to each created and updated object, into which further changes may be coalesced
+        self.pending_changes = {}
+        # Changes which are yet to be serialized
+        self.unserialized_changes = []
+
+    def record_change(self, instance, action):
+        key = (instance._meta.label_lower, instance.pk)
+        change = self.pending_changes.get(key)
+        if change is not None and change.is_current():
+            # The object will be serialized as of its latest change (a creation remains a creation)
+            if change.objectchange is not None:
+                self.unserialized_changes.append(change)
+            change.update(instance)
+        else:
+            change = _BufferedChange(action, instance=instance)
+            self.changes.append(change)
+            self.pending_changes[key] = change
+            self.unserialized_changes.append(change)
+
+        if len(self.unserialized_changes) >= SERIALIZE_BATCH_SIZE:
+            self.serialize_changes()
+
+    def record_deletion(self, instance):
+        # Serialize any previous change to the object before it is deleted
+        change = self.pending_changes.pop((instance._meta.label_lower, instance.pk), None)
+        if change is not None:
+            change.serialize()
+
+        change = _BufferedChange(ObjectChangeActionChoices.ACTION_DELETE, instance)
+        change.serialize()
+        self.changes.append(change)
+
+    def serialize_changes(self):
+        """
+        Serialize all the changes which are yet to be serialized, retrieving the tags and other many-to-many relations
+        of their objects together rather than for each object in turn.
+        """
+        instances_by_model = defaultdict(list)
+        for change in self.unserialized_changes:
+            if change.objectchange is None:
+                instances_by_model[change.model].append(change.instance)
+        for model, instances in instances_by_model.items():
+            lookups = [
+                field.name for field in model._meta.many_to_many if field.remote_field.through._meta.auto_created
+            ]
+            if is_taggable(instances[0]):
+                lookups.append("tags")
+            prefetch_related_objects(instances, *lookups)
+
+        for change in self.unserialized_changes:
+            change.serialize()
+        self.unserialized_changes = []
+
+    def flush(self):
+        """
+        Save the ObjectChanges, and enqueue the webhooks, for all changes which have not been rolled back.
+        """
+        pending_callbacks = {func for _, func in connection.run_on_commit}
+        changes = [change for change in self.changes if change.committed or change.commit in pending_callbacks]
+        self.unserialized_changes = [change for change in changes if change.objectchange is None]
+        self.serialize_changes()
+
+        objectchanges = []
+        for change in changes:
+            objectchange = change.objectchange
+            objectchange.user = _get_user_if_authenticated(self.request, objectchange)
+            objectchange.user_name = objectchange.user.username if objectchange.user else "Undefined"
+            objectchange.request_id = self.request.id
+            objectchanges.append(objectchange)
+
+        ObjectChange.objects.bulk_create(objectchanges, batch_size=1000)
+        enqueue_webhook_batch(
+            [(change.model, change.action, change.webhook_data) for change in changes if change.has_webhooks],
+            self.request.user,
+            self.request.id,
+        )
+        self.changes = []
+        self.pending_changes = {}
+        self.unserialized_changes = []
+
+        # Expired changes are deleted in the background, rather than within a request
+        if objectchanges:
+            schedule_purge_changelog()
+
 
 @contextmanager
 def change_logging(request):
     """
     Enable change logging by connecting the appropriate signals to their receivers before code is run, and
-    disconnecting them afterward.
+    disconnecting them afterward. The resulting ObjectChanges are saved once the code has completed.
 
     :param request: WSGIRequest object with a unique `id` set
     """
-    # Curry signals receivers to pass the current request
-    handle_changed_object = curry(_handle_changed_object, request)
-    handle_deleted_object = curry(_handle_deleted_object, request)
+    change_buffer = ObjectChangeBuffer(request)
+
+    # Curry signals receivers to pass the current request and change buffer
+    handle_changed_object = curry(_handle_changed_object, request, change_buffer)
+    handle_deleted_object = curry(_handle_deleted_object, request, change_buffer)
 
     # Connect our receivers to the post_save and post_delete signals.
     post_save.connect(handle_changed_object, dispatch_uid="handle_changed_object")
     m2m_changed.connect(handle_changed_object, dispatch_uid="handle_changed_object")
     pre_delete.connect(handle_deleted_object, dispatch_uid="handle_deleted_object")
 
-    yield
+    try:
+        yield
+    finally:
+        # Disconnect change logging signals. This is necessary to avoid recording any errant
+        # changes during test cleanup.
+        post_save.disconnect(handle_changed_object, dispatch_uid="handle_changed_object")
+        m2m_changed.disconnect(handle_changed_object, dispatch_uid="handle_changed_object")
+        pre_delete.disconnect(handle_deleted_object, dispatch_uid="handle_deleted_object")
 
-    # Disconnect change logging signals. This is necessary to avoid recording any errant
-    # changes during test cleanup.
-    post_save.disconnect(handle_changed_object, dispatch_uid="handle_changed_object")
-    m2m_changed.disconnect(handle_changed_object, dispatch_uid="handle_changed_object")
-    pre_delete.disconnect(handle_deleted_object, dispatch_uid="handle_deleted_object")
+        # A transaction which has failed cannot record its changes (nor would they be committed)
+        if not connection.needs_rollback:
+            change_buffer.flush()
 
 
 @contextmanager
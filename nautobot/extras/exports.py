@@ -0,0 +1,145 @@
+"""
+Exports of object lists performed in the background by an RQ worker, rather than streamed by the web process which
+received the request. Each export is recorded by a JobResult of the exported model, named after the exported file,
+which is written under MEDIA_ROOT and offered for download by the JobResult's page once the export has completed.
+Only the JobResults marked as exports by `enqueue_export()` have an exported file; those of other jobs, which may be
+named arbitrarily, never refer to a file.
+"""
+import logging
+import os
+import shutil
+import uuid
+
+from django.apps import apps
+from django.conf import settings
+from django.contrib.contenttypes.models import ContentType
+from django.utils.module_loading import import_string
+from django_rq import job
+
+from nautobot.utilities.utils import buffer_stream
+from .choices import JobResultStatusChoices, LogLevelChoices
+from .models import ExportTemplate, JobResult
+
+logger = logging.getLogger("nautobot.extras.exports")
+
+# The directory under MEDIA_ROOT beneath which exported files are written, each in a directory named by its job ID
+EXPORT_DIRECTORY = "exports"
+
+# The key of JobResult.data which marks the JobResult of an export
+EXPORT_DATA_KEY = "_export"
+
+# The list view whose CSV and YAML formatting is used by default
+DEFAULT_EXPORT_VIEW = "nautobot.core.views.generic.ObjectListView"
+
+
+def is_export(job_result):
+    """
+    Return True if the given JobResult is that of an export, as marked by `enqueue_export()`.
+    """
+    return isinstance(job_result.data, dict) and job_result.data.get(EXPORT_DATA_KEY) is True
+
+
+def get_export_path(job_result):
+    """
+    Return the path of the file written by the given export, within the export's own directory under MEDIA_ROOT.
+    Returns None if the JobResult is not that of an export, or if its name does not resolve to a file in that directory.
+    """
+    if not is_export(job_result):
+        return None
+    directory = os.path.realpath(os.path.join(settings.MEDIA_ROOT, EXPORT_DIRECTORY, str(job_result.job_id)))
+    path = os.path.realpath(os.path.join(directory, os.path.basename(job_result.name)))
+    if os.path.dirname(path) != directory:
+        return None
+    return path
+
+
+def delete_export(job_result):
+    """
+    Delete the file written by the given export, if any.
+    """
+    path = get_export_path(job_result)
+    if path is not None:
+        shutil.rmtree(os.path.dirname(path), ignore_errors=True)
+
+
+def get_export_filename(model, export_template=None):
+    """
+    Return the name of the file to which objects of the given model are exported, using `export_template` if given,
+    or else as YAML or CSV (as supported by the model). Returns None if the model supports neither.
+    """
+    plural = model._meta.verbose_name_plural
+    if export_template is not None:
+        return export_template.get_filename(model)
+    if hasattr(model, "to_yaml"):
+        return f"nautobot_{plural}.yaml"
+    if hasattr(model, "to_csv"):
+        return f"nautobot_{plural}.csv"
+    return None
+
+
+def enqueue_export(queryset, user, export_template=None, view_class=DEFAULT_EXPORT_VIEW):
+    """
+    Enqueue a job to export the objects of the given queryset, using `export_template` if given, or else the YAML or
+    CSV formatting of `view_class`, the dotted path of an ObjectListView. Returns the JobResult of the export.
+    """
+    model = queryset.model
+    job_result = JobResult.objects.create(
+        name=get_export_filename(model, export_template),
+        obj_type=ContentType.objects.get_for_model(model),
+        user=user,
+        job_id=uuid.uuid4(),
+        data={EXPORT_DATA_KEY: True},
+    )
+    export_objects.delay(
+        job_id=str(job_result.job_id),
+        job_result=job_result,
+        model_label=model._meta.label,
+        # A QuerySet is evaluated when pickled, but its query may be pickled as is
+        query=queryset.query,
+        prefetch_related=queryset._prefetch_related_lookups,
+        export_template_pk=export_template.pk if export_template is not None else None,
+        view_class=view_class,
+    )
+    return job_result
+
+
+@job("default")
+def export_objects(model_label, query, prefetch_related, export_template_pk, view_class, job_result):
+    """
+    Worker function to export the objects matched by a query to a file, as enqueued by `enqueue_export()`.
+    """
+    job_result.set_status(JobResultStatusChoices.STATUS_RUNNING)
+    job_result.save()
+
+    queryset = apps.get_model(model_label).objects.all()
+    queryset.query = query
+    if prefetch_related:
+        queryset = queryset.prefetch_related(*prefetch_related)
+
+    path = get_export_path(job_result)
+    try:
+        if path is None:
+            raise ValueError(f"{job_result.name!r} is not a valid file name")
+        if export_template_pk is not None:
+            chunks = ExportTemplate.objects.get(pk=export_template_pk).render_stream(queryset)
+        else:
+            view = import_string(view_class)()
+            view.queryset = queryset
+            chunks = view.queryset_to_yaml() if job_result.name.endswith(".yaml") else view.queryset_to_csv()
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            for chunk in buffer_stream(chunks):
+                f.write(chunk)
+    except Exception as e:
+        delete_export(job_result)
+        job_result.log(f"Export failed: {e}", level_choice=LogLevelChoices.LOG_FAILURE, logger=logger)
+        job_result.set_status(JobResultStatusChoices.STATUS_ERRORED)
+    else:
+        job_result.log(
+            f"Exported {job_result.name} ({os.path.getsize(path)} bytes)",
+            level_choice=LogLevelChoices.LOG_SUCCESS,
+            logger=logger,
+        )
+        job_result.set_status(JobResultStatusChoices.STATUS_COMPLETED)
+    job_result.save()
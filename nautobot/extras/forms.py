@@ -780,6 +780,8 @@ class WebhookForm(BootstrapMixin, forms.ModelForm):
             "http_content_type",
             "additional_headers",
             "body_template",
+            "batch_size",
+            "rate_limit",
             "secret",
             "ssl_verification",
             "ca_file_path",
@@ -0,0 +1,53 @@
+import datetime
+import os
+
+from django.core.management.base import BaseCommand, CommandError
+from django.utils import timezone
+
+from nautobot.extras.changelog_partitions import drop_partitions, is_partitioned
+
+
+class Command(BaseCommand):
+    help = "Export the months of the partitioned change log older than the given age to compressed files, and drop them"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--older-than",
+            type=int,
+            required=True,
+            dest="older_than",
+            help="Archive the months which ended at least this many days ago",
+        )
+        parser.add_argument(
+            "--output-dir",
+            dest="output_dir",
+            help="Directory to which each month is exported as gzip-compressed JSON lines "
+            "(required unless --no-export)",
+        )
+        parser.add_argument(
+            "--no-export",
+            action="store_true",
+            dest="no_export",
+            help="Drop the months without exporting them",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioned():
+            raise CommandError("The change log is not partitioned; see the partition_changelog command")
+        if options["no_export"]:
+            output_dir = None
+        elif not options["output_dir"] or not os.path.isdir(options["output_dir"]):
+            raise CommandError("An existing --output-dir must be given unless --no-export is specified")
+        else:
+            output_dir = options["output_dir"]
+
+        before = timezone.now() - datetime.timedelta(days=options["older_than"])
+        dropped = drop_partitions(before, export_dir=output_dir)
+        for name, count in dropped:
+            if output_dir:
+                path = os.path.join(output_dir, f"{name}.jsonl.gz")
+                self.stdout.write(f"  Archived {count} changes from partition {name} to {path}")
+            else:
+                self.stdout.write(f"  Dropped {count} changes in partition {name}")
+
+        self.stdout.write(self.style.SUCCESS(f"Finished; {len(dropped)} partitions dropped."))
@@ -0,0 +1,57 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from nautobot.extras.changelog_partitions import (
+    PARTITION_MONTHS_AHEAD,
+    create_partitions,
+    is_partitioned,
+    is_partitioning_supported,
+    partition_table,
+)
+from nautobot.extras.models import ObjectChange
+
+
+class Command(BaseCommand):
+    help = "Partition the change log by month, and create partitions for the coming months"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--months-ahead",
+            type=int,
+            default=PARTITION_MONTHS_AHEAD,
+            dest="months_ahead",
+            help="Number of months beyond the current one for which to create partitions "
+            f"(default: {PARTITION_MONTHS_AHEAD})",
+        )
+        parser.add_argument(
+            "--no-input",
+            action="store_true",
+            dest="no_input",
+            help="Do not prompt user for any input/confirmation",
+        )
+
+    def handle(self, *args, **options):
+        if not is_partitioning_supported():
+            raise CommandError("Partitioning the change log requires PostgreSQL 11 or later")
+
+        if not is_partitioned():
+            changes_count = ObjectChange.objects.count()
+
+            # Prompt the user to confirm conversion of the table, which is locked meanwhile
+            if not options["no_input"]:
+                self.stdout.write(self.style.ERROR("WARNING: Converting the change log into a partitioned table."))
+                self.stdout.write(
+                    f"This will copy all {changes_count} changes, during which the change log will be unavailable and "
+                    f"no changes can be logged. Are you sure?"
+                )
+                confirmation = input("Type yes to confirm: ")
+                if confirmation != "yes":
+                    self.stdout.write(self.style.SUCCESS("Aborting"))
+                    return
+
+            self.stdout.write(f"Partitioning {changes_count} changes...")
+            partition_table(months_ahead=options["months_ahead"])
+        else:
+            for name in create_partitions(months_ahead=options["months_ahead"]):
+                self.stdout.write(f"  Created partition {name}")
+
+        self.stdout.write(self.style.SUCCESS("Finished."))
@@ -0,0 +1,47 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from nautobot.extras.tasks import purge_changelog
+
+
+class Command(BaseCommand):
+    help = "Delete all change log records older than the change log retention period"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            "--retention",
+            type=int,
+            dest="retention",
+            help="Number of days for which to retain changes (default: CHANGELOG_RETENTION)",
+        )
+        parser.add_argument(
+            "--batch-size",
+            type=int,
+            dest="batch_size",
+            help="Number of changes to delete at a time (default: CHANGELOG_PURGE_BATCH_SIZE)",
+        )
+        parser.add_argument(
+            "--rate",
+            type=int,
+            dest="rate",
+            help="Maximum number of changes to delete per second, or 0 for no limit (default: CHANGELOG_PURGE_RATE)",
+        )
+
+    def handle(self, *args, **options):
+        retention = settings.CHANGELOG_RETENTION if options["retention"] is None else options["retention"]
+        if not retention:
+            raise CommandError(
+                "Change log retention is unlimited; specify the number of days to retain with --retention"
+            )
+
+        self.stdout.write(f"Deleting changes older than {retention} days...")
+        deleted = purge_changelog(
+            retention=retention,
+            batch_size=options["batch_size"],
+            rate=options["rate"],
+            progress_callback=lambda count: self.stdout.write(f"\r  Deleted {count} changes", ending=""),
+        )
+        if deleted is None:
+            raise CommandError("A purge of the change log is already in progress")
+
+        self.stdout.write(self.style.SUCCESS(f"\nDeleted {deleted} changes."))
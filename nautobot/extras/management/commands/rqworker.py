@@ -5,7 +5,8 @@ from django_rq.management.commands.rqworker import Command as _Command
 class Command(_Command):
     """
     Subclass django_rq's built-in rqworker to listen on all configured queues if none are specified (instead
-    of only the 'default' queue).
+    of only the 'default' queue), and to always run the RQ scheduler, which enqueues the retries of failed webhook
+    deliveries when they are due.
     """
 
     def handle(self, *args, **options):
@@ -14,4 +15,7 @@ class Command(_Command):
         if len(args) < 1:
             args = settings.RQ_QUEUES
 
+        # Only one worker's scheduler is active for each queue at a time, so running it in every worker is safe.
+        options["with_scheduler"] = True
+
         super().handle(*args, **options)
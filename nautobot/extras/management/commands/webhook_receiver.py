@@ -1,13 +1,18 @@
 import sys
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
 
 from django.core.management.base import BaseCommand
 
 
 request_counter = 1
+# Serializes the output of concurrent requests
+output_lock = threading.Lock()
 
 
 class WebhookHandler(BaseHTTPRequestHandler):
+    # Keep connections alive between requests, as webhook workers do
+    protocol_version = "HTTP/1.1"
     show_headers = True
 
     def __getattr__(self, item):
@@ -33,28 +38,33 @@ class WebhookHandler(BaseHTTPRequestHandler):
     def do_ANY(self):
         global request_counter
 
-        # Send a 200 response regardless of the request content
-        self.send_response(200)
-        self.end_headers()
-        self.wfile.write(b"Webhook received!\n")
+        # Read the request body (if any) before responding, so that the connection may be reused
+        content_length = self.headers.get("Content-Length")
+        body = self.rfile.read(int(content_length)) if content_length is not None else None
 
-        request_counter += 1
+        with output_lock:
+            # Send a 200 response regardless of the request content
+            response = b"Webhook received!\n"
+            self.send_response(200)
+            self.send_header("Content-Length", str(len(response)))
+            self.end_headers()
+            self.wfile.write(response)
 
-        # Print the request headers to stdout
-        if self.show_headers:
-            for k, v in self.headers.items():
-                print("{}: {}".format(k, v))
-            print()
+            request_counter += 1
 
-        # Print the request body (if any)
-        content_length = self.headers.get("Content-Length")
-        if content_length is not None:
-            body = self.rfile.read(int(content_length))
-            print(body.decode("utf-8"))
-        else:
-            print("(No body)")
+            # Print the request headers to stdout
+            if self.show_headers:
+                for k, v in self.headers.items():
+                    print("{}: {}".format(k, v))
+                print()
+
+            # Print the request body (if any)
+            if body is not None:
+                print(body.decode("utf-8"))
+            else:
+                print("(No body)")
 
-        print("------------")
+            print("------------")
 
 
 class Command(BaseCommand):
@@ -83,7 +93,7 @@ class Command(BaseCommand):
         WebhookHandler.show_headers = not options["no_headers"]
 
         self.stdout.write("Listening on port http://localhost:{}. Stop with {}.".format(port, quit_command))
-        httpd = HTTPServer(("localhost", port), WebhookHandler)
+        httpd = ThreadingHTTPServer(("localhost", port), WebhookHandler)
 
         try:
             httpd.serve_forever()
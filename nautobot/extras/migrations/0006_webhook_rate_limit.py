@@ -0,0 +1,18 @@
+# Generated by Django 3.1.8 on 2026-10-17 06:17
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("extras", "0005_webhook_batch_size"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="webhook",
+            name="rate_limit",
+            field=models.PositiveIntegerField(default=0),
+        ),
+    ]
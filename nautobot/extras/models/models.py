@@ -1,3 +1,5 @@
+import copy
+import itertools
 import json
 import logging
 import uuid
@@ -6,28 +8,42 @@ from collections import OrderedDict
 from django.conf import settings
 from django.contrib.contenttypes.fields import GenericForeignKey
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
 from django.core.serializers.json import DjangoJSONEncoder
-from django.core.validators import ValidationError
+from django.core.validators import MinValueValidator, ValidationError
 from django.db import models
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from django.urls import reverse
 from django.utils import timezone
 from rest_framework.utils.encoders import JSONEncoder
 
 from nautobot.extras.choices import *
+from nautobot.extras.config_context_index import (
+    INDEX_CACHE_TIMEOUT,
+    get_config_context_index,
+    get_object_dimensions,
+    get_rendered_config_context_cache_key,
+    resolve_config_contexts,
+)
 from nautobot.extras.constants import *
 from nautobot.extras.models import ChangeLoggedModel
 from nautobot.extras.models.relationships import RelationshipModel
 from nautobot.extras.querysets import ConfigContextQuerySet
 from nautobot.extras.utils import extras_features, FeatureQuery, image_upload
 from nautobot.core.models import BaseModel
-from nautobot.utilities.utils import deepmerge, render_jinja2
+from nautobot.utilities.utils import (
+    buffer_stream,
+    deepmerge,
+    get_jinja2_template,
+    get_streaming_queryset,
+    render_jinja2,
+)
 
 
 #
 # Webhooks
 #
-@extras_features("graphql")
+@extras_features("graphql", "job_results")
 class Webhook(BaseModel, ChangeLoggedModel):
     """
     A Webhook defines a request that will be sent to a remote application when an object is created, updated, and/or
@@ -77,6 +93,18 @@ class Webhook(BaseModel, ChangeLoggedModel):
         "included. Available context data includes: <code>event</code>, <code>model</code>, "
         "<code>timestamp</code>, <code>username</code>, <code>request_id</code>, and <code>data</code>.",
     )
+    batch_size = models.PositiveIntegerField(
+        default=1,
+        validators=[MinValueValidator(1)],
+        help_text="The maximum number of changes to send in each request. If greater than 1, the changes made by a "
+        "request to Nautobot are sent together, and the headers and body are rendered with the context "
+        "<code>events</code>, a list of the context data of each change.",
+    )
+    rate_limit = models.PositiveIntegerField(
+        default=0,
+        help_text="The maximum number of requests to send to this webhook per minute, or 0 for no limit. Further "
+        "requests are deferred until the next minute.",
+    )
     secret = models.CharField(
         max_length=255,
         blank=True,
@@ -267,23 +295,51 @@ class ExportTemplate(BaseModel, ChangeLoggedModel, RelationshipModel):
 
         return output
 
+    def render_stream(self, queryset):
+        """
+        Render the contents of the template incrementally, yielding the output in pieces as it is rendered. The
+        objects of the queryset are fetched from the database in chunks as the template iterates over them, rather
+        than all at once.
+        """
+        template = get_jinja2_template(self.template_code)
+        pending = ""
+        for chunk in template.generate(queryset=get_streaming_queryset(queryset)):
+            chunk = pending + chunk
+            # Hold back a trailing CR, which may begin a CRLF split across two chunks
+            pending = "\r" if chunk.endswith("\r") else ""
+            if pending:
+                chunk = chunk[:-1]
+
+            # Replace CRLF-style line terminators
+            yield chunk.replace("\r\n", "\n")
+        if pending:
+            yield pending
+
     def render_to_response(self, queryset):
         """
-        Render the template to an HTTP response, delivered as a named file attachment
+        Render the template to a streaming HTTP response, delivered as a named file attachment
         """
-        output = self.render(queryset)
+        # Render the first piece of the output before the response begins, so that any syntax error, and any error
+        # raised while rendering the first objects, is raised here rather than truncating the response
+        stream = buffer_stream(self.render_stream(queryset))
+        first_chunk = next(stream, "")
         mime_type = "text/plain" if not self.mime_type else self.mime_type
 
         # Build the response
-        response = HttpResponse(output, content_type=mime_type)
-        filename = "nautobot_{}{}".format(
-            queryset.model._meta.verbose_name_plural,
-            ".{}".format(self.file_extension) if self.file_extension else "",
-        )
-        response["Content-Disposition"] = 'attachment; filename="{}"'.format(filename)
+        response = StreamingHttpResponse(itertools.chain([first_chunk], stream), content_type=mime_type)
+        response["Content-Disposition"] = 'attachment; filename="{}"'.format(self.get_filename(queryset.model))
 
         return response
 
+    def get_filename(self, model):
+        """
+        Return the name of the file to which objects of the given model are exported by the template.
+        """
+        return "nautobot_{}{}".format(
+            model._meta.verbose_name_plural,
+            ".{}".format(self.file_extension) if self.file_extension else "",
+        )
+
     def get_absolute_url(self):
         return reverse("extras:exporttemplate", kwargs={"pk": self.pk})
 
@@ -456,10 +512,28 @@ class ConfigContextModel(models.Model):
         """
         Return the rendered configuration context for a device or VM.
         """
+        index = get_config_context_index()
+        if index is None or self._state.adding:
+            config_context_data = ConfigContext.objects.get_for_object(self).values_list("data", flat=True)
+            return self._render_config_context(config_context_data)
+
+        # Return the previously rendered config context, if it was rendered from the current index
+        cache_key = get_rendered_config_context_cache_key(self._meta.model, self.pk)
+        cached = cache.get(cache_key)
+        if cached is not None:
+            version, local_context_data, data = cached
+            if version == index["version"] and local_context_data == self.local_context_data:
+                return data
+
+        # Resolve the applicable config contexts from the index
+        pks = resolve_config_contexts(index, get_object_dimensions(self))
+        # The data within the index is shared, so must not be returned to a caller which may modify it
+        data = copy.deepcopy(self._render_config_context(index["contexts"][pk][1] for pk in pks))
+        cache.set(cache_key, (index["version"], self.local_context_data, data), timeout=INDEX_CACHE_TIMEOUT)
 
-        # always manually query for config contexts
-        config_context_data = ConfigContext.objects.get_for_object(self).values_list("data", flat=True)
+        return data
 
+    def _render_config_context(self, config_context_data):
         # Compile all config data, overwriting lower-weight values with higher-weight values where a collision occurs
         data = OrderedDict()
         for context in config_context_data:
@@ -1,8 +1,16 @@
+from collections import OrderedDict
+
 from django.db.models import OuterRef, Subquery, Q
 
+from nautobot.extras.config_context_index import (
+    get_config_context_index,
+    get_object_dimensions,
+    resolve_config_contexts,
+)
 from nautobot.extras.models.tags import TaggedItem
 from nautobot.utilities.query_functions import EmptyGroupByJSONBAgg, OrderableJSONBAgg
 from nautobot.utilities.querysets import RestrictedQuerySet
+from nautobot.utilities.utils import deepmerge
 
 
 class ConfigContextQuerySet(RestrictedQuerySet):
@@ -13,6 +21,11 @@ class ConfigContextQuerySet(RestrictedQuerySet):
         Args:
           aggregate_data: If True, use the JSONBAgg aggregate function to return only the list of JSON data objects
         """
+        # Resolve the applicable ConfigContexts from the index where possible, rather than joining every assignment
+        index = get_config_context_index()
+        if index is not None:
+            pks = resolve_config_contexts(index, get_object_dimensions(obj))
+            return self.filter(pk__in=pks).order_by("weight", "name")
 
         # `device_role` for Device; `role` for VirtualMachine
         role = getattr(obj, "device_role", None) or obj.role
@@ -80,6 +93,57 @@ class ConfigContextModelQuerySet(RestrictedQuerySet):
             )
         ).distinct()
 
+    def render_config_contexts(self, chunk_size=1000):
+        """
+        Render the config context of each object in the queryset, yielding `(pk, data)` tuples in order of PK.
+        Objects are retrieved `chunk_size` at a time.
+
+        The data of the applicable ConfigContexts is merged only once for each distinct set of ConfigContexts, leaving
+        only the local context data of each object (if any) to be merged into it. The same data may therefore be
+        yielded for many objects, and must not be modified.
+        """
+        from nautobot.dcim.models import Region
+
+        if self.model._meta.model_name == "device":
+            queryset = self.select_related("site", "cluster", "tenant")
+        else:
+            queryset = self.select_related("cluster__site", "tenant")
+        queryset = queryset.prefetch_related("tags").order_by("pk")
+
+        index = get_config_context_index()
+        if index is None:
+            # ConfigContexts cannot be resolved from the index within a transaction which has changed them, so the
+            # data of the applicable ConfigContexts is instead retrieved along with each object
+            queryset = queryset.annotate_config_context_data()
+        region_parents = dict(Region.objects.order_by().values_list("pk", "parent_id")) if index is not None else None
+        merged_data = {}
+
+        last_pk = None
+        while True:
+            chunk = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+            chunk = list(chunk[:chunk_size])
+            if not chunk:
+                break
+            last_pk = chunk[-1].pk
+
+            for obj in chunk:
+                if index is None:
+                    yield obj.pk, obj._render_config_context(obj.config_context_data or [])
+                    continue
+
+                pks = tuple(resolve_config_contexts(index, get_object_dimensions(obj, region_parents)))
+                if pks not in merged_data:
+                    data = OrderedDict()
+                    for pk in pks:
+                        data = deepmerge(data, index["contexts"][pk][1])
+                    merged_data[pks] = data
+                data = merged_data[pks]
+
+                if obj.local_context_data:
+                    data = deepmerge(data, obj.local_context_data)
+
+                yield obj.pk, data
+
     def _get_config_context_filters(self):
         # Construct the set of Q objects for the specific object types
         tag_query_filters = {
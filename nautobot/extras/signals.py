@@ -1,23 +1,29 @@
 import os
-import random
 import shutil
 import uuid
 import logging
-from datetime import timedelta
 
 from cacheops.signals import cache_invalidated, cache_read
-from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
-from django.db.models.signals import m2m_changed, pre_delete
+from django.db.models import DEFERRED
+from django.db.models.signals import m2m_changed, post_delete, post_init, post_migrate, post_save, pre_delete
 from django.dispatch import receiver
-from django.utils import timezone
 from django_prometheus.models import model_deletes, model_inserts, model_updates
-from prometheus_client import Counter
+from prometheus_client import REGISTRY, Counter
 
-from nautobot.extras.tasks import delete_custom_field_data, provision_field
+from nautobot.extras.tasks import ChangeLogPurgeCollector, delete_custom_field_data, provision_field
 from .choices import JobResultStatusChoices, ObjectChangeActionChoices
-from .models import CustomField, GitRepository, JobResult, ObjectChange
-from .webhooks import enqueue_webhooks
+from nautobot.dcim.models import Device, Region, Site
+from nautobot.tenancy.models import Tenant
+from nautobot.virtualization.models import Cluster, VirtualMachine
+from .config_context_index import (
+    DIMENSIONS as CONFIG_CONTEXT_DIMENSIONS,
+    invalidate_config_context_index,
+    invalidate_rendered_config_contexts,
+)
+from .models import ConfigContext, ConfigContextModel, CustomField, GitRepository, JobResult, TaggedItem, Webhook
+from .exports import delete_export
+from .webhooks import WebhookStatsCollector, invalidate_webhook_map
 
 logger = logging.getLogger("nautobot.extras.signals")
 
@@ -40,7 +46,7 @@ def _get_user_if_authenticated(request, objectchange):
         logger.warning(f"Unable to retrieve the user while creating the changelog for {objectchange.changed_object}")
 
 
-def _handle_changed_object(request, sender, instance, **kwargs):
+def _handle_changed_object(request, change_buffer, sender, instance, **kwargs):
     """
     Fires when an object is created or updated.
     """
@@ -55,15 +61,9 @@ def _handle_changed_object(request, sender, instance, **kwargs):
     else:
         return
 
-    # Record an ObjectChange if applicable
+    # Record an ObjectChange and enqueue webhooks if applicable
     if hasattr(instance, "to_objectchange"):
-        objectchange = instance.to_objectchange(action)
-        objectchange.user = _get_user_if_authenticated(request, objectchange)
-        objectchange.request_id = request.id
-        objectchange.save()
-
-    # Enqueue webhooks
-    enqueue_webhooks(instance, request.user, request.id, action)
+        change_buffer.record_change(instance, action)
 
     # Increment metric counters
     if action == ObjectChangeActionChoices.ACTION_CREATE:
@@ -71,25 +71,14 @@ def _handle_changed_object(request, sender, instance, **kwargs):
     elif action == ObjectChangeActionChoices.ACTION_UPDATE:
         model_updates.labels(instance._meta.model_name).inc()
 
-    # Housekeeping: 0.1% chance of clearing out expired ObjectChanges
-    if settings.CHANGELOG_RETENTION and random.randint(1, 1000) == 1:
-        cutoff = timezone.now() - timedelta(days=settings.CHANGELOG_RETENTION)
-        ObjectChange.objects.filter(time__lt=cutoff).delete()
-
 
-def _handle_deleted_object(request, sender, instance, **kwargs):
+def _handle_deleted_object(request, change_buffer, sender, instance, **kwargs):
     """
     Fires when an object is deleted.
     """
-    # Record an ObjectChange if applicable
+    # Record an ObjectChange and enqueue webhooks if applicable
     if hasattr(instance, "to_objectchange"):
-        objectchange = instance.to_objectchange(ObjectChangeActionChoices.ACTION_DELETE)
-        objectchange.user = _get_user_if_authenticated(request, objectchange)
-        objectchange.request_id = request.id
-        objectchange.save()
-
-    # Enqueue webhooks
-    enqueue_webhooks(instance, request.user, request.id, ObjectChangeActionChoices.ACTION_DELETE)
+        change_buffer.record_deletion(instance)
 
     # Increment metric counters
     model_deletes.labels(instance._meta.model_name).inc()
@@ -116,6 +105,120 @@ def handle_cf_removed_obj_types(instance, action, pk_set, **kwargs):
 m2m_changed.connect(handle_cf_removed_obj_types, sender=CustomField.content_types.through)
 
 
+#
+# Config contexts
+#
+
+
+def handle_config_context_changed(**kwargs):
+    """
+    Invalidate the index of active ConfigContexts when a ConfigContext or its assignments are changed, when an object to
+    which it may be assigned is deleted, or when the database is migrated or flushed.
+    """
+    invalidate_config_context_index()
+
+
+post_migrate.connect(handle_config_context_changed)
+post_save.connect(handle_config_context_changed, sender=ConfigContext)
+post_delete.connect(handle_config_context_changed, sender=ConfigContext)
+for dimension in CONFIG_CONTEXT_DIMENSIONS:
+    field = ConfigContext._meta.get_field(dimension)
+    m2m_changed.connect(handle_config_context_changed, sender=field.remote_field.through)
+    # Deleting an assigned object removes the assignment without sending m2m_changed
+    post_delete.connect(handle_config_context_changed, sender=field.related_model)
+
+# Changing the region of a site, the parent of a region, the group of a tenant, or the group or site of a cluster
+# changes which ConfigContexts apply to the devices and VMs beneath it without changing the devices or VMs themselves.
+# Each model maps to the fields by which it belongs to another object, and to the lookups of the devices and VMs
+# beneath it.
+CONFIG_CONTEXT_MEMBERSHIPS = {
+    Cluster: (("group_id", "site_id"), "cluster", "cluster"),
+    Region: (("parent_id",), "site__region__in", "cluster__site__region__in"),
+    Site: (("region_id",), "site", "cluster__site"),
+    Tenant: (("group_id",), "tenant", "tenant"),
+}
+
+
+def _get_config_context_membership(instance):
+    attnames = CONFIG_CONTEXT_MEMBERSHIPS[instance._meta.model][0]
+    return tuple(instance.__dict__.get(attname, DEFERRED) for attname in attnames)
+
+
+def handle_config_context_membership_loaded(instance, **kwargs):
+    """
+    Record the fields by which a site, region, tenant or cluster belongs to another object as loaded, so that a change
+    to them can be detected once it is saved.
+    """
+    instance._original_config_context_membership = _get_config_context_membership(instance)
+
+
+def handle_config_context_membership_saved(sender, instance, created, **kwargs):
+    """
+    Invalidate the cached rendered config contexts of the devices and VMs beneath a site, region, tenant or cluster
+    when the object to which it belongs is changed.
+    """
+    membership = _get_config_context_membership(instance)
+    if not created and membership != getattr(instance, "_original_config_context_membership", None):
+        _, device_lookup, vm_lookup = CONFIG_CONTEXT_MEMBERSHIPS[sender]
+        # A region's devices and VMs include those of its descendants, which move along with it
+        value = instance.get_descendants(include_self=True) if sender is Region else instance
+        for model, lookup in ((Device, device_lookup), (VirtualMachine, vm_lookup)):
+            pks = model.objects.filter(**{lookup: value}).values_list("pk", flat=True)
+            invalidate_rendered_config_contexts(model, list(pks))
+    instance._original_config_context_membership = membership
+
+
+for model in CONFIG_CONTEXT_MEMBERSHIPS:
+    post_init.connect(handle_config_context_membership_loaded, sender=model)
+    post_save.connect(handle_config_context_membership_saved, sender=model)
+
+
+def handle_config_context_model_changed(sender, instance, **kwargs):
+    """
+    Invalidate the cached rendered config context of a device or VM when it is changed or deleted.
+    """
+    invalidate_rendered_config_contexts(sender, [instance.pk])
+
+
+def handle_config_context_model_tags_changed(instance, action, **kwargs):
+    """
+    Invalidate the cached rendered config context of a device or VM when its tags are changed.
+    """
+    if action in ("post_add", "post_remove", "post_clear") and isinstance(instance, ConfigContextModel):
+        invalidate_rendered_config_contexts(instance._meta.model, [instance.pk])
+
+
+for model in (Device, VirtualMachine):
+    post_save.connect(handle_config_context_model_changed, sender=model)
+    post_delete.connect(handle_config_context_model_changed, sender=model)
+m2m_changed.connect(handle_config_context_model_tags_changed, sender=TaggedItem)
+
+
+#
+# Webhooks
+#
+
+
+def handle_webhook_changed(**kwargs):
+    """
+    Invalidate the map of enabled Webhooks when a Webhook or its content types are changed, or when the database is
+    migrated or flushed.
+    """
+    invalidate_webhook_map()
+
+
+post_migrate.connect(handle_webhook_changed)
+post_save.connect(handle_webhook_changed, sender=Webhook)
+post_delete.connect(handle_webhook_changed, sender=Webhook)
+m2m_changed.connect(handle_webhook_changed, sender=Webhook.content_types.through)
+
+# Webhooks are delivered by RQ workers, which record their delivery statistics in the cache for export from here
+REGISTRY.register(WebhookStatsCollector())
+
+# Likewise for the progress of the purges of expired change log records
+REGISTRY.register(ChangeLogPurgeCollector())
+
+
 #
 # Caching
 #
@@ -176,3 +279,16 @@ def git_repository_pre_delete(instance, **kwargs):
     # to clean up other clones as they're encountered.
     if os.path.isdir(instance.filesystem_path):
         shutil.rmtree(instance.filesystem_path)
+
+
+#
+# Exports
+#
+
+
+@receiver(post_delete, sender=JobResult)
+def job_result_delete_export(instance, **kwargs):
+    """
+    When a JobResult is deleted, delete the file it exported, if any.
+    """
+    delete_export(instance)
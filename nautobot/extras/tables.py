@@ -2,6 +2,7 @@ import django_tables2 as tables
 
 from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldError
 from django.urls import reverse
 from django_tables2.utils import Accessor
 
@@ -214,7 +215,7 @@ def job_creator_link(value, record):
         model_class = record.obj_type.model_class()
         try:
             return model_class.objects.get(name=record.name).get_absolute_url()
-        except model_class.DoesNotExist:
+        except (model_class.DoesNotExist, model_class.MultipleObjectsReturned, FieldError):
             pass
     return None
 
@@ -348,6 +349,8 @@ class WebhookTable(BaseTable):
             "type_create",
             "type_update",
             "type_delete",
+            "batch_size",
+            "rate_limit",
             "ssl_verification",
             "ca_file_path",
         )
@@ -1,12 +1,30 @@
+import time
+from datetime import timedelta
 from logging import getLogger
 
+from django.conf import settings
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.utils import timezone
 from django_rq import job
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily
 
+from nautobot.extras.changelog_partitions import create_partitions, drop_partitions, is_partitioned
 from nautobot.extras.choices import CustomFieldTypeChoices
 
 logger = getLogger("nautobot.extras.tasks")
 
+# The minimum interval in seconds between scheduled purges of expired change log records
+CHANGELOG_PURGE_INTERVAL = 60 * 60
+CHANGELOG_PURGE_SCHEDULE_KEY = "nautobot.extras.tasks.purge_changelog.scheduled"
+# Held while a purge is in progress, and refreshed after each batch
+CHANGELOG_PURGE_LOCK_KEY = "nautobot.extras.tasks.purge_changelog.lock"
+CHANGELOG_PURGE_LOCK_TIMEOUT = 5 * 60
+
+# Purges are performed by RQ workers, which record their progress in the cache for export by ChangeLogPurgeCollector
+CHANGELOG_PURGED_KEY = "nautobot.extras.tasks.purge_changelog.purged"
+CHANGELOG_PURGE_COMPLETED_KEY = "nautobot.extras.tasks.purge_changelog.completed"
+
 
 @job("custom_fields")
 def update_custom_field_choice_data(field_id, old_value, new_value):
@@ -87,3 +105,134 @@ def provision_field(field_id, content_type_pk_set):
         for obj in model.objects.all():
             obj._custom_field_data[field.name] = field.default
             obj.save()
+
+
+def record_changelog_purged(count):
+    """
+    Add the given number of deleted change log records to the total purged.
+    """
+    cache.add(CHANGELOG_PURGED_KEY, 0, timeout=None)
+    cache.incr(CHANGELOG_PURGED_KEY, count)
+
+
+class ChangeLogPurgeCollector:
+    """
+    Export the progress of the purges of expired change log records as Prometheus metrics.
+    """
+
+    def describe(self):
+        return self._get_metrics()
+
+    def collect(self):
+        purged, last_completed = self._get_metrics()
+        values = cache.get_many([CHANGELOG_PURGED_KEY, CHANGELOG_PURGE_COMPLETED_KEY])
+        purged.add_metric([], values.get(CHANGELOG_PURGED_KEY, 0))
+        if CHANGELOG_PURGE_COMPLETED_KEY in values:
+            last_completed.add_metric([], values[CHANGELOG_PURGE_COMPLETED_KEY])
+        return [purged, last_completed]
+
+    def _get_metrics(self):
+        return [
+            CounterMetricFamily("changelog_purged", "Number of expired change log records deleted"),
+            GaugeMetricFamily(
+                "changelog_purge_last_completed",
+                "Time at which the last purge of expired change log records completed",
+            ),
+        ]
+
+
+def delete_expired_changes(cutoff, batch_size, rate=0):
+    """
+    Delete all ObjectChanges recorded before `cutoff`, `batch_size` at a time in order of primary key, yielding the
+    total number deleted after each batch. If `rate` is nonzero, no more than `rate` ObjectChanges are deleted per
+    second on average.
+    """
+    from nautobot.extras.models import ObjectChange
+
+    queryset = ObjectChange.objects.filter(time__lt=cutoff).order_by("pk").nocache()
+    start_time = time.monotonic()
+    deleted = 0
+    last_pk = None
+    while True:
+        batch = queryset if last_pk is None else queryset.filter(pk__gt=last_pk)
+        pks = list(batch.values_list("pk", flat=True)[:batch_size])
+        if not pks:
+            return
+        last_pk = pks[-1]
+
+        count, _ = ObjectChange.objects.filter(pk__in=pks).delete()
+        deleted += count
+        record_changelog_purged(count)
+        yield deleted
+
+        if rate:
+            delay = deleted / rate - (time.monotonic() - start_time)
+            if delay > 0:
+                time.sleep(delay)
+
+
+@job("default")
+def purge_changelog(retention=None, batch_size=None, rate=None, progress_callback=None):
+    """
+    Delete all ObjectChanges older than the change log retention period.
+
+    Args:
+        retention (int): The number of days for which to retain changes (defaults to `CHANGELOG_RETENTION`)
+        batch_size (int): The number of changes to delete at a time (defaults to `CHANGELOG_PURGE_BATCH_SIZE`)
+        rate (int): The maximum number of changes to delete per second, or 0 for no limit (defaults to
+            `CHANGELOG_PURGE_RATE`)
+        progress_callback (callable): Called with the total number of changes deleted after each batch
+
+    If the change log table is partitioned, any missing partitions are created, and those partitions which contain only
+    expired changes are dropped.
+
+    Returns the number of changes deleted, or None if another purge is already in progress.
+    """
+    retention = settings.CHANGELOG_RETENTION if retention is None else retention
+    batch_size = batch_size or settings.CHANGELOG_PURGE_BATCH_SIZE
+    rate = settings.CHANGELOG_PURGE_RATE if rate is None else rate
+    partitioned = is_partitioned()
+    if partitioned:
+        # Partitions are created in advance even if changes are retained indefinitely, so that new changes are not
+        # stored in the default partition
+        create_partitions()
+    if not retention:
+        return 0
+
+    if not cache.add(CHANGELOG_PURGE_LOCK_KEY, True, timeout=CHANGELOG_PURGE_LOCK_TIMEOUT):
+        logger.info("A purge of expired change log records is already in progress")
+        return None
+
+    cutoff = timezone.now() - timedelta(days=retention)
+    dropped = 0
+    deleted = 0
+    try:
+        if partitioned:
+            # Expired months are dropped whole, leaving only the remainder of the oldest retained month to be deleted
+            for name, count in drop_partitions(cutoff):
+                logger.info(f"Dropped change log partition {name} of {count} records")
+                record_changelog_purged(count)
+                dropped += count
+            if progress_callback is not None and dropped:
+                progress_callback(dropped)
+
+        for deleted in delete_expired_changes(cutoff, batch_size, rate):
+            cache.set(CHANGELOG_PURGE_LOCK_KEY, True, timeout=CHANGELOG_PURGE_LOCK_TIMEOUT)
+            if progress_callback is not None:
+                progress_callback(dropped + deleted)
+    finally:
+        cache.delete(CHANGELOG_PURGE_LOCK_KEY)
+
+    cache.set(CHANGELOG_PURGE_COMPLETED_KEY, time.time(), timeout=None)
+    logger.info(f"Deleted {dropped + deleted} change log records older than {cutoff}")
+    return dropped + deleted
+
+
+def schedule_purge_changelog():
+    """
+    Enqueue a purge of expired change log records (which also maintains the partitions of a partitioned change log),
+    unless one has been enqueued within the last `CHANGELOG_PURGE_INTERVAL` seconds.
+    """
+    if cache.add(CHANGELOG_PURGE_SCHEDULE_KEY, True, timeout=CHANGELOG_PURGE_INTERVAL):
+        if settings.CHANGELOG_RETENTION or is_partitioned():
+            purge_changelog.delay()
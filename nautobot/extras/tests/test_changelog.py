@@ -1,10 +1,37 @@
+import gzip
+import json
+import os
+import tempfile
+import time
+import uuid
+from datetime import timedelta
+from unittest import skipUnless
+
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection
+from django.test import TestCase
 from django.urls import reverse
+from django.utils import timezone
 from rest_framework import status
 
 from nautobot.dcim.models import Site
 from nautobot.extras.choices import *
+from nautobot.extras.changelog_partitions import (
+    create_partitions,
+    drop_partitions,
+    get_partitions,
+    is_partitioned,
+    partition_table,
+)
 from nautobot.extras.models import CustomField, CustomFieldChoice, ObjectChange, Status, Tag
+from nautobot.extras.tasks import (
+    CHANGELOG_PURGE_COMPLETED_KEY,
+    CHANGELOG_PURGE_LOCK_KEY,
+    CHANGELOG_PURGED_KEY,
+    ChangeLogPurgeCollector,
+    purge_changelog,
+)
 from nautobot.utilities.testing import APITestCase
 from nautobot.utilities.testing.utils import post_data
 from nautobot.utilities.testing.views import ModelViewTestCase
@@ -54,11 +81,12 @@ class ChangeLogViewTest(ModelViewTestCase):
         self.assertHttpStatus(response, 302)
 
         site = Site.objects.get(name="Test Site 1")
-        # First OC is the creation; second is the tags update
+        # The creation and the tags update are coalesced into a single OC
         oc_list = ObjectChange.objects.filter(
             changed_object_type=ContentType.objects.get_for_model(Site),
             changed_object_id=site.pk,
         ).order_by("time")
+        self.assertEqual(len(oc_list), 1)
         self.assertEqual(oc_list[0].changed_object, site)
         self.assertEqual(oc_list[0].action, ObjectChangeActionChoices.ACTION_CREATE)
         self.assertEqual(
@@ -69,8 +97,7 @@ class ChangeLogViewTest(ModelViewTestCase):
             oc_list[0].object_data["custom_fields"]["my_field_select"],
             form_data["cf_my_field_select"],
         )
-        self.assertEqual(oc_list[1].action, ObjectChangeActionChoices.ACTION_UPDATE)
-        self.assertEqual(oc_list[1].object_data["tags"], ["Tag 1", "Tag 2"])
+        self.assertEqual(oc_list[0].object_data["tags"], ["Tag 1", "Tag 2"])
 
     def test_update_object(self):
         site = Site(
@@ -192,16 +219,16 @@ class ChangeLogAPITest(APITestCase):
         self.assertHttpStatus(response, status.HTTP_201_CREATED)
 
         site = Site.objects.get(pk=response.data["id"])
-        # First OC is the creation; second is the tags update
+        # The creation and the tags update are coalesced into a single OC
         oc_list = ObjectChange.objects.filter(
             changed_object_type=ContentType.objects.get_for_model(Site),
             changed_object_id=site.pk,
         ).order_by("time")
+        self.assertEqual(len(oc_list), 1)
         self.assertEqual(oc_list[0].changed_object, site)
         self.assertEqual(oc_list[0].action, ObjectChangeActionChoices.ACTION_CREATE)
         self.assertEqual(oc_list[0].object_data["custom_fields"], data["custom_fields"])
-        self.assertEqual(oc_list[1].action, ObjectChangeActionChoices.ACTION_UPDATE)
-        self.assertEqual(oc_list[1].object_data["tags"], ["Tag 1", "Tag 2"])
+        self.assertEqual(oc_list[0].object_data["tags"], ["Tag 1", "Tag 2"])
 
     def test_update_object(self):
         site = Site(
@@ -263,3 +290,146 @@ class ChangeLogAPITest(APITestCase):
         self.assertEqual(oc.object_data["custom_fields"]["my_field"], "ABC")
         self.assertEqual(oc.object_data["custom_fields"]["my_field_select"], "Bar")
         self.assertEqual(oc.object_data["tags"], ["Tag 1", "Tag 2"])
+
+
+class PurgeChangeLogTest(TestCase):
+    def setUp(self):
+        site_ct = ContentType.objects.get_for_model(Site)
+        ObjectChange.objects.bulk_create(
+            [
+                ObjectChange(
+                    changed_object_type=site_ct,
+                    changed_object_id=Site.objects.create(name=f"Site {i}", slug=f"site-{i}").pk,
+                    action=ObjectChangeActionChoices.ACTION_CREATE,
+                    object_repr=f"Site {i}",
+                    object_data={},
+                    request_id=uuid.uuid4(),
+                )
+                for i in range(5)
+            ]
+        )
+        self.expired = list(ObjectChange.objects.order_by("pk").values_list("pk", flat=True)[:3])
+        ObjectChange.objects.filter(pk__in=self.expired).update(time=timezone.now() - timedelta(days=31))
+
+    def test_purge_changelog(self):
+        progress = []
+        deleted = purge_changelog(retention=30, batch_size=2, progress_callback=progress.append)
+
+        self.assertEqual(deleted, 3)
+        self.assertEqual(progress, [2, 3])
+        self.assertEqual(ObjectChange.objects.count(), 2)
+        self.assertFalse(ObjectChange.objects.filter(pk__in=self.expired).exists())
+        self.assertIsNone(cache.get(CHANGELOG_PURGE_LOCK_KEY))
+
+    def test_purge_changelog_collector(self):
+        cache.delete_many([CHANGELOG_PURGED_KEY, CHANGELOG_PURGE_COMPLETED_KEY])
+        metrics = {metric.name: metric for metric in ChangeLogPurgeCollector().collect()}
+        self.assertEqual(metrics["changelog_purged"].samples[0].value, 0)
+        self.assertEqual(metrics["changelog_purge_last_completed"].samples, [])
+
+        before = time.time()
+        purge_changelog(retention=30, batch_size=2)
+
+        # The progress recorded by the worker is exported by any process
+        metrics = {metric.name: metric for metric in ChangeLogPurgeCollector().collect()}
+        self.assertEqual(metrics["changelog_purged"].samples[0].value, 3)
+        self.assertGreaterEqual(metrics["changelog_purge_last_completed"].samples[0].value, before)
+
+    def test_purge_changelog_unlimited_retention(self):
+        self.assertEqual(purge_changelog(retention=0), 0)
+        self.assertEqual(ObjectChange.objects.count(), 5)
+
+    def test_purge_changelog_in_progress(self):
+        cache.set(CHANGELOG_PURGE_LOCK_KEY, True)
+        try:
+            self.assertIsNone(purge_changelog(retention=30))
+        finally:
+            cache.delete(CHANGELOG_PURGE_LOCK_KEY)
+        self.assertEqual(ObjectChange.objects.count(), 5)
+
+
+@skipUnless(connection.vendor == "postgresql", "Partitioning is supported only on PostgreSQL")
+class PartitionChangeLogTest(TestCase):
+    def setUp(self):
+        site = Site.objects.create(name="Site 1", slug="site-1")
+        ObjectChange.objects.bulk_create(
+            [
+                ObjectChange(
+                    changed_object_type=ContentType.objects.get_for_model(Site),
+                    changed_object_id=site.pk,
+                    action=ObjectChangeActionChoices.ACTION_UPDATE,
+                    object_repr=site.name,
+                    object_data={"index": i},
+                    request_id=uuid.uuid4(),
+                )
+                for i in range(4)
+            ]
+        )
+        # Two changes made 70 days ago, and two made now
+        self.expired = list(ObjectChange.objects.order_by("pk").values_list("pk", flat=True)[:2])
+        ObjectChange.objects.filter(pk__in=self.expired).update(time=timezone.now() - timedelta(days=70))
+
+    def test_partition_table(self):
+        partition_table(months_ahead=1)
+
+        self.assertTrue(is_partitioned())
+        partitions = get_partitions()
+        self.assertLessEqual(partitions[0][1], timezone.now() - timedelta(days=70))
+        self.assertGreater(partitions[-1][1], timezone.now())
+        self.assertEqual(ObjectChange.objects.count(), 4)
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {partitions[0][0]}")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+        # Changes are logged as before
+        site = Site.objects.create(name="Site 2", slug="site-2")
+        objectchange = site.to_objectchange(ObjectChangeActionChoices.ACTION_CREATE)
+        objectchange.request_id = uuid.uuid4()
+        objectchange.save()
+        self.assertEqual(ObjectChange.objects.filter(changed_object_id=site.pk).count(), 1)
+
+    def test_create_partitions_from_default(self):
+        partition_table(months_ahead=1)
+        # Changes logged beyond the last partition, or before the first, are stored in the default partition
+        future = ObjectChange.objects.filter(pk__in=self.expired[:1])
+        future.update(time=timezone.now() + timedelta(days=100))
+        past = ObjectChange.objects.filter(pk__in=self.expired[1:])
+        past.update(time=timezone.now() - timedelta(days=400))
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {ObjectChange._meta.db_table}_default")
+            self.assertEqual(cursor.fetchone()[0], 2)
+
+        created = create_partitions(start=timezone.now() - timedelta(days=400), months_ahead=4)
+
+        # The changes are moved into the partitions created for their months
+        with connection.cursor() as cursor:
+            cursor.execute(f"SELECT count(*) FROM {ObjectChange._meta.db_table}_default")
+            self.assertEqual(cursor.fetchone()[0], 0)
+            for objectchange in (future.get(), past.get()):
+                name = f"{ObjectChange._meta.db_table}_p{objectchange.time:%Y%m}"
+                self.assertIn(name, created)
+                cursor.execute(f"SELECT count(*) FROM {name} WHERE id = %s", [objectchange.pk])
+                self.assertEqual(cursor.fetchone()[0], 1)
+        self.assertEqual(ObjectChange.objects.count(), 4)
+
+    def test_drop_partitions(self):
+        partition_table(months_ahead=1)
+
+        with tempfile.TemporaryDirectory() as export_dir:
+            dropped = drop_partitions(timezone.now() - timedelta(days=35), export_dir=export_dir)
+            self.assertEqual(sum(count for _, count in dropped), 2)
+            archived = []
+            for name, _ in dropped:
+                with gzip.open(os.path.join(export_dir, f"{name}.jsonl.gz"), "rt") as f:
+                    archived.extend(json.loads(line) for line in f)
+
+        self.assertEqual(sorted(change["id"] for change in archived), sorted(str(pk) for pk in self.expired))
+        self.assertEqual(ObjectChange.objects.count(), 2)
+        self.assertFalse(ObjectChange.objects.filter(pk__in=self.expired).exists())
+
+    def test_purge_changelog_partitioned(self):
+        partition_table(months_ahead=1)
+
+        self.assertEqual(purge_changelog(retention=30), 2)
+        self.assertEqual(ObjectChange.objects.count(), 2)
+        self.assertGreater(get_partitions()[0][2], timezone.now() - timedelta(days=35))
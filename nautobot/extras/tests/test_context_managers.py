@@ -1,11 +1,14 @@
+from unittest.mock import patch
+
 import django_rq
 from django.contrib.auth import get_user_model
 from django.contrib.contenttypes.models import ContentType
+from django.db import transaction
 from django.test import TestCase
 
 from nautobot.dcim.models import Site
 from nautobot.extras.choices import *
-from nautobot.extras.context_managers import web_request_context
+from nautobot.extras.context_managers import ObjectChangeBuffer, web_request_context
 from nautobot.extras.models import ObjectChange, Webhook
 
 
@@ -66,6 +69,82 @@ class WebRequestContextTestCase(TestCase):
         self.assertEqual(oc_list[0].changed_object, site)
         self.assertEqual(oc_list[0].action, ObjectChangeActionChoices.ACTION_CREATE)
 
+    def test_change_log_coalesced(self):
+
+        with web_request_context(self.user):
+            site = Site(name="Test Site 1", slug="test-site-1")
+            site.save()
+            site.description = "Updated"
+            site.save()
+            site2 = Site(name="Test Site 2", slug="test-site-2")
+            site2.save()
+            site2_pk = site2.pk
+            site2.delete()
+
+        oc_list = ObjectChange.objects.filter(changed_object_id=site.pk)
+        self.assertEqual(len(oc_list), 1)
+        self.assertEqual(oc_list[0].action, ObjectChangeActionChoices.ACTION_CREATE)
+        self.assertEqual(oc_list[0].object_data["description"], "Updated")
+        self.assertEqual(oc_list[0].user, self.user)
+        oc_list = ObjectChange.objects.filter(changed_object_id=site2_pk).order_by("time")
+        self.assertEqual(
+            [oc.action for oc in oc_list],
+            [ObjectChangeActionChoices.ACTION_CREATE, ObjectChangeActionChoices.ACTION_DELETE],
+        )
+
+    def test_change_log_rolled_back(self):
+
+        with web_request_context(self.user):
+            Site.objects.create(name="Test Site 1", slug="test-site-1")
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    Site.objects.create(name="Test Site 2", slug="test-site-2")
+                    raise RuntimeError()
+
+        self.assertEqual(
+            list(ObjectChange.objects.values_list("object_repr", flat=True)),
+            ["Test Site 1"],
+        )
+
+    def test_change_log_rolled_back_mutation(self):
+
+        with web_request_context(self.user):
+            site = Site.objects.create(name="Test Site 1", slug="test-site-1")
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    site.name = "Test Site 2"
+                    site.save()
+                    raise RuntimeError()
+
+        # The change is recorded as the object was saved, not as it was later changed in memory
+        oc = ObjectChange.objects.get(changed_object_id=site.pk)
+        self.assertEqual(oc.object_repr, "Test Site 1")
+        self.assertEqual(oc.object_data["name"], "Test Site 1")
+        ((_, events),) = self.queue.jobs[0].args[0]
+        self.assertEqual(events[0]["data"]["name"], "Test Site 1")
+
+    @patch("nautobot.extras.context_managers.SERIALIZE_BATCH_SIZE", 2)
+    def test_change_log_serialized_in_batches(self):
+        batches = []
+        serialize_changes = ObjectChangeBuffer.serialize_changes
+
+        def record_batch(change_buffer):
+            batches.append([change.instance is None for change in change_buffer.unserialized_changes])
+            serialize_changes(change_buffer)
+            # The objects of the serialized changes are released
+            self.assertTrue(all(change.instance is None for change in change_buffer.changes))
+
+        with patch.object(ObjectChangeBuffer, "serialize_changes", record_batch):
+            with web_request_context(self.user):
+                sites = [Site.objects.create(name=f"Test Site {i}", slug=f"test-site-{i}") for i in range(1, 4)]
+                sites[0].description = "Updated"
+                sites[0].save()
+
+        # Two batches of two changes are serialized while the request is in progress, then none remain at its end
+        self.assertEqual(batches, [[False, False], [False, False], []])
+        self.assertEqual(ObjectChange.objects.count(), 3)
+        self.assertEqual(ObjectChange.objects.get(changed_object_id=sites[0].pk).object_data["description"], "Updated")
+
     def test_change_webhook_enqueued(self):
 
         with web_request_context(self.user):
@@ -76,6 +155,7 @@ class WebRequestContextTestCase(TestCase):
         site = Site.objects.get(name="Test Site 2")
         self.assertEqual(self.queue.count, 1)
         job = self.queue.jobs[0]
-        self.assertEqual(job.args[0], Webhook.objects.get(type_create=True))
-        self.assertEqual(job.args[1]["id"], str(site.pk))
-        self.assertEqual(job.args[2], "site")
+        ((webhook, events),) = job.args[0]
+        self.assertEqual(webhook, Webhook.objects.get(type_create=True))
+        self.assertEqual(events[0]["data"]["id"], str(site.pk))
+        self.assertEqual(events[0]["model_name"], "site")
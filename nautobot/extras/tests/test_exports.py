@@ -0,0 +1,220 @@
+import os
+import tempfile
+import uuid
+from unittest.mock import patch
+
+import django_rq
+from django.conf import settings
+from django.contrib.auth import get_user_model
+from django.contrib.contenttypes.models import ContentType
+from django.test import override_settings
+from django.urls import reverse
+
+from nautobot.dcim.models import Site
+from nautobot.extras.choices import JobResultStatusChoices
+from nautobot.extras.exports import enqueue_export, get_export_path
+from nautobot.extras.models import ExportTemplate, JobResult
+from nautobot.utilities.testing import APITestCase, TestCase
+
+
+User = get_user_model()
+
+
+def perform_export(job_result):
+    """
+    Run the enqueued export job of the given JobResult in the current process.
+    """
+    django_rq.get_queue("default").fetch_job(str(job_result.job_id)).perform()
+    job_result.refresh_from_db()
+
+
+class ExportTestCase(TestCase):
+    user_permissions = ["dcim.view_site", "extras.view_jobresult"]
+
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(1, 4):
+            Site.objects.create(name=f"Site {i}", slug=f"site-{i}")
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    def test_export_csv(self):
+        job_result = enqueue_export(Site.objects.filter(name__in=["Site 1", "Site 3"]), self.user)
+        self.assertEqual(job_result.name, "nautobot_sites.csv")
+        self.assertEqual(job_result.obj_type, ContentType.objects.get_for_model(Site))
+
+        perform_export(job_result)
+        self.assertEqual(job_result.status, JobResultStatusChoices.STATUS_COMPLETED)
+        with open(get_export_path(job_result)) as f:
+            lines = f.read().splitlines()
+        self.assertEqual(lines[0], ",".join(Site.csv_headers))
+        self.assertEqual([line.split(",")[0] for line in lines[1:]], ["Site 1", "Site 3"])
+
+        # The exported file is deleted with its JobResult
+        job_result.delete()
+        self.assertFalse(os.path.exists(get_export_path(job_result)))
+
+    def test_export_template(self):
+        export_template = ExportTemplate.objects.create(
+            name="Site Names",
+            content_type=ContentType.objects.get_for_model(Site),
+            template_code="{% for site in queryset %}{{ site.name }};{% endfor %}",
+            file_extension="txt",
+        )
+        job_result = enqueue_export(Site.objects.all(), self.user, export_template)
+
+        perform_export(job_result)
+        with open(get_export_path(job_result)) as f:
+            self.assertEqual(f.read(), "Site 1;Site 2;Site 3;")
+
+    def test_export_failed(self):
+        export_template = ExportTemplate.objects.create(
+            name="Broken",
+            content_type=ContentType.objects.get_for_model(Site),
+            template_code="{{ queryset.missing() }}",
+        )
+        job_result = enqueue_export(Site.objects.all(), self.user, export_template)
+
+        perform_export(job_result)
+        self.assertEqual(job_result.status, JobResultStatusChoices.STATUS_ERRORED)
+        self.assertFalse(os.path.exists(get_export_path(job_result)))
+
+    def test_export_path(self):
+        job_result = JobResult.objects.create(
+            name="/etc/passwd",
+            obj_type=ContentType.objects.get_for_model(Site),
+            user=self.user,
+            job_id=uuid.uuid4(),
+            data={"_export": True},
+        )
+        # The file of an export is always within the export's own directory
+        export_directory = os.path.join(settings.MEDIA_ROOT, "exports", str(job_result.job_id))
+        self.assertEqual(get_export_path(job_result), os.path.join(os.path.realpath(export_directory), "passwd"))
+        job_result.name = ".."
+        self.assertIsNone(get_export_path(job_result))
+
+    def test_job_result_named_as_path(self):
+        # Other job results may be named arbitrarily, such as by the name of a Git repository or a webhook
+        other_directory = tempfile.TemporaryDirectory()
+        self.addCleanup(other_directory.cleanup)
+        path = os.path.join(other_directory.name, "nautobot_config.py")
+        with open(path, "w") as f:
+            f.write("SECRET_KEY = 'secret'")
+        job_result = JobResult.objects.create(
+            name=path,
+            obj_type=ContentType.objects.get_for_model(Site),
+            user=self.user,
+            job_id=uuid.uuid4(),
+            status=JobResultStatusChoices.STATUS_COMPLETED,
+        )
+        self.assertIsNone(get_export_path(job_result))
+
+        # The file is neither offered for download, nor served
+        response = self.client.get(job_result.get_absolute_url())
+        self.assertIsNone(response.context["export_url"])
+        response = self.client.get(reverse("extras:jobresult_export", kwargs={"pk": job_result.pk}))
+        self.assertHttpStatus(response, 404)
+
+        # Nor is it deleted with the JobResult
+        job_result.delete()
+        self.assertTrue(os.path.exists(path))
+
+    @patch("nautobot.core.views.generic.Worker.count", return_value=1)
+    def test_export_async_view(self, _):
+        response = self.client.get("{}?export&async=true&name=Site+2".format(reverse("dcim:site_list")))
+        job_result = JobResult.objects.get(name="nautobot_sites.csv")
+        self.assertRedirects(response, job_result.get_absolute_url(), fetch_redirect_response=False)
+
+        perform_export(job_result)
+        response = self.client.get(job_result.get_absolute_url())
+        export_url = reverse("extras:jobresult_export", kwargs={"pk": job_result.pk})
+        self.assertEqual(response.context["export_url"], export_url)
+        response = self.client.get(export_url)
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="nautobot_sites.csv"')
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 2)
+
+        # Only the user who requested the export may download it
+        self.user = User.objects.create_user(username="otheruser")
+        self.add_permissions("extras.view_jobresult")
+        self.client.force_login(self.user)
+        self.assertHttpStatus(self.client.get(export_url), 404)
+
+    @patch("nautobot.core.views.generic.Worker.count", return_value=0)
+    def test_export_async_view_without_worker(self, _):
+        # The export is streamed as usual if no RQ worker is running
+        response = self.client.get("{}?export&async=true".format(reverse("dcim:site_list")))
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(response["Content-Type"], "text/csv")
+        self.assertFalse(JobResult.objects.exists())
+
+
+class ExportAPITestCase(APITestCase):
+    @classmethod
+    def setUpTestData(cls):
+        for i in range(1, 4):
+            Site.objects.create(name=f"Site {i}", slug=f"site-{i}")
+
+    def setUp(self):
+        super().setUp()
+        media_root = tempfile.TemporaryDirectory()
+        self.addCleanup(media_root.cleanup)
+        settings_override = override_settings(MEDIA_ROOT=media_root.name)
+        settings_override.enable()
+        self.addCleanup(settings_override.disable)
+
+    @patch("nautobot.core.api.views.Worker.count", return_value=1)
+    def test_export(self, _):
+        self.add_permissions("dcim.view_site", "extras.view_jobresult")
+
+        response = self.client.get("{}?export&name=Site+1".format(reverse("dcim-api:site-list")), **self.header)
+        self.assertHttpStatus(response, 202)
+        job_result = JobResult.objects.get(pk=response.data["id"])
+        self.assertEqual(job_result.name, "nautobot_sites.csv")
+
+        perform_export(job_result)
+        response = self.client.get(reverse("extras-api:jobresult-export", kwargs={"pk": job_result.pk}), **self.header)
+        self.assertHttpStatus(response, 200)
+        self.assertEqual(len(b"".join(response.streaming_content).splitlines()), 2)
+
+    def test_export_job_result_named_as_path(self):
+        self.add_permissions("extras.view_jobresult")
+        job_result = JobResult.objects.create(
+            name=os.path.join(settings.BASE_DIR, "nautobot_config.py"),
+            obj_type=ContentType.objects.get_for_model(Site),
+            user=self.user,
+            job_id=uuid.uuid4(),
+            status=JobResultStatusChoices.STATUS_COMPLETED,
+        )
+        response = self.client.get(reverse("extras-api:jobresult-export", kwargs={"pk": job_result.pk}), **self.header)
+        self.assertHttpStatus(response, 404)
+
+    @patch("nautobot.core.api.views.Worker.count", return_value=1)
+    def test_export_unknown_template(self, _):
+        self.add_permissions("dcim.view_site")
+
+        response = self.client.get("{}?export=missing".format(reverse("dcim-api:site-list")), **self.header)
+        self.assertHttpStatus(response, 400)
+
+    @patch("nautobot.core.api.views.Worker.count", return_value=1)
+    def test_export_job_results(self, _):
+        """The list of JobResults may be exported, although each JobResult has an `export` action of its own."""
+        self.add_permissions("extras.view_jobresult")
+        ExportTemplate.objects.create(
+            name="Job Result Names",
+            content_type=ContentType.objects.get_for_model(JobResult),
+            template_code="{% for job_result in queryset %}{{ job_result.name }};{% endfor %}",
+            file_extension="txt",
+        )
+
+        response = self.client.get(
+            "{}?export=Job+Result+Names".format(reverse("extras-api:jobresult-list")), **self.header
+        )
+        self.assertHttpStatus(response, 202)
+        self.assertEqual(JobResult.objects.get(pk=response.data["id"]).name, "nautobot_job results.txt")
@@ -16,6 +16,12 @@ from nautobot.dcim.models import (
     Site,
     Region,
 )
+from nautobot.extras.config_context_index import (
+    build_config_context_index,
+    get_config_context_index,
+    get_object_dimensions,
+    resolve_config_contexts,
+)
 from nautobot.extras.models import ConfigContext, GitRepository, Status, Tag
 from nautobot.tenancy.models import Tenant, TenantGroup
 from nautobot.utilities.choices import ColorChoices
@@ -160,6 +166,52 @@ class ConfigContextTest(TestCase):
             annotated_queryset[0].get_config_context(),
         )
 
+    def test_index_same_as_get_for_object(self):
+        cluster_group = ClusterGroup.objects.create(name="Cluster Group")
+        cluster = Cluster.objects.create(
+            name="Cluster", group=cluster_group, type=ClusterType.objects.create(name="Cluster Type 1")
+        )
+        child_region = Region.objects.create(name="Child Region", slug="child-region", parent=self.region)
+        site2 = Site.objects.create(name="Site-2", slug="site-2", region=child_region)
+        assignments = {
+            "regions": [self.region],
+            "sites": [self.site, site2],
+            "roles": [self.devicerole],
+            "platforms": [self.platform],
+            "cluster_groups": [cluster_group],
+            "clusters": [cluster],
+            "tenant_groups": [self.tenantgroup],
+            "tenants": [self.tenant],
+            "tags": [self.tag, self.tag2],
+        }
+        ConfigContext.objects.create(name="global", weight=200, data={"global": 1})
+        ConfigContext.objects.create(name="inactive", weight=100, data={"inactive": 1}, is_active=False)
+        for i, (dimension, objects) in enumerate(assignments.items()):
+            context = ConfigContext.objects.create(name=dimension, weight=100 + i % 2, data={dimension: 1})
+            getattr(context, dimension).set(objects)
+        site_and_tag_context = ConfigContext.objects.create(name="site and tag", weight=100, data={"site_tag": 1})
+        site_and_tag_context.sites.add(site2)
+        site_and_tag_context.tags.add(self.tag2)
+
+        device = Device.objects.create(
+            name="Device 2",
+            site=site2,
+            tenant=self.tenant,
+            platform=self.platform,
+            device_role=self.devicerole,
+            device_type=self.devicetype,
+        )
+        device.tags.add(self.tag2)
+        virtual_machine = VirtualMachine.objects.create(name="VM 1", cluster=cluster, role=self.devicerole)
+        virtual_machine.tags.add(self.tag)
+
+        index = build_config_context_index()
+        for obj in (self.device, device, virtual_machine):
+            self.assertEqual(
+                resolve_config_contexts(index, get_object_dimensions(obj)),
+                list(ConfigContext.objects.get_for_object(obj).values_list("pk", flat=True)),
+            )
+
     def test_multiple_tags_return_distinct_objects(self):
         """
         Tagged items use a generic relationship, which results in duplicate rows being returned when queried.
@@ -220,6 +272,112 @@ class ConfigContextTest(TestCase):
         self.assertEqual(device.get_config_context(), annotated_queryset[0].get_config_context())
 
 
+class ConfigContextCacheTest(TransactionTestCase):
+    """
+    Tests for the caching of rendered config contexts.
+
+    Note: This is a TransactionTestCase, rather than a TestCase, because config contexts are only cached outside of
+    transactions, and their invalidation is completed by transaction.on_commit().
+    """
+
+    def setUp(self):
+        manufacturer = Manufacturer.objects.create(name="Manufacturer 1", slug="manufacturer-1")
+        devicetype = DeviceType.objects.create(manufacturer=manufacturer, model="Device Type 1", slug="device-type-1")
+        devicerole = DeviceRole.objects.create(name="Device Role 1", slug="device-role-1")
+        self.region = Region.objects.create(name="Region", slug="region")
+        self.site = Site.objects.create(name="Site-1", slug="site-1")
+        self.tag = Tag.objects.create(name="Tag", slug="tag")
+        self.device = Device.objects.create(
+            name="Device 1", device_type=devicetype, device_role=devicerole, site=self.site
+        )
+        self.site_context = ConfigContext.objects.create(name="site", weight=100, data={"site": 1})
+        self.site_context.sites.add(self.site)
+
+    def test_config_context_cached(self):
+        self.assertEqual(self.device.get_config_context(), {"site": 1})
+        device = Device.objects.select_related("site").get(pk=self.device.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(device.get_config_context(), {"site": 1})
+
+    def test_render_config_contexts(self):
+        tag_context = ConfigContext.objects.create(name="tag", weight=50, data={"tag": 1, "site": 0})
+        tag_context.tags.add(self.tag)
+        region_context = ConfigContext.objects.create(name="region", weight=200, data={"region": 1})
+        region_context.regions.add(self.region)
+        self.site.region = self.region
+        self.site.save()
+        device2 = Device.objects.create(
+            name="Device 2",
+            device_type=self.device.device_type,
+            device_role=self.device.device_role,
+            site=self.site,
+            local_context_data={"local": 1},
+        )
+        device2.tags.add(self.tag)
+        Device.objects.create(
+            name="Device 3", device_type=self.device.device_type, device_role=self.device.device_role, site=self.site
+        )
+
+        # Regions, devices, tags, and the (empty) final chunk of devices, once the index has been built
+        self.device.get_config_context()
+        with self.assertNumQueries(4):
+            config_contexts = dict(Device.objects.all().render_config_contexts())
+        self.assertEqual(config_contexts, {device.pk: device.get_config_context() for device in Device.objects.all()})
+        self.assertEqual(config_contexts[device2.pk], {"tag": 1, "site": 1, "region": 1, "local": 1})
+
+    def test_config_context_cache_invalidated(self):
+        self.assertEqual(self.device.get_config_context(), {"site": 1})
+
+        # Change the data of a contributing ConfigContext
+        self.site_context.data = {"site": 2}
+        self.site_context.save()
+        self.assertEqual(self.device.get_config_context(), {"site": 2})
+
+        # Change the device's local config context data
+        self.device.local_context_data = {"local": 1}
+        self.device.save()
+        self.assertEqual(Device.objects.get(pk=self.device.pk).get_config_context(), {"site": 2, "local": 1})
+
+        # Tag the device
+        tag_context = ConfigContext.objects.create(name="tag", weight=100, data={"tag": 1})
+        tag_context.tags.add(self.tag)
+        self.assertEqual(self.device.get_config_context(), {"site": 2, "local": 1})
+        self.device.tags.add(self.tag)
+        self.assertEqual(self.device.get_config_context(), {"site": 2, "tag": 1, "local": 1})
+
+        # Assign the device's site to a region
+        region_context = ConfigContext.objects.create(name="region", weight=50, data={"region": 1})
+        region_context.regions.add(self.region)
+        self.assertEqual(self.device.get_config_context(), {"site": 2, "tag": 1, "local": 1})
+        self.site.region = self.region
+        self.site.save()
+        device = Device.objects.get(pk=self.device.pk)
+        self.assertEqual(device.get_config_context(), {"region": 1, "site": 2, "tag": 1, "local": 1})
+
+        # Move the site's region beneath another region
+        parent_region = Region.objects.create(name="Parent Region", slug="parent-region")
+        parent_region_context = ConfigContext.objects.create(name="parent region", weight=50, data={"parent": 1})
+        parent_region_context.regions.add(parent_region)
+        region = Region.objects.get(pk=self.region.pk)
+        region.parent = parent_region
+        region.save()
+        device = Device.objects.get(pk=self.device.pk)
+        self.assertEqual(device.get_config_context(), {"region": 1, "parent": 1, "site": 2, "tag": 1, "local": 1})
+
+    def test_config_context_cache_kept(self):
+        self.assertEqual(self.device.get_config_context(), {"site": 1})
+        version = get_config_context_index()["version"]
+
+        # Changing a site other than by moving it to another region invalidates neither the index nor the cache
+        site = Site.objects.get(pk=self.site.pk)
+        site.description = "Updated"
+        site.save()
+        self.assertEqual(get_config_context_index()["version"], version)
+        device = Device.objects.select_related("site").get(pk=self.device.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(device.get_config_context(), {"site": 1})
+
+
 class GitRepositoryTest(TransactionTestCase):
     """
     Tests for the GitRepository model class.
@@ -276,6 +276,43 @@ class ExportTemplateTestCase(
         }
 
 
+class ExportTemplateRenderTest(TestCase):
+    user_permissions = ["dcim.view_site"]
+
+    def test_export_template_streamed(self):
+        ExportTemplate.objects.create(
+            name="Site Names",
+            content_type=ContentType.objects.get_for_model(Site),
+            template_code="{% for site in queryset %}{{ site.name }}\r\n{% endfor %}",
+            file_extension="txt",
+        )
+        for i in range(1, 4):
+            Site.objects.create(name=f"Site {i}", slug=f"site-{i}")
+
+        response = self.client.get("{}?export=Site+Names".format(reverse("dcim:site_list")))
+        self.assertHttpStatus(response, 200)
+        self.assertTrue(response.streaming)
+        self.assertEqual(response["Content-Disposition"], 'attachment; filename="nautobot_sites.txt"')
+        self.assertEqual(response.getvalue().decode(), "Site 1\nSite 2\nSite 3\n")
+
+    def test_export_template_render_error(self):
+        ExportTemplate.objects.create(
+            name="Site Names",
+            content_type=ContentType.objects.get_for_model(Site),
+            template_code="{% for site in queryset %}{{ site.missing() }}\n{% endfor %}",
+            file_extension="txt",
+        )
+        Site.objects.create(name="Site 1", slug="site-1")
+
+        # An error raised while rendering is displayed, rather than truncating the download
+        response = self.client.get("{}?export=Site+Names".format(reverse("dcim:site_list")))
+        self.assertHttpStatus(response, 200)
+        self.assertFalse(response.streaming)
+        self.assertIn(
+            "There was an error rendering the selected export template (Site Names)", response.content.decode()
+        )
+
+
 class CustomLinkTestCase(
     ViewTestCases.CreateObjectViewTestCase,
     ViewTestCases.DeleteObjectViewTestCase,
@@ -384,6 +421,8 @@ class WebhookTestCase(
             "payload_url": "http://test-url.com/test-4",
             "http_method": "POST",
             "http_content_type": "application/json",
+            "batch_size": 1,
+            "rate_limit": 0,
         }
 
 
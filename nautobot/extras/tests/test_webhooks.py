@@ -4,16 +4,38 @@ from unittest.mock import patch
 
 import django_rq
 from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import transaction
 from django.http import HttpResponse
+from django.test import override_settings
 from django.urls import reverse
 from requests import Session
+from requests.exceptions import Timeout
 from rest_framework import status
 
-from nautobot.dcim.models import Site
-from nautobot.extras.choices import ObjectChangeActionChoices
-from nautobot.extras.models import Status, Webhook
-from nautobot.extras.webhooks import enqueue_webhooks, generate_signature
-from nautobot.extras.webhooks_worker import process_webhook
+from nautobot.dcim.models import Region, Site
+from nautobot.extras import webhooks as webhooks_module
+from nautobot.extras.context_managers import web_request_context
+from nautobot.extras.choices import JobResultStatusChoices, ObjectChangeActionChoices
+from nautobot.extras.models import JobResult, Status, Webhook
+from nautobot.extras.webhooks import (
+    WEBHOOK_MAP_VERSION_CACHE_KEY,
+    WEBHOOK_STATS,
+    WEBHOOK_STATS_CACHE_KEY,
+    WebhookStatsCollector,
+    enqueue_webhooks,
+    generate_signature,
+    get_webhook_stats,
+    get_webhooks,
+    webhook_uses_data,
+)
+from nautobot.extras.webhooks_worker import (
+    CIRCUIT_CACHE_KEY,
+    get_circuit_delay,
+    get_retry_delay,
+    get_session,
+    process_webhooks,
+)
 from nautobot.utilities.testing import APITestCase
 
 
@@ -24,6 +46,16 @@ class WebhookTest(APITestCase):
 
         self.queue = django_rq.get_queue("webhooks")
         self.queue.empty()  # Begin each test with an empty queue
+        for job_id in self.queue.scheduled_job_registry.get_job_ids():
+            self.queue.scheduled_job_registry.remove(job_id, delete_job=True)
+        cache.delete_many(
+            [
+                WEBHOOK_STATS_CACHE_KEY.format(pk=pk, stat=stat)
+                for pk in Webhook.objects.values_list("pk", flat=True)
+                for stat in WEBHOOK_STATS
+            ]
+            + [CIRCUIT_CACHE_KEY.format(pk=pk) for pk in Webhook.objects.values_list("pk", flat=True)]
+        )
 
     @classmethod
     def setUpTestData(cls):
@@ -72,10 +104,12 @@ class WebhookTest(APITestCase):
         # Verify that a job was queued for the object creation webhook
         self.assertEqual(self.queue.count, 1)
         job = self.queue.jobs[0]
-        self.assertEqual(job.args[0], Webhook.objects.get(type_create=True))
-        self.assertEqual(job.args[1]["id"], response.data["id"])
-        self.assertEqual(job.args[2], "site")
-        self.assertEqual(job.args[3], ObjectChangeActionChoices.ACTION_CREATE)
+        ((webhook, events),) = job.args[0]
+        self.assertEqual(webhook, Webhook.objects.get(type_create=True))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["data"]["id"], response.data["id"])
+        self.assertEqual(events[0]["model_name"], "site")
+        self.assertEqual(events[0]["event"], ObjectChangeActionChoices.ACTION_CREATE)
 
     def test_enqueue_webhook_update(self):
         # Update an object via the REST API
@@ -91,10 +125,12 @@ class WebhookTest(APITestCase):
         # Verify that a job was queued for the object update webhook
         self.assertEqual(self.queue.count, 1)
         job = self.queue.jobs[0]
-        self.assertEqual(job.args[0], Webhook.objects.get(type_update=True))
-        self.assertEqual(job.args[1]["id"], str(site.pk))
-        self.assertEqual(job.args[2], "site")
-        self.assertEqual(job.args[3], ObjectChangeActionChoices.ACTION_UPDATE)
+        ((webhook, events),) = job.args[0]
+        self.assertEqual(webhook, Webhook.objects.get(type_update=True))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["data"]["id"], str(site.pk))
+        self.assertEqual(events[0]["model_name"], "site")
+        self.assertEqual(events[0]["event"], ObjectChangeActionChoices.ACTION_UPDATE)
 
     def test_enqueue_webhook_delete(self):
         # Delete an object via the REST API
@@ -107,21 +143,23 @@ class WebhookTest(APITestCase):
         # Verify that a job was queued for the object update webhook
         self.assertEqual(self.queue.count, 1)
         job = self.queue.jobs[0]
-        self.assertEqual(job.args[0], Webhook.objects.get(type_delete=True))
-        self.assertEqual(job.args[1]["id"], str(site.pk))
-        self.assertEqual(job.args[2], "site")
-        self.assertEqual(job.args[3], ObjectChangeActionChoices.ACTION_DELETE)
+        ((webhook, events),) = job.args[0]
+        self.assertEqual(webhook, Webhook.objects.get(type_delete=True))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["data"]["id"], str(site.pk))
+        self.assertEqual(events[0]["model_name"], "site")
+        self.assertEqual(events[0]["event"], ObjectChangeActionChoices.ACTION_DELETE)
 
     def test_webhooks_worker(self):
 
         request_id = uuid.uuid4()
+        webhook = Webhook.objects.get(type_create=True)
 
         def dummy_send(_, request, **kwargs):
             """
             A dummy implementation of Session.send() to be used for testing.
             Always returns a 200 HTTP response.
             """
-            webhook = Webhook.objects.get(type_create=True)
             signature = generate_signature(request.body, webhook.secret)
 
             # Validate the outgoing request headers
@@ -132,7 +170,7 @@ class WebhookTest(APITestCase):
             # Validate the outgoing request body
             body = json.loads(request.body)
             self.assertEqual(body["event"], "created")
-            self.assertEqual(body["timestamp"], job.args[4])
+            self.assertEqual(body["timestamp"], job.args[0][0][1][0]["timestamp"])
             self.assertEqual(body["model"], "site")
             self.assertEqual(body["username"], "testuser")
             self.assertEqual(body["request_id"], str(request_id))
@@ -154,4 +192,272 @@ class WebhookTest(APITestCase):
 
         # Patch the Session object with our dummy_send() method, then process the webhook for sending
         with patch.object(Session, "send", dummy_send):
-            process_webhook(*job.args)
+            result = process_webhooks(*job.args)
+        self.assertIn("1 delivered", result)
+
+    def test_get_webhooks_cached(self):
+        # Discard the effect of the Webhooks created within the test transaction, to exercise the shared map
+        cache.delete(WEBHOOK_MAP_VERSION_CACHE_KEY)
+        webhooks_module._local.dirty = False
+        get_webhooks(Site, ObjectChangeActionChoices.ACTION_CREATE)
+        webhook = Webhook.objects.get(type_create=True)
+
+        with self.assertNumQueries(0):
+            self.assertEqual(get_webhooks(Site, ObjectChangeActionChoices.ACTION_CREATE), [webhook])
+            self.assertEqual(get_webhooks(Region, ObjectChangeActionChoices.ACTION_CREATE), [])
+            enqueue_webhooks(Region(name="Region 1"), self.user, uuid.uuid4(), ObjectChangeActionChoices.ACTION_CREATE)
+        self.assertEqual(self.queue.count, 0)
+
+        # Assigning a Webhook to a model invalidates the map
+        webhook = Webhook.objects.create(
+            name="Region Create Webhook", type_create=True, payload_url="http://localhost/regions/"
+        )
+        webhook.content_types.set([ContentType.objects.get_for_model(Region)])
+        self.assertEqual(get_webhooks(Region, ObjectChangeActionChoices.ACTION_CREATE), [webhook])
+
+    def test_enqueue_webhooks_coalesced(self):
+        with web_request_context(self.user):
+            site = Site.objects.create(name="Site 1", slug="site-1")
+            site.name = "Site 2"
+            site.save()
+
+        # The update is coalesced into the creation, which is serialized as of the update
+        self.assertEqual(self.queue.count, 1)
+        ((webhook, events),) = self.queue.jobs[0].args[0]
+        self.assertEqual(webhook, Webhook.objects.get(type_create=True))
+        self.assertEqual(len(events), 1)
+        self.assertEqual(events[0]["data"]["name"], "Site 2")
+        self.assertEqual(events[0]["event"], ObjectChangeActionChoices.ACTION_CREATE)
+
+    def test_enqueue_webhooks_rolled_back(self):
+        with web_request_context(self.user):
+            Site.objects.create(name="Site 1", slug="site-1")
+            with self.assertRaises(RuntimeError):
+                with transaction.atomic():
+                    Site.objects.create(name="Site 2", slug="site-2")
+                    raise RuntimeError
+
+        self.assertEqual(self.queue.count, 1)
+        ((webhook, events),) = self.queue.jobs[0].args[0]
+        self.assertEqual([event["data"]["name"] for event in events], ["Site 1"])
+
+    def test_enqueue_webhooks_grouped(self):
+        with web_request_context(self.user):
+            Site.objects.create(name="Site 1", slug="site-1")
+            Site.objects.create(name="Site 2", slug="site-2")
+
+        # A single job delivers the changes made by the request to each webhook
+        self.assertEqual(self.queue.count, 1)
+        ((webhook, events),) = self.queue.jobs[0].args[0]
+        self.assertEqual(webhook, Webhook.objects.get(type_create=True))
+        self.assertEqual([event["data"]["name"] for event in events], ["Site 1", "Site 2"])
+
+    def test_webhook_uses_data(self):
+        webhook = Webhook(name="Test Webhook", payload_url="http://localhost/")
+        # Without a body template, the whole context is sent
+        self.assertTrue(webhook_uses_data(webhook))
+        webhook.body_template = "{{ model }} {{ event }}"
+        self.assertFalse(webhook_uses_data(webhook))
+        webhook.additional_headers = "X-Name: {{ data.name }}"
+        self.assertTrue(webhook_uses_data(webhook))
+        webhook.additional_headers = "X-Foo: Bar"
+        webhook.body_template = "{% for data in [1, 2] %}{{ data }}{% endfor %}"
+        self.assertFalse(webhook_uses_data(webhook))
+        webhook.body_template = "{{ data.name"
+        self.assertTrue(webhook_uses_data(webhook))
+        webhook.batch_size = 2
+        webhook.body_template = "{% for event in events %}{{ event.event }}{% endfor %}"
+        self.assertTrue(webhook_uses_data(webhook))
+        webhook.body_template = "{{ username }}"
+        self.assertFalse(webhook_uses_data(webhook))
+
+    def test_enqueue_webhooks_without_data(self):
+        webhook = Webhook.objects.get(type_create=True)
+        webhook.body_template = "{{ model }} {{ event }} {{ username }}"
+        webhook.save()
+
+        with patch("nautobot.extras.context_managers.serialize_for_webhooks") as serialize_for_webhooks:
+            with web_request_context(self.user):
+                Site.objects.create(name="Site 1", slug="site-1")
+
+        # The object is not serialized, as the webhook does not use its data
+        serialize_for_webhooks.assert_not_called()
+        self.assertEqual(self.queue.count, 1)
+        ((webhook, events),) = self.queue.jobs[0].args[0]
+        self.assertEqual(len(events), 1)
+        self.assertIsNone(events[0]["data"])
+        self.assertEqual(events[0]["event"], ObjectChangeActionChoices.ACTION_CREATE)
+
+    def test_webhooks_worker_batched(self):
+        webhook = Webhook.objects.get(type_create=True)
+        webhook.batch_size = 2
+        webhook.body_template = "{% for event in events %}{{ event.data.name }} {{ event.event }};{% endfor %}"
+        webhook.save()
+        requests_sent = []
+
+        def dummy_send(_, request, **kwargs):
+            requests_sent.append(request)
+            return HttpResponse()
+
+        with web_request_context(self.user):
+            for i in range(1, 4):
+                Site.objects.create(name=f"Site {i}", slug=f"site-{i}")
+        ((_, events),) = self.queue.jobs[0].args[0]
+
+        with patch.object(Session, "send", dummy_send):
+            process_webhooks([(webhook, events)])
+
+        self.assertEqual(
+            [request.body for request in requests_sent],
+            [b"Site 1 created;Site 2 created;", b"Site 3 created;"],
+        )
+        self.assertEqual(
+            requests_sent[0].headers["X-Hook-Signature"],
+            generate_signature(b"Site 1 created;Site 2 created;", webhook.secret),
+        )
+
+    def test_get_session(self):
+        self.assertIs(get_session("http://localhost/a/"), get_session("http://localhost/b/"))
+        self.assertIsNot(get_session("http://localhost/"), get_session("https://localhost/"))
+
+    def _enqueue_site_events(self, count):
+        with web_request_context(self.user):
+            for i in range(1, count + 1):
+                Site.objects.create(name=f"Site {i}", slug=f"site-{i}")
+        ((webhook, events),) = self.queue.jobs[0].args[0]
+        self.queue.empty()
+        return webhook, events
+
+    def test_webhooks_worker_retry(self):
+        webhook, events = self._enqueue_site_events(2)
+        requests_sent = []
+
+        def dummy_send(_, request, **kwargs):
+            requests_sent.append(request)
+            return HttpResponse(status=503)
+
+        with patch.object(Session, "send", dummy_send):
+            result = process_webhooks([(webhook, events)])
+
+        # Sending stops at the first failure, and all undelivered events are scheduled for a retry
+        self.assertIn("1 retried", result)
+        self.assertEqual(len(requests_sent), 1)
+        (job_id,) = self.queue.scheduled_job_registry.get_job_ids()
+        job = self.queue.fetch_job(job_id)
+        self.assertEqual(job.args[0], [(webhook, events)])
+        self.assertEqual(job.kwargs, {"attempt": 1})
+        stats = get_webhook_stats([webhook.pk])[webhook.pk]
+        self.assertEqual(stats["queued"], 2)
+        self.assertEqual(stats["retries"], 1)
+        self.assertEqual(stats["request_failures"], 1)
+        self.assertFalse(JobResult.objects.filter(name=webhook.name).exists())
+
+    @override_settings(WEBHOOK_MAX_RETRIES=2, WEBHOOK_RETRY_DELAY=10)
+    def test_webhooks_worker_dead_letter(self):
+        webhook, events = self._enqueue_site_events(2)
+        self.assertEqual([get_retry_delay(attempt) for attempt in (1, 2, 3)], [10, 20, 40])
+
+        with patch.object(Session, "send", lambda *args, **kwargs: HttpResponse(status=500)):
+            result = process_webhooks([(webhook, events)], attempt=2)
+
+        # Once its retries are exhausted, the delivery is recorded as a failed JobResult of the Webhook
+        self.assertIn("1 FAILED", result)
+        self.assertEqual(self.queue.scheduled_job_registry.count, 0)
+        job_result = JobResult.objects.get(obj_type=ContentType.objects.get_for_model(Webhook), name=webhook.name)
+        self.assertEqual(job_result.status, JobResultStatusChoices.STATUS_FAILED)
+        self.assertIsNotNone(job_result.completed)
+        self.assertEqual(len(job_result.data["events"]["log"]), 2)
+        self.assertEqual(
+            [event["data"]["name"] for event in json.loads(job_result.data["output"])], ["Site 1", "Site 2"]
+        )
+        stats = get_webhook_stats([webhook.pk])[webhook.pk]
+        self.assertEqual(stats["queued"], 0)
+        self.assertEqual(stats["dead_lettered"], 2)
+
+        self.add_permissions("extras.view_webhook", "extras.view_jobresult")
+        self.client.force_login(self.user)
+        response = self.client.get(webhook.get_absolute_url())
+        self.assertEqual(response.context["failed_delivery_count"], 1)
+
+    def test_webhooks_worker_failing_receiver(self):
+        healthy_webhook, events = self._enqueue_site_events(2)
+        failing_webhook = Webhook.objects.create(name="Failing Webhook", payload_url="http://failing.example.com/")
+        requests_sent = []
+
+        def dummy_send(_, request, **kwargs):
+            requests_sent.append(request.url)
+            if request.url == failing_webhook.payload_url:
+                raise Timeout()
+            return HttpResponse()
+
+        with patch.object(Session, "send", dummy_send):
+            result = process_webhooks([(failing_webhook, events), (healthy_webhook, events)])
+
+        # The healthy webhook is delivered to while the other times out
+        self.assertIn("1 delivered", result)
+        self.assertIn("1 retried", result)
+        self.assertEqual(requests_sent.count(healthy_webhook.payload_url), 2)
+        self.assertEqual(get_webhook_stats([healthy_webhook.pk])[healthy_webhook.pk]["delivered"], 2)
+        self.assertGreater(get_circuit_delay(failing_webhook), 0)
+        self.assertEqual(get_circuit_delay(healthy_webhook), 0)
+
+        # Until its retry is due, later jobs defer the failing webhook's events without waiting for it again
+        requests_sent.clear()
+        with patch.object(Session, "send", dummy_send):
+            result = process_webhooks([(failing_webhook, events), (healthy_webhook, events)])
+        self.assertIn("1 delivered, 1 deferred", result)
+        self.assertNotIn(failing_webhook.payload_url, requests_sent)
+        self.assertEqual(len(requests_sent), 2)
+        deferred_jobs = [self.queue.fetch_job(job_id) for job_id in self.queue.scheduled_job_registry.get_job_ids()]
+        self.assertIn(
+            ([(failing_webhook, events)], {"attempt": 0}), [(job.args[0], job.kwargs) for job in deferred_jobs]
+        )
+
+    def test_webhooks_worker_rate_limit(self):
+        webhook, events = self._enqueue_site_events(3)
+        webhook.rate_limit = 1
+        webhook.save()
+        requests_sent = []
+
+        def dummy_send(_, request, **kwargs):
+            requests_sent.append(request)
+            return HttpResponse()
+
+        with patch.object(Session, "send", dummy_send):
+            result = process_webhooks([(webhook, events)])
+
+        # Events beyond the rate limit are deferred to a later minute, without counting as a failed attempt
+        self.assertIn("1 deferred", result)
+        self.assertEqual(len(requests_sent), 1)
+        (job_id,) = self.queue.scheduled_job_registry.get_job_ids()
+        job = self.queue.fetch_job(job_id)
+        self.assertEqual(job.args[0], [(webhook, events[1:])])
+        self.assertEqual(job.kwargs, {"attempt": 0})
+        stats = get_webhook_stats([webhook.pk])[webhook.pk]
+        self.assertEqual(stats["queued"], 2)
+        self.assertEqual(stats["delivered"], 1)
+        self.assertEqual(stats["requests"], 1)
+
+    def test_webhooks_worker_disabled(self):
+        webhook, events = self._enqueue_site_events(1)
+        webhook.enabled = False
+        webhook.save()
+
+        with patch.object(Session, "send") as send:
+            result = process_webhooks([(webhook, events)])
+
+        # Events queued for a Webhook which has since been disabled are discarded
+        self.assertEqual(result, "No webhooks to process.")
+        send.assert_not_called()
+        self.assertEqual(get_webhook_stats([webhook.pk])[webhook.pk]["queued"], 0)
+
+    def test_webhook_stats_collector(self):
+        webhook, events = self._enqueue_site_events(2)
+
+        metrics = {metric.name: metric for metric in WebhookStatsCollector().collect()}
+        (sample,) = [
+            sample
+            for sample in metrics["nautobot_webhook_queued_events"].samples
+            if sample.labels["webhook"] == webhook.name
+        ]
+        self.assertEqual(sample.value, 2)
@@ -153,6 +153,7 @@ urlpatterns = [
     # Generic job results
     path("job-results/", views.JobResultListView.as_view(), name="jobresult_list"),
     path("job-results/<uuid:pk>/", views.JobResultView.as_view(), name="jobresult"),
+    path("job-results/<uuid:pk>/export/", views.JobResultExportView.as_view(), name="jobresult_export"),
     path(
         "job-results/delete/",
         views.JobResultBulkDeleteView.as_view(),
@@ -1,8 +1,11 @@
+import os
+
 from django import template
 from django.contrib import messages
 from django.contrib.contenttypes.models import ContentType
+from django.core.exceptions import FieldError
 from django.db.models import Q
-from django.http import Http404, HttpResponseForbidden
+from django.http import FileResponse, Http404, HttpResponseForbidden
 from django.shortcuts import get_object_or_404, redirect, render
 from django.urls import reverse
 from django.views.generic import View
@@ -35,6 +38,7 @@ from .models import (
     TaggedItem,
     Webhook,
 )
+from .exports import get_export_path
 from .jobs import get_job, get_jobs, run_job
 from .datasources import (
     get_datasource_contents,
@@ -652,9 +656,15 @@ class JobResultView(ContentTypePermissionRequiredMixin, View):
             model_class = job_result.obj_type.model_class()
             try:
                 associated_record = model_class.objects.get(name=job_result.name)
-            except model_class.DoesNotExist:
+            except (model_class.DoesNotExist, model_class.MultipleObjectsReturned, FieldError):
+                # Not all job results are named after a record, e.g. those of exports
                 pass
 
+        export_url = None
+        path = get_export_path(job_result)
+        if path is not None and can_download_export(request.user, job_result) and os.path.exists(path):
+            export_url = reverse("extras:jobresult_export", kwargs={"pk": job_result.pk})
+
         return render(
             request,
             "extras/jobresult.html",
@@ -662,10 +672,37 @@ class JobResultView(ContentTypePermissionRequiredMixin, View):
                 "associated_record": associated_record,
                 "job": job,
                 "result": job_result,
+                "export_url": export_url,
             },
         )
 
 
+def can_download_export(user, job_result):
+    """
+    Return True if the given user may download the file exported by a JobResult, which only its own user may do (as
+    other users may not have permission to view all of the objects exported).
+    """
+    return job_result.status == JobResultStatusChoices.STATUS_COMPLETED and (
+        user.is_superuser or job_result.user_id == user.pk
+    )
+
+
+class JobResultExportView(ContentTypePermissionRequiredMixin, View):
+    """
+    Download the file exported by a JobResult.
+    """
+
+    def get_required_permission(self):
+        return "extras.view_jobresult"
+
+    def get(self, request, pk):
+        job_result = get_object_or_404(JobResult.objects.all(), pk=pk)
+        path = get_export_path(job_result)
+        if path is None or not can_download_export(request.user, job_result) or not os.path.exists(path):
+            raise Http404
+        return FileResponse(open(path, "rb"), as_attachment=True, filename=os.path.basename(path))
+
+
 class ExportTemplateListView(generic.ObjectListView):
     queryset = ExportTemplate.objects.all()
     table = tables.ExportTemplateTable
@@ -730,7 +767,13 @@ class WebhookView(generic.ObjectView):
     queryset = Webhook.objects.all()
 
     def get_extra_context(self, request, instance):
-        return {"content_types": instance.content_types.order_by("app_label", "model")}
+        return {
+            "content_types": instance.content_types.order_by("app_label", "model"),
+            # Deliveries abandoned after exhausting their retries are recorded as failed JobResults of the Webhook
+            "failed_delivery_count": JobResult.objects.filter(
+                obj_type=ContentType.objects.get_for_model(Webhook), name=instance.name
+            ).count(),
+        }
 
 
 class WebhookEditView(generic.ObjectEditView):
@@ -1,16 +1,48 @@
 import hashlib
 import hmac
+import threading
+import uuid
 
-from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.db import connection, transaction
 from django.utils import timezone
 from django_rq import get_queue
+from jinja2 import TemplateSyntaxError
+from prometheus_client.core import CounterMetricFamily, GaugeMetricFamily, SummaryMetricFamily
 
 from nautobot.utilities.api import get_serializer_for_model
+from nautobot.utilities.utils import get_jinja2_template_variables
 from .choices import *
 from .models import Webhook
 from .registry import registry
 
 
+# Replaced whenever a Webhook is changed, to identify the current map of enabled Webhooks kept by each process
+WEBHOOK_MAP_VERSION_CACHE_KEY = "nautobot.extras.webhooks.version"
+
+# Delivery statistics of each Webhook, shared by the RQ workers which record them and the web processes which export
+# them as Prometheus metrics
+WEBHOOK_STATS_CACHE_KEY = "nautobot.extras.webhooks.stats.{pk}.{stat}"
+WEBHOOK_STATS = (
+    "queued",  # Events awaiting delivery, including those scheduled for retry
+    "delivered",  # Events delivered
+    "dead_lettered",  # Events abandoned after exhausting their retries
+    "retries",  # Deliveries scheduled for retry after a failure
+    "requests",  # Requests sent, whether or not they succeeded
+    "request_failures",  # Requests which failed
+    "latency_ms",  # Total time taken by all requests sent, in milliseconds
+)
+
+ACTION_FLAGS = {
+    ObjectChangeActionChoices.ACTION_CREATE: "type_create",
+    ObjectChangeActionChoices.ACTION_UPDATE: "type_update",
+    ObjectChangeActionChoices.ACTION_DELETE: "type_delete",
+}
+
+_local = threading.local()
+_webhook_map = (None, None)
+
+
 def generate_signature(request_body, secret):
     """
     Return a cryptographic signature that can be used to verify the authenticity of webhook data.
@@ -19,44 +51,203 @@ def generate_signature(request_body, secret):
     return hmac_prep.hexdigest()
 
 
-def enqueue_webhooks(instance, user, request_id, action):
+def _build_webhook_map():
     """
-    Find Webhook(s) assigned to this instance + action and enqueue them
-    to be processed
+    Return a dict mapping each `(app_label, model_name, action)` to the list of enabled Webhooks which apply to it.
+    """
+    webhook_map = {}
+    for webhook in Webhook.objects.filter(enabled=True).prefetch_related("content_types"):
+        for content_type in webhook.content_types.all():
+            for action, action_flag in ACTION_FLAGS.items():
+                if getattr(webhook, action_flag):
+                    webhook_map.setdefault((content_type.app_label, content_type.model, action), []).append(webhook)
+
+    return webhook_map
+
+
+def _get_webhook_map():
+    global _webhook_map
+
+    if getattr(_local, "dirty", False):
+        if connection.in_atomic_block:
+            # The shared map cannot reflect changes to Webhooks within the current transaction
+            return _build_webhook_map()
+        # The transaction has since been committed (and the map invalidated) or rolled back
+        _local.dirty = False
+
+    cache.add(WEBHOOK_MAP_VERSION_CACHE_KEY, uuid.uuid4().hex, timeout=None)
+    version = cache.get(WEBHOOK_MAP_VERSION_CACHE_KEY)
+    if _webhook_map[0] != version:
+        _webhook_map = (version, _build_webhook_map())
+
+    return _webhook_map[1]
+
+
+def invalidate_webhook_map():
+    """
+    Discard the map of enabled Webhooks, in all processes. If called within a transaction, the map is invalidated once
+    the transaction is committed, and is not used until then by the current thread.
     """
-    # Determine whether this type of object supports webhooks
-    app_label = instance._meta.app_label
-    model_name = instance._meta.model_name
+    if connection.in_atomic_block:
+        _local.dirty = True
+        transaction.on_commit(lambda: cache.delete(WEBHOOK_MAP_VERSION_CACHE_KEY))
+    else:
+        cache.delete(WEBHOOK_MAP_VERSION_CACHE_KEY)
+
+
+def get_webhooks(model, action):
+    """
+    Return the enabled Webhooks which apply to the given action upon an instance of `model`.
+    """
+    app_label = model._meta.app_label
+    model_name = model._meta.model_name
     if model_name not in registry["model_features"]["webhooks"].get(app_label, []):
+        return []
+
+    return _get_webhook_map().get((app_label, model_name, action), [])
+
+
+def webhook_uses_data(webhook):
+    """
+    Return True unless the requests sent by a Webhook cannot include the serialized object: that is, unless it has a
+    body template, and neither its body template nor its additional headers refer to `data` (or to `events`, for a
+    Webhook which sends events in batches, as each event includes its data).
+    """
+    if not webhook.body_template:
+        # The whole context is sent as the body
+        return True
+
+    names = {"data"} if webhook.batch_size == 1 else {"data", "events"}
+    for template_code in (webhook.body_template, webhook.additional_headers):
+        if not template_code:
+            continue
+        try:
+            if names & get_jinja2_template_variables(template_code):
+                return True
+        except TemplateSyntaxError:
+            return True
+
+    return False
+
+
+def serialize_for_webhooks(instance):
+    """
+    Return the representation of an object which is sent to webhooks: that of the model's REST API serializer.
+    """
+    serializer_class = get_serializer_for_model(instance.__class__)
+    return serializer_class(instance, context={"request": None}).data
+
+
+def enqueue_webhooks(instance, user, request_id, action, data=None):
+    """
+    Find Webhook(s) assigned to this instance + action and enqueue them
+    to be processed. If the serialized `data` of the instance is not given, it is serialized only if any Webhooks apply
+    which use it (see `webhook_uses_data()`).
+    """
+    webhooks = get_webhooks(instance._meta.model, action)
+    if not webhooks:
         return
 
-    # Retrieve any applicable Webhooks
-    content_type = ContentType.objects.get_for_model(instance)
-    action_flag = {
-        ObjectChangeActionChoices.ACTION_CREATE: "type_create",
-        ObjectChangeActionChoices.ACTION_UPDATE: "type_update",
-        ObjectChangeActionChoices.ACTION_DELETE: "type_delete",
-    }[action]
-    webhooks = Webhook.objects.filter(content_types=content_type, enabled=True, **{action_flag: True})
-
-    if webhooks.exists():
-        # Get the Model's API serializer class and serialize the object
-        serializer_class = get_serializer_for_model(instance.__class__)
-        serializer_context = {
-            "request": None,
+    if data is None and any(webhook_uses_data(webhook) for webhook in webhooks):
+        data = serialize_for_webhooks(instance)
+    enqueue_webhook_batch([(instance._meta.model, action, data)], user, request_id)
+
+
+def enqueue_webhook_batch(changes, user, request_id):
+    """
+    Enqueue a single job to process the Webhooks which apply to each of the given changes, as a list of `(model,
+    action, data)` tuples, where `data` is the serialized instance (or None, if no Webhook uses it). The changes are
+    grouped by Webhook, in order.
+    """
+    timestamp = str(timezone.now())
+    deliveries = {}
+    for model, action, data in changes:
+        event = {
+            "data": data,
+            "model_name": model._meta.model_name,
+            "event": action,
+            "timestamp": timestamp,
+            "username": user.username,
+            "request_id": request_id,
         }
-        serializer = serializer_class(instance, context=serializer_context)
+        for webhook in get_webhooks(model, action):
+            deliveries.setdefault(webhook.pk, (webhook, []))[1].append(event)
 
-        # Enqueue the webhooks
+    if deliveries:
+        for webhook, events in deliveries.values():
+            record_webhook_stats(webhook.pk, queued=len(events))
         webhook_queue = get_queue("webhooks")
-        for webhook in webhooks:
-            webhook_queue.enqueue(
-                "nautobot.extras.webhooks_worker.process_webhook",
-                webhook,
-                serializer.data,
-                instance._meta.model_name,
-                action,
-                str(timezone.now()),
-                user.username,
-                request_id,
-            )
+        webhook_queue.enqueue("nautobot.extras.webhooks_worker.process_webhooks", list(deliveries.values()))
+
+
+def record_webhook_stats(webhook_pk, **amounts):
+    """
+    Add the given amount to each of the named delivery statistics of a Webhook.
+    """
+    for stat, amount in amounts.items():
+        key = WEBHOOK_STATS_CACHE_KEY.format(pk=webhook_pk, stat=stat)
+        cache.add(key, 0, timeout=None)
+        cache.incr(key, amount)
+
+
+def get_webhook_stats(webhook_pks):
+    """
+    Return a dict mapping each of the given Webhook PKs to a dict of its delivery statistics.
+    """
+    keys = {
+        WEBHOOK_STATS_CACHE_KEY.format(pk=pk, stat=stat): (pk, stat) for pk in webhook_pks for stat in WEBHOOK_STATS
+    }
+    values = cache.get_many(keys)
+    stats = {pk: dict.fromkeys(WEBHOOK_STATS, 0) for pk in webhook_pks}
+    for key, (pk, stat) in keys.items():
+        stats[pk][stat] = values.get(key, 0)
+    return stats
+
+
+class WebhookStatsCollector:
+    """
+    Export the delivery statistics of each Webhook as Prometheus metrics, labeled by the name of the Webhook.
+    """
+
+    def describe(self):
+        # Describing the metrics without collecting them avoids querying the database when the collector is registered
+        return self._get_metrics().values()
+
+    def collect(self):
+        webhooks = dict(Webhook.objects.values_list("pk", "name"))
+        metrics = self._get_metrics()
+        for pk, stats in get_webhook_stats(webhooks).items():
+            labels = [webhooks[pk]]
+            metrics["queued"].add_metric(labels, max(stats["queued"], 0))
+            metrics["delivered"].add_metric(labels, stats["delivered"])
+            metrics["dead_lettered"].add_metric(labels, stats["dead_lettered"])
+            metrics["retries"].add_metric(labels, stats["retries"])
+            metrics["request_failures"].add_metric(labels, stats["request_failures"])
+            metrics["latency"].add_metric(labels, stats["requests"], stats["latency_ms"] / 1000)
+        return metrics.values()
+
+    def _get_metrics(self):
+        return {
+            "queued": GaugeMetricFamily(
+                "nautobot_webhook_queued_events", "Events awaiting delivery to each webhook", labels=["webhook"]
+            ),
+            "delivered": CounterMetricFamily(
+                "nautobot_webhook_delivered_events", "Events delivered to each webhook", labels=["webhook"]
+            ),
+            "dead_lettered": CounterMetricFamily(
+                "nautobot_webhook_dead_lettered_events",
+                "Events abandoned after exhausting their retries for each webhook",
+                labels=["webhook"],
+            ),
+            "retries": CounterMetricFamily(
+                "nautobot_webhook_retries", "Deliveries retried after a failure for each webhook", labels=["webhook"]
+            ),
+            "request_failures": CounterMetricFamily(
+                "nautobot_webhook_request_failures", "Requests which failed for each webhook", labels=["webhook"]
+            ),
+            "latency": SummaryMetricFamily(
+                "nautobot_webhook_request_duration_seconds",
+                "Time taken by requests to each webhook",
+                labels=["webhook"],
+            ),
+        }
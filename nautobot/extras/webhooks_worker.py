@@ -1,22 +1,71 @@
+import json
 import logging
+import math
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from datetime import timedelta
+from urllib.parse import urlsplit
 
 import requests
 from django.conf import settings
-from django_rq import job
+from django.contrib.contenttypes.models import ContentType
+from django.core.cache import cache
+from django.core.serializers.json import DjangoJSONEncoder
+from django_rq import get_queue, job
 from jinja2.exceptions import TemplateError
+from requests.adapters import HTTPAdapter
 
-from .choices import ObjectChangeActionChoices
-from .webhooks import generate_signature
+from .choices import JobResultStatusChoices, LogLevelChoices, ObjectChangeActionChoices
+from .models import JobResult, Webhook
+from .webhooks import generate_signature, record_webhook_stats
 
 logger = logging.getLogger("nautobot.webhooks_worker")
 
+# Retries of a failed delivery are delayed by WEBHOOK_RETRY_DELAY seconds, doubled for each previous retry up to this
+MAX_RETRY_DELAY = 60 * 60
 
-@job("webhooks")
-def process_webhook(webhook, data, model_name, event, timestamp, username, request_id):
+# The time in seconds for which a job may send events to any one webhook before deferring the rest to a new job, so
+# that a slow receiver cannot hold a worker indefinitely at the expense of the deliveries queued behind it
+MAX_DELIVERY_TIME = 60
+
+# Counts the requests sent to a webhook within each minute, for enforcing its rate limit
+RATE_LIMIT_CACHE_KEY = "nautobot.extras.webhooks.rate.{pk}.{minute}"
+
+# The time until which requests to a webhook whose last request failed are deferred without being sent, so that jobs
+# delivering to other webhooks are not held up by waiting for a receiver which is known to be failing
+CIRCUIT_CACHE_KEY = "nautobot.extras.webhooks.circuit.{pk}"
+
+# Sessions are kept for reuse by all webhooks sent to the same host, so that their connections are kept alive
+_sessions = {}
+_sessions_lock = threading.Lock()
+
+
+def get_session(url):
     """
-    Make a POST request to the defined Webhook
+    Return the shared Session for requests to the host of the given URL, whose connection pool holds as many
+    connections as webhooks may be sent concurrently.
     """
-    context = {
+    parts = urlsplit(url)
+    key = (parts.scheme, parts.netloc)
+    with _sessions_lock:
+        session = _sessions.get(key)
+        if session is None:
+            session = requests.Session()
+            adapter = HTTPAdapter(pool_connections=1, pool_maxsize=settings.WEBHOOK_CONCURRENCY)
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _sessions[key] = session
+
+    return session
+
+
+def get_webhook_context(data, model_name, event, timestamp, username, request_id):
+    """
+    Return the context with which a webhook's headers and body are rendered for a single change.
+    """
+    return {
         "event": dict(ObjectChangeActionChoices)[event].lower(),
         "timestamp": timestamp,
         "model": model_name,
@@ -25,6 +74,12 @@ def process_webhook(webhook, data, model_name, event, timestamp, username, reque
         "data": data,
     }
 
+
+def send_webhook(webhook, context):
+    """
+    Make the request defined by the Webhook, with its headers and body rendered with the given context. Raises a
+    RequestException if the request fails or its response status is not 2xx.
+    """
     # Build the headers for the HTTP request
     headers = {
         "Content-Type": webhook.http_content_type,
@@ -49,9 +104,11 @@ def process_webhook(webhook, data, model_name, event, timestamp, username, reque
         "headers": headers,
         "data": body.encode("utf8"),
     }
-    logger.info(
-        "Sending {} request to {} ({} {})".format(params["method"], params["url"], context["model"], context["event"])
-    )
+    if "events" in context:
+        description = "{} changes".format(len(context["events"]))
+    else:
+        description = "{} {}".format(context["model"], context["event"])
+    logger.info("Sending {} request to {} ({})".format(params["method"], params["url"], description))
     logger.debug(params)
     try:
         prepared_request = requests.Request(**params).prepare()
@@ -64,11 +121,11 @@ def process_webhook(webhook, data, model_name, event, timestamp, username, reque
         prepared_request.headers["X-Hook-Signature"] = generate_signature(prepared_request.body, webhook.secret)
 
     # Send the request
-    with requests.Session() as session:
-        session.verify = webhook.ssl_verification
-        if webhook.ca_file_path:
-            session.verify = webhook.ca_file_path
-        response = session.send(prepared_request, proxies=settings.HTTP_PROXIES)
+    session = get_session(webhook.payload_url)
+    verify = webhook.ca_file_path if webhook.ca_file_path else webhook.ssl_verification
+    response = session.send(
+        prepared_request, verify=verify, proxies=settings.HTTP_PROXIES, timeout=settings.WEBHOOK_TIMEOUT
+    )
 
     if 200 <= response.status_code <= 299:
         logger.info("Request succeeded; response status {}".format(response.status_code))
@@ -80,3 +137,183 @@ def process_webhook(webhook, data, model_name, event, timestamp, username, reque
                 response.status_code, response.content
             )
         )
+
+
+@job("webhooks")
+def process_webhook(webhook, data, model_name, event, timestamp, username, request_id):
+    """
+    Make a POST request to the defined Webhook
+    """
+    context = get_webhook_context(data, model_name, event, timestamp, username, request_id)
+    return send_webhook(webhook, context)
+
+
+def get_retry_delay(attempt):
+    """
+    Return the delay in seconds before the given retry (counting from 1) of a failed delivery.
+    """
+    return min(settings.WEBHOOK_RETRY_DELAY * 2 ** (attempt - 1), MAX_RETRY_DELAY)
+
+
+def acquire_rate_limit(webhook):
+    """
+    Count a request to the given Webhook against its rate limit. Returns 0 if the request may be sent now, or else the
+    number of seconds until the next minute, when it may be.
+    """
+    if not webhook.rate_limit:
+        return 0
+
+    now = time.time()
+    key = RATE_LIMIT_CACHE_KEY.format(pk=webhook.pk, minute=int(now // 60))
+    cache.add(key, 0, timeout=120)
+    if cache.incr(key) <= webhook.rate_limit:
+        return 0
+    return 60 - now % 60
+
+
+def open_circuit(webhook, delay):
+    """
+    Defer the requests to the given Webhook by any job for the next `delay` seconds, after its request failed.
+    """
+    cache.set(CIRCUIT_CACHE_KEY.format(pk=webhook.pk), time.time() + delay, timeout=math.ceil(delay))
+
+
+def get_circuit_delay(webhook):
+    """
+    Return the number of seconds for which requests to the given Webhook are deferred after a failed request, or 0.
+    """
+    deferred_until = cache.get(CIRCUIT_CACHE_KEY.format(pk=webhook.pk))
+    if deferred_until is None:
+        return 0
+    return max(0, deferred_until - time.time())
+
+
+def send_webhook_events(webhook, events):
+    """
+    Send the given events to a Webhook in order, `webhook.batch_size` at a time. Each event is a dict of the
+    arguments to `get_webhook_context()`.
+
+    Sending stops early if a request fails, if the Webhook's rate limit is reached, or once MAX_DELIVERY_TIME has
+    elapsed. No request is sent while requests to the Webhook are deferred after a recent failure. Returns a
+    `(remaining, error, delay)` tuple of the events not delivered, the exception raised by the failed request (if any),
+    and otherwise the number of seconds after which the remaining events may be sent.
+    """
+    delay = get_circuit_delay(webhook)
+    if delay:
+        return events, None, delay
+
+    start = time.monotonic()
+    for i in range(0, len(events), webhook.batch_size):
+        remaining = events[i:]
+        if time.monotonic() - start >= MAX_DELIVERY_TIME:
+            return remaining, None, 0
+        delay = acquire_rate_limit(webhook)
+        if delay:
+            return remaining, None, delay
+
+        batch = events[i : i + webhook.batch_size]
+        contexts = [get_webhook_context(**event) for event in batch]
+        request_start = time.monotonic()
+        try:
+            send_webhook(webhook, contexts[0] if webhook.batch_size == 1 else {"events": contexts})
+        except Exception as e:
+            latency_ms = int((time.monotonic() - request_start) * 1000)
+            record_webhook_stats(webhook.pk, requests=1, request_failures=1, latency_ms=latency_ms)
+            return remaining, e, None
+        latency_ms = int((time.monotonic() - request_start) * 1000)
+        record_webhook_stats(webhook.pk, requests=1, latency_ms=latency_ms, delivered=len(batch), queued=-len(batch))
+
+    return [], None, None
+
+
+def schedule_delivery(webhook, events, attempt, delay):
+    """
+    Enqueue a job to send the given events to a Webhook after `delay` seconds.
+    """
+    webhook_queue = get_queue("webhooks")
+    args = ("nautobot.extras.webhooks_worker.process_webhooks", [(webhook, events)])
+    if delay:
+        webhook_queue.enqueue_in(timedelta(seconds=delay), *args, attempt=attempt)
+    else:
+        webhook_queue.enqueue(*args, attempt=attempt)
+
+
+def dead_letter(webhook, events, error, attempt):
+    """
+    Record the events which could not be delivered to a Webhook as a failed JobResult of the Webhook, listed under
+    Job Results. The log of the JobResult describes the failure and each undelivered event, and its output holds the
+    events themselves, so that they may be replayed.
+    """
+    job_result = JobResult(
+        name=webhook.name,
+        obj_type=ContentType.objects.get_for_model(Webhook),
+        job_id=uuid.uuid4(),
+    )
+    job_result.log(
+        "Delivery FAILED after {} attempts: {}".format(attempt + 1, error),
+        obj=webhook,
+        level_choice=LogLevelChoices.LOG_FAILURE,
+        logger=logger,
+    )
+    for event in events:
+        job_result.log(
+            "Undelivered {} {} of request {} at {}".format(
+                event["model_name"], event["event"], event["request_id"], event["timestamp"]
+            ),
+            level_choice=LogLevelChoices.LOG_WARNING,
+            grouping="events",
+        )
+    job_result.data["output"] = json.dumps(events, cls=DjangoJSONEncoder)
+    job_result.set_status(JobResultStatusChoices.STATUS_FAILED)
+    job_result.save()
+    record_webhook_stats(webhook.pk, dead_lettered=len(events), queued=-len(events))
+    return job_result
+
+
+@job("webhooks")
+def process_webhooks(deliveries, attempt=0):
+    """
+    Send the events queued for each of several Webhooks, as a list of `(webhook, events)` tuples. The events for each
+    Webhook are sent in order, while different Webhooks are sent to concurrently, up to `WEBHOOK_CONCURRENCY` at once.
+
+    Events which could not be sent are rescheduled in a new job: after a delay growing exponentially with each failed
+    `attempt`, up to `WEBHOOK_MAX_RETRIES` retries, or once the Webhook's rate limit allows. Events which have exhausted
+    their retries, or which the Webhook could not be rendered for, are recorded by `dead_letter()`.
+
+    When a request fails, later jobs defer the events for the same Webhook without sending them until its retry is
+    due, so that a failing receiver holds up only the first job to find it failing rather than every job after it.
+    """
+    # Events are sent as each Webhook is now configured, and dropped if it has since been deleted or disabled
+    webhooks = Webhook.objects.filter(enabled=True).in_bulk([webhook.pk for webhook, _ in deliveries])
+    for webhook, events in deliveries:
+        if webhook.pk not in webhooks:
+            record_webhook_stats(webhook.pk, queued=-len(events))
+    deliveries = [(webhooks[webhook.pk], events) for webhook, events in deliveries if webhook.pk in webhooks]
+    if not deliveries:
+        return "No webhooks to process."
+
+    with ThreadPoolExecutor(max_workers=min(settings.WEBHOOK_CONCURRENCY, len(deliveries))) as executor:
+        futures = [(webhook, executor.submit(send_webhook_events, webhook, events)) for webhook, events in deliveries]
+
+    deferred = retried = failed = 0
+    for webhook, future in futures:
+        remaining, error, delay = future.result()
+        if not remaining:
+            continue
+        if error is None:
+            schedule_delivery(webhook, remaining, attempt, delay)
+            deferred += 1
+        elif isinstance(error, requests.exceptions.RequestException) and attempt < settings.WEBHOOK_MAX_RETRIES:
+            delay = get_retry_delay(attempt + 1)
+            logger.warning("Delivery to webhook {} failed; retrying in {} seconds: {}".format(webhook, delay, error))
+            open_circuit(webhook, delay)
+            schedule_delivery(webhook, remaining, attempt + 1, delay)
+            record_webhook_stats(webhook.pk, retries=1)
+            retried += 1
+        else:
+            dead_letter(webhook, remaining, error, attempt)
+            failed += 1
+
+    return "{} webhooks processed: {} delivered, {} deferred, {} retried, {} FAILED.".format(
+        len(deliveries), len(deliveries) - deferred - retried - failed, deferred, retried, failed
+    )
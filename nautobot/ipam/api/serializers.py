@@ -427,6 +427,15 @@ class AvailableIPSerializer(serializers.Serializer):
         )
 
 
+class AvailableIPAllocationSerializer(serializers.Serializer):
+    """
+    A request to allocate the next available IP address within a parent prefix. All other fields are passed through to
+    the IPAddress being created.
+    """
+
+    prefix = serializers.UUIDField()
+
+
 #
 # Services
 #
@@ -1,5 +1,10 @@
+import itertools
+from collections import Counter
+
+import netaddr
 from django.conf import settings
-from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Q
 from django.shortcuts import get_object_or_404
 from drf_yasg.utils import swagger_auto_schema
 from rest_framework import status
@@ -122,6 +127,36 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
             return serializers.PrefixLengthSerializer
         return super().get_serializer_class()
 
+    @staticmethod
+    def _iter_unallocated_prefixes(prefix, allocated_prefixes):
+        """
+        Yield the available prefixes within `prefix`, in order, excluding the space covered by `allocated_prefixes`.
+        """
+        for available_prefix in prefix.iter_available_prefixes():
+            if allocated_prefixes:
+                yield from (netaddr.IPSet(available_prefix) - allocated_prefixes).iter_cidrs()
+            else:
+                yield available_prefix
+
+    @staticmethod
+    def _lock_prefixes(prefixes):
+        """
+        Lock the given prefixes, and every prefix which contains or duplicates them within the same VRF or the global
+        table, until the end of the current transaction.
+
+        Prefixes from which the same addresses may be allocated overlap, so one contains or equals the other, and both
+        lock the larger of the two (or both, if they are duplicates). Allocations from overlapping prefixes are thereby
+        serialized, while allocations from unrelated prefixes proceed concurrently, and each allocation locks only the
+        handful of prefixes above its own. Rows are always locked in primary key order to avoid deadlocks between
+        overlapping requests.
+        """
+        queryset = Prefix.objects.none()
+        for prefix in prefixes:
+            queryset |= Prefix.objects.net_contains_or_equals(prefix.prefix).filter(
+                Q(vrf=prefix.vrf) | Q(vrf__isnull=True)
+            )
+        list(queryset.nocache().select_for_update().order_by("pk").values_list("pk", flat=True))
+
     @swagger_auto_schema(method="get", responses={200: serializers.AvailablePrefixSerializer(many=True)})
     @swagger_auto_schema(method="post", responses={201: serializers.PrefixSerializer(many=False)})
     @action(detail=True, url_path="available-prefixes", methods=["get", "post"])
@@ -129,14 +164,14 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
         """
         A convenience method for returning available child prefixes within a parent.
 
-        The advisory lock decorator uses a PostgreSQL advisory lock to prevent this API from being
-        invoked in parallel, which results in a race condition where multiple insertions can occur.
+        The prefix and those containing it are locked while allocating, to prevent the race condition where
+        concurrent requests against overlapping prefixes result in duplicate insertions.
         """
         prefix = get_object_or_404(self.queryset, pk=pk)
         if request.method == "POST":
 
-            with cache.lock("available-prefixes", blocking_timeout=5):
-                available_prefixes = prefix.get_available_prefixes()
+            with transaction.atomic():
+                self._lock_prefixes([prefix])
 
                 # Validate Requested Prefixes' length
                 serializer = serializers.PrefixLengthSerializer(
@@ -150,11 +185,13 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                 serializer.is_valid(raise_exception=True)
 
                 requested_prefixes = serializer.validated_data
+                allocated_prefixes = netaddr.IPSet()
                 # Allocate prefixes to the requested objects based on availability within the parent
                 for i, requested_prefix in enumerate(requested_prefixes):
 
-                    # Find the first available prefix equal to or larger than the requested size
-                    for available_prefix in available_prefixes.iter_cidrs():
+                    # Find the first available prefix equal to or larger than the requested size, skipping over any
+                    # space already allocated to a previous request
+                    for available_prefix in self._iter_unallocated_prefixes(prefix, allocated_prefixes):
                         if requested_prefix["prefix_length"] >= available_prefix.prefixlen:
                             allocated_prefix = "{}/{}".format(
                                 available_prefix.network, requested_prefix["prefix_length"]
@@ -168,8 +205,8 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                             status=status.HTTP_204_NO_CONTENT,
                         )
 
-                    # Remove the allocated prefix from the list of available prefixes
-                    available_prefixes.remove(allocated_prefix)
+                    # Exclude the allocated prefix from the available prefixes
+                    allocated_prefixes.add(allocated_prefix)
 
                 # Initialize the serializer with a list or a single object depending on what was requested
                 context = {"request": request}
@@ -184,9 +221,8 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                 return Response(serializer.data, status=status.HTTP_201_CREATED)
 
         else:
-            available_prefixes = prefix.get_available_prefixes()
             serializer = serializers.AvailablePrefixSerializer(
-                available_prefixes.iter_cidrs(),
+                list(prefix.iter_available_prefixes()),
                 many=True,
                 context={
                     "request": request,
@@ -214,22 +250,23 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
         returned will be equivalent to PAGINATE_COUNT. An arbitrary limit (up to MAX_PAGE_SIZE, if set) may be passed,
         however results will not be paginated.
 
-        The advisory lock decorator uses a PostgreSQL advisory lock to prevent this API from being
-        invoked in parallel, which results in a race condition where multiple insertions can occur.
+        The prefix and those containing it are locked while allocating, to prevent the race condition where
+        concurrent requests against overlapping prefixes result in duplicate insertions.
         """
         prefix = get_object_or_404(Prefix.objects.restrict(request.user), pk=pk)
 
         # Create the next available IP within the prefix
         if request.method == "POST":
 
-            with cache.lock("available-ips", blocking_timeout=5):
+            with transaction.atomic():
+                self._lock_prefixes([prefix])
 
                 # Normalize to a list of objects
                 requested_ips = request.data if isinstance(request.data, list) else [request.data]
 
                 # Determine if the requested number of IPs is available
-                available_ips = prefix.get_available_ips()
-                if available_ips.size < len(requested_ips):
+                available_ips = list(itertools.islice(prefix.iter_available_ips(), len(requested_ips)))
+                if len(available_ips) < len(requested_ips):
                     return Response(
                         {
                             "detail": "An insufficient number of IP addresses are available within the prefix {} ({} "
@@ -267,11 +304,7 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
                 limit = min(limit, settings.MAX_PAGE_SIZE)
 
             # Calculate available IPs within the prefix
-            ip_list = []
-            for index, ip in enumerate(prefix.get_available_ips(), start=1):
-                ip_list.append(ip)
-                if index == limit:
-                    break
+            ip_list = list(itertools.islice(prefix.iter_available_ips(), limit))
             serializer = serializers.AvailableIPSerializer(
                 ip_list,
                 many=True,
@@ -284,6 +317,72 @@ class PrefixViewSet(StatusViewSetMixin, CustomFieldModelViewSet):
 
             return Response(serializer.data)
 
+    @swagger_auto_schema(
+        method="post",
+        responses={201: serializers.IPAddressSerializer(many=True)},
+        request_body=serializers.AvailableIPAllocationSerializer(many=True),
+    )
+    @action(
+        detail=False,
+        url_path="available-ips",
+        url_name="bulk-available-ips",
+        methods=["post"],
+        queryset=IPAddress.objects.all(),
+    )
+    def bulk_available_ips(self, request):
+        """
+        Allocate available IP addresses within any number of parent prefixes in a single transaction. Each requested IP
+        address names the `prefix` from which it is to be allocated. Either all requested IP addresses are created, or
+        none are.
+        """
+        # Normalize to a list of objects
+        requested_ips = request.data if isinstance(request.data, list) else [request.data]
+
+        serializer = serializers.AvailableIPAllocationSerializer(data=requested_ips, many=True)
+        serializer.is_valid(raise_exception=True)
+        prefix_pks = [requested_ip["prefix"] for requested_ip in serializer.validated_data]
+
+        prefixes = Prefix.objects.restrict(request.user).select_related("vrf").in_bulk(set(prefix_pks))
+        missing_pks = set(prefix_pks) - set(prefixes)
+        if missing_pks:
+            return Response(
+                {"detail": "Prefix(es) not found: {}".format(", ".join(sorted(str(pk) for pk in missing_pks)))},
+                status=status.HTTP_400_BAD_REQUEST,
+            )
+
+        with transaction.atomic():
+            self._lock_prefixes(list(prefixes.values()))
+
+            # Determine if the requested number of IPs is available within each prefix
+            available_ips = {}
+            for prefix_pk, count in Counter(prefix_pks).items():
+                prefix = prefixes[prefix_pk]
+                available_ips[prefix_pk] = list(itertools.islice(prefix.iter_available_ips(), count))
+                if len(available_ips[prefix_pk]) < count:
+                    return Response(
+                        {
+                            "detail": "An insufficient number of IP addresses are available within the prefix {} ({} "
+                            "requested, {} available)".format(prefix, count, len(available_ips[prefix_pk]))
+                        },
+                        status=status.HTTP_204_NO_CONTENT,
+                    )
+
+            # Assign addresses from each list of available IPs and copy VRF assignment from the parent prefix
+            available_ips = {prefix_pk: iter(ips) for prefix_pk, ips in available_ips.items()}
+            ip_data = []
+            for requested_ip, prefix_pk in zip(requested_ips, prefix_pks):
+                prefix = prefixes[prefix_pk]
+                ip = {key: value for key, value in requested_ip.items() if key != "prefix"}
+                ip["address"] = "{}/{}".format(next(available_ips[prefix_pk]), prefix.prefix.prefixlen)
+                ip["vrf"] = prefix.vrf.pk if prefix.vrf else None
+                ip_data.append(ip)
+
+            # Create the new IP address(es)
+            serializer = serializers.IPAddressSerializer(data=ip_data, many=True, context={"request": request})
+            serializer.is_valid(raise_exception=True)
+            serializer.save()
+            return Response(serializer.data, status=status.HTTP_201_CREATED)
+
 
 #
 # IP addresses
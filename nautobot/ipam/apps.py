@@ -4,3 +4,7 @@ from django.apps import AppConfig
 class IPAMConfig(AppConfig):
     name = "nautobot.ipam"
     verbose_name = "IPAM"
+
+    def ready(self):
+
+        import nautobot.ipam.signals  # noqa: F401
@@ -0,0 +1,74 @@
+from collections import defaultdict
+
+import netaddr
+
+
+#
+# Prefix hierarchy
+#
+
+
+def compute_prefix_hierarchy(prefixes):
+    """
+    Compute the hierarchy of a set of Prefixes.
+
+    `prefixes` is an iterable of `(pk, vrf_id, network, broadcast, prefix_length)` tuples. Prefixes are only
+    related to other Prefixes of the same VRF and IP family. Returns a dict mapping each pk to a list of
+    `[parent_pk, depth, children]`, where `depth` is the number of Prefixes which contain the Prefix and `children` is
+    the number of Prefixes which it contains. Duplicate Prefixes are neither parents nor children of one another.
+
+    The hierarchy of any Prefix is correct as long as all of its parents and children are present in `prefixes`.
+    """
+    groups = defaultdict(list)
+    for pk, vrf_id, network, broadcast, prefix_length in prefixes:
+        network = netaddr.IPAddress(network)
+        broadcast = netaddr.IPAddress(broadcast)
+        groups[(vrf_id, network.version)].append((network.value, prefix_length, broadcast.value, pk))
+
+    hierarchy = {}
+    for group in groups.values():
+        # Sorting by network, then prefix length, means that every Prefix is preceded by all of the Prefixes containing
+        # it, so a stack of "open" Prefixes always holds exactly the parents (and duplicates) of the current Prefix.
+        group.sort(key=lambda p: p[:2])
+        stack = []
+        for network, prefix_length, broadcast, pk in group:
+            while stack and stack[-1][1] < broadcast:
+                stack.pop()
+            parents = [p for p in stack if p[0] < prefix_length]
+            hierarchy[pk] = [parents[-1][2] if parents else None, len(parents), 0]
+            for _, _, parent_pk in parents:
+                hierarchy[parent_pk][2] += 1
+            stack.append((prefix_length, broadcast, pk))
+
+    return hierarchy
+
+
+def rebuild_prefix_hierarchy(prefix_model, batch_size=1000):
+    """
+    Recompute and store the `parent`, `_depth` and `_children` values of every Prefix. Only Prefixes whose values have
+    changed are written. Returns the number of Prefixes updated.
+    """
+    current = {}
+    rows = []
+    queryset = prefix_model.objects.order_by().values_list(
+        "pk", "vrf_id", "network", "broadcast", "prefix_length", "parent_id", "_depth", "_children"
+    )
+    for row in queryset.iterator():
+        rows.append(row[:5])
+        current[row[0]] = list(row[5:])
+
+    changed = [
+        prefix_model(pk=pk, parent_id=parent_id, _depth=depth, _children=children)
+        for pk, (parent_id, depth, children) in compute_prefix_hierarchy(rows).items()
+        if current[pk] != [parent_id, depth, children]
+    ]
+    prefix_model.objects.bulk_update(changed, ["parent", "_depth", "_children"], batch_size=batch_size)
+
+    return len(changed)
+
+
+def populate_prefix_hierarchy(apps, schema_editor):
+    """
+    Populate the stored Prefix hierarchy during data migrations.
+    """
+    rebuild_prefix_hierarchy(apps.get_model("ipam", "Prefix"))
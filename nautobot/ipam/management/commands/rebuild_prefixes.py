@@ -0,0 +1,14 @@
+from django.core.management.base import BaseCommand
+
+from nautobot.ipam.management import rebuild_prefix_hierarchy
+from nautobot.ipam.models import Prefix
+
+
+class Command(BaseCommand):
+    help = "Rebuild the stored parent/child hierarchy of all prefixes in Nautobot"
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Rebuilding the hierarchy of {Prefix.objects.count()} prefixes...")
+        updated_count = rebuild_prefix_hierarchy(Prefix)
+        self.stdout.write(self.style.SUCCESS(f"  Updated {updated_count} prefixes"))
+        self.stdout.write(self.style.SUCCESS("Finished."))
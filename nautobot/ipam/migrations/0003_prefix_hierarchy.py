@@ -0,0 +1,42 @@
+# Generated by Django 3.1.8 on 2026-10-17 04:24
+
+from django.db import migrations, models
+import django.db.models.deletion
+
+import nautobot.ipam.management
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("ipam", "0002_initial_part_2"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="prefix",
+            name="_children",
+            field=models.PositiveIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="prefix",
+            name="_depth",
+            field=models.PositiveSmallIntegerField(default=0, editable=False),
+        ),
+        migrations.AddField(
+            model_name="prefix",
+            name="parent",
+            field=models.ForeignKey(
+                blank=True,
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.SET_NULL,
+                related_name="direct_children",
+                to="ipam.prefix",
+            ),
+        ),
+        migrations.RunPython(
+            nautobot.ipam.management.populate_prefix_hierarchy,
+            migrations.RunPython.noop,
+        ),
+    ]
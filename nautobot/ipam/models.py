@@ -354,9 +354,15 @@ class Aggregate(PrimaryModel):
     def get_utilization(self):
         """Gets the numerator and denominator for calculating utilization of an Aggregrate.
 
+        If this Aggregate was retrieved using `AggregateQuerySet.annotate_utilization()`, the annotated numerator is
+        used rather than retrieving the child prefixes.
+
         Returns:
             UtilizationData: Aggregate utilization (numerator=size of child prefixes, denominator=prefix size)
         """
+        if hasattr(self, "utilization_numerator"):
+            return UtilizationData(numerator=int(self.utilization_numerator or 0), denominator=self.prefix.size)
+
         queryset = Prefix.objects.net_contained_or_equal(self.prefix)
         child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
         return UtilizationData(numerator=child_prefixes.size, denominator=self.prefix.size)
@@ -470,6 +476,17 @@ class Prefix(PrimaryModel, StatusModel):
         help_text="All IP addresses within this prefix are considered usable",
     )
     description = models.CharField(max_length=200, blank=True)
+    parent = models.ForeignKey(
+        to="self",
+        on_delete=models.SET_NULL,
+        related_name="direct_children",
+        blank=True,
+        null=True,
+        editable=False,
+        help_text="The most specific Prefix within the same VRF which contains this Prefix",
+    )
+    _depth = models.PositiveSmallIntegerField(default=0, editable=False)
+    _children = models.PositiveIntegerField(default=0, editable=False)
 
     objects = PrefixQuerySet.as_manager()
 
@@ -508,6 +525,7 @@ class Prefix(PrimaryModel, StatusModel):
         prefix = kwargs.pop("prefix", None)
         super(Prefix, self).__init__(*args, **kwargs)
         self._deconstruct_prefix(prefix)
+        self._snapshot_tree_position()
 
     def __str__(self):
         return str(self.prefix)
@@ -523,6 +541,19 @@ class Prefix(PrimaryModel, StatusModel):
             self.broadcast = str(broadcast)
             self.prefix_length = pre.prefixlen
 
+    def _snapshot_tree_position(self):
+        """
+        Record the prefix and VRF as currently known, so that a change to either can be detected on save and the
+        stored hierarchy updated accordingly. Deferred fields are skipped to avoid triggering extra queries.
+        """
+        fields = self.__dict__
+        if "network" in fields and "prefix_length" in fields and "vrf_id" in fields:
+            self._original_prefix = self.prefix
+            self._original_vrf_id = self.vrf_id
+        else:
+            self._original_prefix = None
+            self._original_vrf_id = None
+
     def get_absolute_url(self):
         return reverse("ipam:prefix", args=[self.pk])
 
@@ -631,78 +662,138 @@ class Prefix(PrimaryModel, StatusModel):
         else:
             return IPAddress.objects.net_host_contained(self.prefix).filter(vrf=self.vrf)
 
-    def get_available_prefixes(self):
+    @staticmethod
+    def _iter_free_ranges(used_ranges, first, last):
         """
-        Return all available Prefixes within this prefix as an IPSet.
+        Yield the `(first, last)` integer bounds of each range between `first` and `last` (inclusive) which is not
+        covered by any of `used_ranges`, an iterable of possibly overlapping `(first, last)` integer bounds sorted by
+        their first value. `used_ranges` is only consumed as far as necessary to find the next free range.
         """
-        prefix = netaddr.IPSet(self.prefix)
-        child_prefixes = netaddr.IPSet([child.prefix for child in self.get_child_prefixes()])
-        available_prefixes = prefix - child_prefixes
-
-        return available_prefixes
-
-    def get_available_ips(self):
+        cursor = first
+        for used_first, used_last in used_ranges:
+            if used_first > last:
+                break
+            if used_first > cursor:
+                yield cursor, used_first - 1
+            cursor = max(cursor, used_last + 1)
+            if cursor > last:
+                return
+        if cursor <= last:
+            yield cursor, last
+
+    def _get_usable_ip_bounds(self):
         """
-        Return all available IPs within this prefix as an IPSet.
+        Return the integer bounds of the range of IPs within this prefix which may be assigned.
         """
-        prefix = netaddr.IPSet(self.prefix)
-        child_ips = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()])
-        available_ips = prefix - child_ips
-
         # All IP addresses within a pool are considered usable
         if self.is_pool:
-            return available_ips
+            return self.prefix.first, self.prefix.last
 
         # All IP addresses within a point-to-point prefix (IPv4 /31 or IPv6 /127) are considered usable
         if (self.prefix.version == 4 and self.prefix.prefixlen == 31) or (  # RFC 3021
             self.prefix.version == 6 and self.prefix.prefixlen == 127  # RFC 6164
         ):
-            return available_ips
+            return self.prefix.first, self.prefix.last
 
-        # Omit first and last IP address from the available set
-        available_ips -= netaddr.IPSet(
-            [
-                netaddr.IPAddress(self.prefix.first),
-                netaddr.IPAddress(self.prefix.last),
-            ]
+        # Omit first and last IP address
+        return self.prefix.first + 1, self.prefix.last - 1
+
+    def iter_available_prefixes(self):
+        """
+        Yield all available Prefixes within this prefix, in order, as the largest possible `netaddr.IPNetwork` objects.
+
+        Child prefixes are streamed from the database in order, so only the children preceding the last available
+        Prefix consumed are retrieved.
+        """
+        version = self.prefix.version
+        child_prefixes = (
+            self.get_child_prefixes().order_by("network", "broadcast").values_list("network", "broadcast").iterator()
+        )
+        used_ranges = (
+            (int(netaddr.IPAddress(network)), int(netaddr.IPAddress(broadcast)))
+            for network, broadcast in child_prefixes
         )
+        for first, last in self._iter_free_ranges(used_ranges, self.prefix.first, self.prefix.last):
+            yield from netaddr.iprange_to_cidrs(netaddr.IPAddress(first, version), netaddr.IPAddress(last, version))
+
+    def _iter_available_ip_ranges(self):
+        """
+        Yield the integer bounds of each range of available IPs within this prefix, in order.
+        """
+        hosts = self.get_child_ips().order_by("host").values_list("host", flat=True).iterator()
+        used_ranges = ((value, value) for value in (int(netaddr.IPAddress(host)) for host in hosts))
+        return self._iter_free_ranges(used_ranges, *self._get_usable_ip_bounds())
+
+    def iter_available_ips(self):
+        """
+        Yield all available IPs within this prefix, in order, as `netaddr.IPAddress` objects.
+
+        Child IP addresses are streamed from the database in order, so finding the first N available IPs only costs as
+        much as retrieving the child IP addresses which precede them.
+        """
+        version = self.prefix.version
+        for first, last in self._iter_available_ip_ranges():
+            for value in range(first, last + 1):
+                yield netaddr.IPAddress(value, version)
+
+    def get_available_prefixes(self):
+        """
+        Return all available Prefixes within this prefix as an IPSet.
+        """
+        return netaddr.IPSet(self.iter_available_prefixes())
 
-        return available_ips
+    def get_available_ips(self):
+        """
+        Return all available IPs within this prefix as an IPSet.
+        """
+        version = self.prefix.version
+        return netaddr.IPSet(
+            cidr
+            for first, last in self._iter_available_ip_ranges()
+            for cidr in netaddr.iprange_to_cidrs(netaddr.IPAddress(first, version), netaddr.IPAddress(last, version))
+        )
 
     def get_first_available_prefix(self):
         """
         Return the first available child prefix within the prefix (or None).
         """
-        available_prefixes = self.get_available_prefixes()
-        if not available_prefixes:
-            return None
-        return available_prefixes.iter_cidrs()[0]
+        return next(self.iter_available_prefixes(), None)
 
     def get_first_available_ip(self):
         """
         Return the first available IP within the prefix (or None).
         """
-        available_ips = self.get_available_ips()
-        if not available_ips:
+        available_ip = next(self.iter_available_ips(), None)
+        if available_ip is None:
             return None
-        return "{}/{}".format(next(available_ips.__iter__()), self.prefix.prefixlen)
+        return "{}/{}".format(available_ip, self.prefix.prefixlen)
 
     def get_utilization(self):
         """Get the child prefix size and parent size.
 
         For Prefixes with a status of "container", get the number child prefixes. For all others, count child IP addresses.
+        If this Prefix was retrieved using `PrefixQuerySet.annotate_utilization()`, the annotated numerator is used
+        rather than retrieving the child prefixes or IP addresses.
 
         Returns:
             UtilizationData (namedtuple): (numerator, denominator)
         """
+        annotated = hasattr(self, "utilization_numerator")
+
         if self.status == Prefix.STATUS_CONTAINER:
+            if annotated:
+                return UtilizationData(numerator=int(self.utilization_numerator or 0), denominator=self.prefix.size)
+
             queryset = Prefix.objects.net_contained(self.prefix).filter(vrf=self.vrf)
             child_prefixes = netaddr.IPSet([p.prefix for p in queryset])
             return UtilizationData(numerator=child_prefixes.size, denominator=self.prefix.size)
 
         else:
-            # Compile an IPSet to avoid counting duplicate IPs
-            child_count = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()]).size
+            if annotated:
+                child_count = int(self.utilization_numerator or 0)
+            else:
+                # Compile an IPSet to avoid counting duplicate IPs
+                child_count = netaddr.IPSet([ip.address.ip for ip in self.get_child_ips()]).size
             prefix_size = self.prefix.size
             if self.prefix.version == 4 and self.prefix.prefixlen < 31 and not self.is_pool:
                 prefix_size -= 2
@@ -3,28 +3,71 @@ import uuid
 
 import netaddr
 from django.db.models import (
+    Case,
     Count,
+    DecimalField,
+    Exists,
     ExpressionWrapper,
-    IntegerField,
     F,
     OuterRef,
-    Subquery,
     Q,
     QuerySet,
+    Subquery,
+    Sum,
     UUIDField,
     Value,
+    When,
 )
-from django.db.models.functions import Coalesce, Length
+from django.db.models.functions import Cast, Coalesce, Length, Power
 
 from nautobot.ipam.constants import IPV4_BYTE_LENGTH, IPV6_BYTE_LENGTH
 from nautobot.utilities.querysets import RestrictedQuerySet
 
 
 class NetworkQuerySet(QuerySet):
+    ip_family_map = {
+        4: IPV4_BYTE_LENGTH,
+        6: IPV6_BYTE_LENGTH,
+    }
+
     @staticmethod
     def _get_broadcast(prefix):
         return prefix.broadcast if prefix.broadcast else prefix.network
 
+    @staticmethod
+    def _aggregate_subquery(queryset, aggregate):
+        """
+        Return a Subquery evaluating `aggregate` over all rows of `queryset`.
+        """
+        return Subquery(
+            queryset.order_by()
+            .annotate(dummy_group_by=Value(1))  # This is an ORM hack to remove the unwanted GROUP BY clause
+            .values("dummy_group_by")
+            .annotate(total=aggregate)
+            .values("total")[:1]
+        )
+
+    @classmethod
+    def _covered_size_subquery(cls, prefixes, covering_prefixes):
+        """
+        Return a Subquery evaluating to the number of distinct addresses covered by `prefixes`.
+
+        Because any two prefixes are either nested or disjoint, this is the total size of the prefixes which are not
+        covered by any other Prefix, nor duplicate an earlier Prefix, within `covering_prefixes`. `covering_prefixes`
+        is evaluated relative to each of `prefixes` (with `OuterRef`) and must select the same set of Prefixes.
+        """
+        covering_prefixes = covering_prefixes.filter(
+            Q(prefix_length__lt=OuterRef("prefix_length"))
+            | Q(prefix_length=OuterRef("prefix_length"), pk__lt=OuterRef("pk")),
+            network__lte=OuterRef("network"),
+            broadcast__gte=OuterRef("broadcast"),
+        )
+        size = Power(
+            Cast(Value(2), output_field=DecimalField(max_digits=39, decimal_places=0)),
+            Length("network") * 8 - F("prefix_length"),
+        )
+        return cls._aggregate_subquery(prefixes.filter(~Exists(covering_prefixes)), Sum(size))
+
     def net_equals(self, prefix):
         prefix = netaddr.IPNetwork(prefix)
         broadcast = self._get_broadcast(prefix)
@@ -66,6 +109,14 @@ class NetworkQuerySet(QuerySet):
             broadcast__gte=broadcast,
         )
 
+    def ip_family(self, family):
+        try:
+            byte_len = self.ip_family_map[family]
+        except KeyError:
+            raise ValueError("invalid IP family {}".format(family))
+
+        return self.annotate(network_len=Length(F("network"))).filter(network_len=byte_len)
+
     def get(self, *args, prefix=None, **kwargs):
         """
         Provide a convenience for `.get(prefix=<prefix>)`
@@ -94,7 +145,27 @@ class NetworkQuerySet(QuerySet):
 
 
 class AggregateQuerySet(NetworkQuerySet, RestrictedQuerySet):
-    pass
+    def annotate_utilization(self):
+        """
+        Annotate each Aggregate with the number of addresses covered by the Prefixes within it, as
+        `utilization_numerator`. This is the same value which `Aggregate.get_utilization()` would otherwise compute in
+        Python.
+        """
+        from nautobot.ipam.models import Prefix
+
+        return self.annotate(
+            utilization_numerator=self._covered_size_subquery(
+                Prefix.objects.filter(
+                    prefix_length__gte=OuterRef("prefix_length"),
+                    network__gte=OuterRef("network"),
+                    broadcast__lte=OuterRef("broadcast"),
+                ),
+                Prefix.objects.filter(
+                    prefix_length__gte=OuterRef(OuterRef("prefix_length")),
+                    network__gte=OuterRef(OuterRef("network")),
+                ),
+            )
+        )
 
 
 class PrefixQuerySet(NetworkQuerySet, RestrictedQuerySet):
@@ -102,65 +173,54 @@ class PrefixQuerySet(NetworkQuerySet, RestrictedQuerySet):
         """
         Annotate the number of parent and child prefixes for each Prefix.
 
+        These values are read from the hierarchy stored on each Prefix (`_depth` and `_children`), which is maintained
+        as Prefixes are saved and deleted, and can be rebuilt with the `rebuild_prefixes` management command.
+        """
+        return self.annotate(parents=F("_depth"), children=F("_children"))
+
+    def annotate_utilization(self):
+        """
+        Annotate each Prefix with the numerator of its utilization, as `utilization_numerator`. This is the same value
+        which `Prefix.get_utilization()` would otherwise compute in Python: the number of addresses covered by child
+        Prefixes for containers, or the number of distinct child IP addresses for all other Prefixes.
+
         The UUID being used is fake for purposes of satisfying the COALESCE condition.
         """
         # The COALESCE needs a valid, non-zero, non-null UUID value to do the comparison.
         # The value itself has no meaning, so we just generate a random UUID for the query.
         FAKE_UUID = uuid.uuid4()
 
-        from nautobot.ipam.models import Prefix
+        from nautobot.ipam.models import IPAddress, Prefix
+
+        def maybe_vrf(vrf):
+            return ExpressionWrapper(Coalesce(vrf, FAKE_UUID), output_field=UUIDField())
+
+        child_prefixes = Prefix.objects.annotate(maybe_vrf=maybe_vrf(F("vrf_id"))).filter(
+            maybe_vrf=maybe_vrf(OuterRef("vrf_id")),
+            prefix_length__gt=OuterRef("prefix_length"),
+            network__gte=OuterRef("network"),
+            broadcast__lte=OuterRef("broadcast"),
+        )
+        covering_prefixes = Prefix.objects.annotate(maybe_vrf=maybe_vrf(F("vrf_id"))).filter(
+            maybe_vrf=OuterRef("maybe_vrf"),
+            prefix_length__gt=OuterRef(OuterRef("prefix_length")),
+            network__gte=OuterRef(OuterRef("network")),
+        )
+        child_ips = IPAddress.objects.annotate(maybe_vrf=maybe_vrf(F("vrf_id"))).filter(
+            maybe_vrf=maybe_vrf(OuterRef("vrf_id")),
+            host__gte=OuterRef("network"),
+            host__lte=OuterRef("broadcast"),
+        )
 
         return self.annotate(
-            parents=Subquery(
-                Prefix.objects.annotate(
-                    maybe_vrf=ExpressionWrapper(
-                        Coalesce(F("vrf_id"), FAKE_UUID),
-                        output_field=UUIDField(),
-                    )
-                )
-                .filter(
-                    Q(prefix_length__lt=OuterRef("prefix_length"))
-                    & Q(network__lte=OuterRef("network"))
-                    & Q(broadcast__gte=OuterRef("broadcast"))
-                    & Q(
-                        maybe_vrf=ExpressionWrapper(
-                            Coalesce(OuterRef("vrf_id"), FAKE_UUID),
-                            output_field=UUIDField(),
-                        )
-                    )
-                )
-                .order_by()
-                .annotate(dummy_group_by=Value(1))  # This is an ORM hack to remove the unwanted GROUP BY clause
-                .values("dummy_group_by")
-                .annotate(count=Count("*"))
-                .values("count")[:1],
-                output_field=IntegerField(),
-            ),
-            children=Subquery(
-                Prefix.objects.annotate(
-                    maybe_vrf=ExpressionWrapper(
-                        Coalesce(F("vrf_id"), FAKE_UUID),
-                        output_field=UUIDField(),
-                    )
-                )
-                .filter(
-                    Q(prefix_length__gt=OuterRef("prefix_length"))
-                    & Q(network__gte=OuterRef("network"))
-                    & Q(broadcast__lte=OuterRef("broadcast"))
-                    & Q(
-                        maybe_vrf=ExpressionWrapper(
-                            Coalesce(OuterRef("vrf_id"), FAKE_UUID),
-                            output_field=UUIDField(),
-                        )
-                    )
-                )
-                .order_by()
-                .annotate(dummy_group_by=Value(1))  # This is an ORM hack to remove the unwanted GROUP BY clause
-                .values("dummy_group_by")
-                .annotate(count=Count("*"))
-                .values("count")[:1],
-                output_field=IntegerField(),
-            ),
+            utilization_numerator=Case(
+                When(
+                    status__slug="container",
+                    then=self._covered_size_subquery(child_prefixes, covering_prefixes),
+                ),
+                default=self._aggregate_subquery(child_ips, Count("host", distinct=True)),
+                output_field=DecimalField(max_digits=39, decimal_places=0),
+            )
         )
 
 
@@ -0,0 +1,63 @@
+import netaddr
+from django.db.models.signals import post_delete, post_save
+from django.dispatch import receiver
+
+from .management import compute_prefix_hierarchy
+from .models import Prefix
+
+
+def update_prefix_hierarchy(prefix, vrf_id):
+    """
+    Update the stored hierarchy of all Prefixes affected by adding or removing `prefix` in the given VRF: those which
+    contain it, equal it, or are contained by it. Returns the computed `[parent_pk, depth, children]` of each Prefix
+    which was examined, keyed by pk.
+    """
+    family_prefixes = Prefix.objects.filter(vrf_id=vrf_id).ip_family(prefix.version)
+    affected = list(
+        (family_prefixes.net_contains_or_equals(prefix) | family_prefixes.net_contained(prefix)).values_list(
+            "pk", "vrf_id", "network", "broadcast", "prefix_length", "parent_id", "_depth", "_children"
+        )
+    )
+    hierarchy = compute_prefix_hierarchy(row[:5] for row in affected)
+
+    # The child count of a containing Prefix also depends on Prefixes outside of this neighborhood, so recount them.
+    for pk, _, network, _, prefix_length, *_ in affected:
+        if prefix_length < prefix.prefixlen:
+            parent_prefix = netaddr.IPNetwork("{}/{}".format(network, prefix_length))
+            hierarchy[pk][2] = family_prefixes.net_contained(parent_prefix).count()
+
+    changed = [
+        Prefix(pk=row[0], parent_id=hierarchy[row[0]][0], _depth=hierarchy[row[0]][1], _children=hierarchy[row[0]][2])
+        for row in affected
+        if list(row[5:]) != hierarchy[row[0]]
+    ]
+    Prefix.objects.bulk_update(changed, ["parent", "_depth", "_children"], batch_size=100)
+
+    return hierarchy
+
+
+@receiver(post_save, sender=Prefix)
+def handle_prefix_saved(instance, created, raw=False, **kwargs):
+    """
+    Update the stored Prefix hierarchy when a Prefix is created, or its prefix or VRF is changed.
+    """
+    if raw:
+        return
+
+    if created or instance.prefix != instance._original_prefix or instance.vrf_id != instance._original_vrf_id:
+        # Clean up the neighborhood which this Prefix has left, if any
+        if not created and instance._original_prefix is not None:
+            update_prefix_hierarchy(instance._original_prefix, instance._original_vrf_id)
+
+        hierarchy = update_prefix_hierarchy(instance.prefix, instance.vrf_id)
+        instance.parent_id, instance._depth, instance._children = hierarchy[instance.pk]
+
+    instance._snapshot_tree_position()
+
+
+@receiver(post_delete, sender=Prefix)
+def handle_prefix_deleted(instance, **kwargs):
+    """
+    Update the stored Prefix hierarchy when a Prefix is deleted.
+    """
+    update_prefix_hierarchy(instance.prefix, instance.vrf_id)
@@ -1,13 +1,16 @@
 from concurrent.futures.thread import ThreadPoolExecutor
 import json
+import uuid
 from random import shuffle
 
+from django.apps import apps
 from django.db import connection
 from django.urls import reverse
 from netaddr import IPNetwork
 from rest_framework import status
 
 from nautobot.dcim.models import Device, DeviceRole, DeviceType, Manufacturer, Site
+from nautobot.extras.management import create_custom_statuses
 from nautobot.extras.models import Status
 from nautobot.ipam.choices import *
 from nautobot.ipam.models import (
@@ -396,12 +399,56 @@ class PrefixTest(APIViewTestCases.APIViewTestCase):
         self.assertHttpStatus(response, status.HTTP_201_CREATED)
         self.assertEqual(len(response.data), 8)
 
+    def test_create_available_ips_from_multiple_prefixes(self):
+        """
+        Test the creation of available IP addresses within several parent prefixes in a single request.
+        """
+        vrf = VRF.objects.create(name="Test VRF 1", rd="1234")
+        prefix1 = Prefix.objects.create(prefix=IPNetwork("192.0.2.0/30"), status=self.status_active)
+        prefix2 = Prefix.objects.create(prefix=IPNetwork("198.51.100.0/29"), vrf=vrf, status=self.status_active)
+        url = reverse("ipam-api:prefix-bulk-available-ips")
+        self.add_permissions("ipam.view_prefix", "ipam.add_ipaddress", "extras.view_status")
+
+        # Try to create three IPs in prefix1 (only two are available); no IPs should be created in prefix2 either
+        data = [{"prefix": str(prefix1.pk), "description": f"Test IP {i}", "status": "active"} for i in range(1, 4)]
+        data.append({"prefix": str(prefix2.pk), "status": "active"})
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_204_NO_CONTENT)
+        self.assertIn("detail", response.data)
+        self.assertFalse(IPAddress.objects.exists())
+
+        # Try to create an IP in a nonexistent prefix
+        response = self.client.post(
+            url, {"prefix": str(uuid.uuid4()), "status": "active"}, format="json", **self.header
+        )
+        self.assertHttpStatus(response, status.HTTP_400_BAD_REQUEST)
+
+        # Create IPs in both prefixes in a single request
+        data = [
+            {"prefix": str(prefix2.pk), "description": "Test IP 1", "status": "active"},
+            {"prefix": str(prefix1.pk), "description": "Test IP 2", "status": "active"},
+            {"prefix": str(prefix2.pk), "description": "Test IP 3", "status": "active"},
+        ]
+        response = self.client.post(url, data, format="json", **self.header)
+        self.assertHttpStatus(response, status.HTTP_201_CREATED)
+        self.assertEqual(
+            [(ip["address"], ip["description"]) for ip in response.data],
+            [("198.51.100.1/29", "Test IP 1"), ("192.0.2.1/30", "Test IP 2"), ("198.51.100.2/29", "Test IP 3")],
+        )
+        self.assertEqual(response.data[0]["vrf"]["id"], str(vrf.pk))
+        self.assertIsNone(response.data[1]["vrf"])
+
 
 class ParallelPrefixTest(APITransactionTestCase):
     """
     Adapted from https://github.com/netbox-community/netbox/pull/3726
     """
 
+    def setUp(self):
+        super().setUp()
+        # Statuses are created by a data migration, so must be recreated once flushed by a preceding test case
+        create_custom_statuses(apps.get_app_config("extras"), verbosity=-1)
+
     def test_create_multiple_available_prefixes_parallel(self):
         prefix = Prefix.objects.create(prefix=IPNetwork("192.0.2.0/28"), is_pool=True)
 
@@ -426,6 +473,43 @@ class ParallelPrefixTest(APITransactionTestCase):
         ips = [str(o) for o in IPAddress.objects.filter().all()]
         self.assertEqual(len(ips), len(set(ips)), "Duplicate IPs should not exist")
 
+    def test_create_available_ips_from_overlapping_prefixes_parallel(self):
+        parent = Prefix.objects.create(prefix=IPNetwork("192.0.2.0/28"), is_pool=True)
+        child = Prefix.objects.create(prefix=IPNetwork("192.0.2.0/29"), is_pool=True)
+
+        # 4 IPs from each Prefix
+        requests = [
+            (reverse("ipam-api:prefix-available-ips", kwargs={"pk": prefix.pk}), {"description": f"Test IP {i}"})
+            for prefix in (parent, child)
+            for i in range(1, 5)
+        ]
+        shuffle(requests)
+        with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+            for url, data in requests:
+                executor.submit(self._threaded_post, url, {"status": "active", **data})
+
+        ips = [str(o) for o in IPAddress.objects.all()]
+        self.assertEqual(len(ips), 8)
+        self.assertEqual(len(ips), len(set(ips)), "Duplicate IPs should not exist")
+
+    def test_create_available_ips_from_duplicate_prefixes_parallel(self):
+        prefixes = [Prefix.objects.create(prefix=IPNetwork("192.0.2.0/29"), is_pool=True) for _ in range(2)]
+
+        # 4 IPs from each Prefix
+        requests = [
+            (reverse("ipam-api:prefix-available-ips", kwargs={"pk": prefix.pk}), {"description": f"Test IP {i}"})
+            for prefix in prefixes
+            for i in range(1, 5)
+        ]
+        shuffle(requests)
+        with ThreadPoolExecutor(max_workers=len(requests)) as executor:
+            for url, data in requests:
+                executor.submit(self._threaded_post, url, {"status": "active", **data})
+
+        ips = [str(o) for o in IPAddress.objects.all()]
+        self.assertEqual(len(ips), 8)
+        self.assertEqual(len(ips), len(set(ips)), "Duplicate IPs should not exist")
+
     def _do_parallel_requests(self, url, requests):
         # Randomize request order, such that test run more closely simulates
         # a real calling pattern.
@@ -8,6 +8,7 @@ from django.test import TestCase, override_settings
 
 from nautobot.extras.models import Status
 from nautobot.ipam.choices import IPAddressRoleChoices
+from nautobot.ipam.management import rebuild_prefix_hierarchy
 from nautobot.ipam.models import Aggregate, IPAddress, Prefix, RIR, VLAN, VLANGroup, VRF
 
 
@@ -249,6 +250,51 @@ class TestPrefix(TestCase):
 
         self.assertEqual(available_ips, missing_ips)
 
+    def test_iter_available_prefixes(self):
+
+        prefixes = Prefix.objects.bulk_create(
+            (
+                Prefix(prefix=netaddr.IPNetwork("10.0.0.0/16")),  # Parent prefix
+                Prefix(prefix=netaddr.IPNetwork("10.0.0.0/20")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.4.0/24")),  # Nested within another child
+                Prefix(prefix=netaddr.IPNetwork("10.0.32.0/20")),
+                Prefix(prefix=netaddr.IPNetwork("10.0.32.0/20")),  # Duplicate child
+                Prefix(prefix=netaddr.IPNetwork("10.0.128.0/18")),
+            )
+        )
+        self.assertEqual(
+            list(prefixes[0].iter_available_prefixes()),
+            [
+                netaddr.IPNetwork("10.0.16.0/20"),
+                netaddr.IPNetwork("10.0.48.0/20"),
+                netaddr.IPNetwork("10.0.64.0/18"),
+                netaddr.IPNetwork("10.0.192.0/18"),
+            ],
+        )
+
+    def test_iter_available_ips(self):
+
+        parent_prefix = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/29"))
+        IPAddress.objects.bulk_create(
+            (
+                IPAddress(address=netaddr.IPNetwork("10.0.0.0/29")),
+                IPAddress(address=netaddr.IPNetwork("10.0.0.2/29")),
+                IPAddress(address=netaddr.IPNetwork("10.0.0.3/29")),
+                IPAddress(address=netaddr.IPNetwork("10.0.0.3/32")),  # Same host, different mask
+            )
+        )
+        self.assertEqual(
+            [str(ip) for ip in parent_prefix.iter_available_ips()],
+            ["10.0.0.1", "10.0.0.4", "10.0.0.5", "10.0.0.6"],
+        )
+
+        # All IP addresses within a pool are considered usable
+        parent_prefix.is_pool = True
+        self.assertEqual(
+            [str(ip) for ip in parent_prefix.iter_available_ips()],
+            ["10.0.0.1", "10.0.0.4", "10.0.0.5", "10.0.0.6", "10.0.0.7"],
+        )
+
     def test_get_first_available_prefix(self):
 
         prefixes = Prefix.objects.bulk_create(
@@ -300,6 +346,73 @@ class TestPrefix(TestCase):
         )
         self.assertEqual(prefix.get_utilization(), (32, 254))
 
+    def test_hierarchy(self):
+        def get_hierarchy(prefix):
+            prefix.refresh_from_db()
+            return (prefix.parent, prefix._depth, prefix._children)
+
+        vrf = VRF.objects.create(name="VRF 1")
+        supernet = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/8"))
+        subnet = Prefix.objects.create(prefix=netaddr.IPNetwork("10.1.1.0/24"))
+        other_vrf = Prefix.objects.create(prefix=netaddr.IPNetwork("10.1.0.0/16"), vrf=vrf)
+        ipv6 = Prefix.objects.create(prefix=netaddr.IPNetwork("a00::/7"))
+        self.assertEqual(get_hierarchy(supernet), (None, 0, 1))
+        self.assertEqual(get_hierarchy(subnet), (supernet, 1, 0))
+        self.assertEqual(get_hierarchy(other_vrf), (None, 0, 0))
+        self.assertEqual(get_hierarchy(ipv6), (None, 0, 0))
+
+        # Inserting a Prefix between two others updates both of them
+        middle = Prefix.objects.create(prefix=netaddr.IPNetwork("10.1.0.0/16"))
+        self.assertEqual(get_hierarchy(supernet), (None, 0, 2))
+        self.assertEqual(get_hierarchy(middle), (supernet, 1, 1))
+        self.assertEqual(get_hierarchy(subnet), (middle, 2, 0))
+
+        # Moving a Prefix to another VRF updates both its old and new neighbors
+        middle.vrf = vrf
+        middle.save()
+        self.assertEqual(get_hierarchy(supernet), (None, 0, 1))
+        self.assertEqual(get_hierarchy(subnet), (supernet, 1, 0))
+        self.assertEqual(get_hierarchy(middle), (None, 0, 0))
+
+        # Changing the prefix itself does likewise
+        subnet.prefix = netaddr.IPNetwork("10.1.0.0/20")
+        subnet.vrf = vrf
+        subnet.save()
+        self.assertEqual(get_hierarchy(supernet), (None, 0, 0))
+        self.assertEqual(get_hierarchy(other_vrf), (None, 0, 1))
+        self.assertEqual(get_hierarchy(middle), (None, 0, 1))
+        self.assertEqual(get_hierarchy(subnet)[1:], (2, 0))
+
+        # Deleting a Prefix re-parents its children
+        supernet.vrf = vrf
+        supernet.save()
+        self.assertEqual(get_hierarchy(middle), (supernet, 1, 1))
+        middle.delete()
+        self.assertEqual(get_hierarchy(supernet), (None, 0, 2))
+        self.assertEqual(get_hierarchy(subnet), (other_vrf, 2, 0))
+        other_vrf.delete()
+        self.assertEqual(get_hierarchy(supernet), (None, 0, 1))
+        self.assertEqual(get_hierarchy(subnet), (supernet, 1, 0))
+
+    def test_rebuild_hierarchy(self):
+        supernet = Prefix.objects.create(prefix=netaddr.IPNetwork("10.0.0.0/8"))
+        duplicates = (
+            Prefix.objects.create(prefix=netaddr.IPNetwork("10.1.0.0/16")),
+            Prefix.objects.create(prefix=netaddr.IPNetwork("10.1.0.0/16")),
+        )
+        subnet = Prefix.objects.create(prefix=netaddr.IPNetwork("10.1.1.0/24"))
+        expected = {p.pk: (p.parent_id, p._depth, p._children) for p in Prefix.objects.all()}
+        self.assertEqual(expected[supernet.pk], (None, 0, 3))
+        self.assertEqual(expected[duplicates[0].pk], (supernet.pk, 1, 1))
+        self.assertEqual(expected[duplicates[1].pk], (supernet.pk, 1, 1))
+        self.assertEqual(expected[subnet.pk][1:], (3, 0))
+        self.assertIn(expected[subnet.pk][0], (duplicates[0].pk, duplicates[1].pk))
+
+        Prefix.objects.update(parent=None, _depth=0, _children=0)
+        self.assertEqual(rebuild_prefix_hierarchy(Prefix), 4)
+        self.assertEqual({p.pk: (p.parent_id, p._depth, p._children) for p in Prefix.objects.all()}, expected)
+        self.assertEqual(rebuild_prefix_hierarchy(Prefix), 0)
+
     #
     # Uniqueness enforcement tests
     #
@@ -1,6 +1,7 @@
 import netaddr
 
-from nautobot.ipam.models import Prefix, Aggregate, IPAddress, RIR
+from nautobot.extras.models import Status
+from nautobot.ipam.models import Prefix, Aggregate, IPAddress, RIR, VRF
 from nautobot.utilities.testing import TestCase
 
 
@@ -63,6 +64,17 @@ class AggregateQuerysetTestCase(TestCase):
         prefix = self.queryset.net_equals(netaddr.IPNetwork("192.168.0.0/16"))[0]
         self.assertEqual(self.queryset.get(prefix="192.168.0.0/16"), prefix)
 
+    def test_annotate_utilization(self):
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.1.0/25"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.1.0/26"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.0/24"))
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.0/24"), vrf=VRF.objects.create(name="VRF 1"))
+
+        for aggregate in self.queryset.annotate_utilization():
+            self.assertEqual(aggregate.get_utilization(), Aggregate.objects.get(pk=aggregate.pk).get_utilization())
+        self.assertEqual(self.queryset.annotate_utilization().get(prefix="192.168.0.0/16").get_utilization()[0], 384)
+        self.assertEqual(self.queryset.annotate_utilization().get(prefix="192.168.2.0/24").get_utilization()[0], 0)
+
     def test_get_by_prefix_fails(self):
         _ = self.queryset.net_equals(netaddr.IPNetwork("192.168.0.0/16"))[0]
         with self.assertRaises(Aggregate.DoesNotExist):
@@ -233,6 +245,27 @@ class PrefixQuerysetTestCase(TestCase):
         self.assertEqual(self.queryset.annotate_tree().get(prefix="fd78:da4f:e596:c217::/122").parents, 2)
         self.assertEqual(self.queryset.annotate_tree().get(prefix="fd78:da4f:e596:c217::/122").children, 0)
 
+    def test_annotate_utilization(self):
+        container = Status.objects.get(slug="container")
+        self.queryset.filter(prefix_length__in=[16, 24, 64]).update(status=container)
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.192/28"))  # Duplicate child
+        Prefix.objects.create(prefix=netaddr.IPNetwork("192.168.3.192/28"), vrf=VRF.objects.create(name="VRF 1"))
+        IPAddress.objects.create(address=netaddr.IPNetwork("192.168.3.193/28"))
+        IPAddress.objects.create(address=netaddr.IPNetwork("192.168.3.194/28"))
+        IPAddress.objects.create(address=netaddr.IPNetwork("192.168.3.194/32"))  # Duplicate host
+        IPAddress.objects.create(address=netaddr.IPNetwork("fd78:da4f:e596:c217::1/122"))
+
+        for prefix in self.queryset.annotate_utilization():
+            self.assertEqual(prefix.get_utilization(), Prefix.objects.get(pk=prefix.pk).get_utilization())
+        self.assertEqual(self.queryset.annotate_utilization().get(prefix="192.168.0.0/16").get_utilization()[0], 768)
+        self.assertEqual(self.queryset.annotate_utilization().get(prefix="192.168.3.0/24").get_utilization()[0], 48)
+        self.assertEqual(
+            self.queryset.annotate_utilization().get(prefix="fd78:da4f:e596:c217::/64").get_utilization()[0], 256
+        )
+        self.assertEqual(
+            self.queryset.annotate_utilization().get(prefix="fd78:da4f:e596:c217::/122").get_utilization()[0], 1
+        )
+
     def test_get_by_prefix(self):
         prefix = self.queryset.net_equals(netaddr.IPNetwork("192.168.0.0/16"))[0]
         self.assertEqual(self.queryset.get(prefix="192.168.0.0/16"), prefix)
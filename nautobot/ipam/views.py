@@ -1,3 +1,4 @@
+import netaddr
 from django.db.models import Prefetch
 from django.db.models.expressions import RawSQL
 from django.shortcuts import get_object_or_404, redirect, render
@@ -218,16 +219,21 @@ class AggregateListView(generic.ObjectListView):
     table = tables.AggregateDetailTable
     template_name = "ipam/aggregate_list.html"
 
+    def alter_queryset(self, request):
+        # Utilization is only needed for the table, not for exports
+        return super().alter_queryset(request).annotate_utilization()
+
     def extra_context(self):
         ipv4_total = 0
         ipv6_total = 0
 
-        for aggregate in self.queryset:
-            if aggregate.prefix.version == 6:
+        for network, prefix_length in self.queryset.values_list("network", "prefix_length"):
+            prefix = netaddr.IPNetwork("{}/{}".format(network, prefix_length))
+            if prefix.version == 6:
                 # Report equivalent /64s for IPv6 to keep things sane
-                ipv6_total += int(aggregate.prefix.size / 2 ** 64)
+                ipv6_total += int(prefix.size / 2 ** 64)
             else:
-                ipv4_total += aggregate.prefix.size
+                ipv4_total += prefix.size
 
         return {
             "ipv4_total": ipv4_total,
@@ -400,6 +406,10 @@ class PrefixListView(generic.ObjectListView):
     table = tables.PrefixDetailTable
     template_name = "ipam/prefix_list.html"
 
+    def alter_queryset(self, request):
+        # Utilization is only needed for the table, not for exports
+        return super().alter_queryset(request).annotate_utilization()
+
 
 class PrefixView(generic.ObjectView):
     queryset = Prefix.objects.prefetch_related(
@@ -1,15 +1,32 @@
+import json
+from decimal import Decimal
+
+from django.contrib.contenttypes.models import ContentType
+from django.core.serializers import serialize
 from django.http import QueryDict
 from django.test import TestCase
+from django.utils import timezone
+from jinja2.exceptions import SecurityError
+from netaddr import IPNetwork
 
 from nautobot.core.settings_funcs import is_truthy
 from nautobot.utilities.utils import (
+    buffer_stream,
+    get_streaming_queryset,
+    queryset_iterator,
     get_filterset_for_model,
     deepmerge,
     dict_to_filter_params,
+    get_jinja2_template,
     normalize_querydict,
+    render_jinja2,
+    serialize_object,
 )
-from nautobot.dcim.models import Device, Site
+from nautobot.dcim.models import Device, DeviceRole, DeviceType, Interface, Manufacturer, Region, Site
 from nautobot.dcim.filters import DeviceFilterSet, SiteFilterSet
+from nautobot.extras.models import ConfigContext, CustomField, Status, Tag
+from nautobot.extras.utils import is_taggable
+from nautobot.ipam.models import IPAddress, Prefix
 
 
 class DictToFilterParamsTest(TestCase):
@@ -134,12 +151,112 @@ class DeepMergeTest(TestCase):
         self.assertEqual(deepmerge(dict1, dict2), merged)
 
 
+class SerializeObjectTest(TestCase):
+    """
+    Validate that serialize_object() represents objects exactly as Django's JSON serializer does.
+    """
+
+    def assertSerializedAsDjango(self, obj):
+        data = json.loads(serialize("json", [obj]))[0]["fields"]
+        if hasattr(obj, "_custom_field_data"):
+            data["custom_fields"] = data.pop("_custom_field_data")
+        if is_taggable(obj):
+            data["tags"] = [tag.name for tag in obj.tags.all()]
+        data = {key: value for key, value in data.items() if not key.startswith("_")}
+        self.assertEqual(json.dumps(serialize_object(obj)), json.dumps(data))
+
+    def test_serialize_object(self):
+        custom_field = CustomField.objects.create(name="cf1")
+        custom_field.content_types.set([ContentType.objects.get_for_model(Site)])
+        region = Region.objects.create(name="Region 1", slug="region-1")
+        site = Site.objects.create(
+            name="Site 1",
+            slug="site-1",
+            region=region,
+            status=Status.objects.get(slug="active"),
+            time_zone="Europe/Paris",
+            latitude=Decimal("48.856613"),
+            _custom_field_data={"cf1": "foo"},
+        )
+        site.tags.add(Tag.objects.create(name="Tag 1", slug="tag-1"))
+        manufacturer = Manufacturer.objects.create(name="Manufacturer 1", slug="manufacturer-1")
+        device = Device.objects.create(
+            name="Device 1",
+            site=site,
+            device_type=DeviceType.objects.create(manufacturer=manufacturer, model="Model 1", slug="model-1"),
+            device_role=DeviceRole.objects.create(name="Role 1", slug="role-1"),
+            local_context_data={"a": [1, 2.5, None], "b": {"c": "d"}},
+        )
+        interface = Interface.objects.create(device=device, name="eth0", mac_address="00:01:02:03:04:05", mtu=1500)
+        prefix = Prefix.objects.create(prefix=IPNetwork("192.0.2.0/24"), site=site)
+        ip_address = IPAddress.objects.create(
+            address=IPNetwork("192.0.2.1/24"), assigned_object=interface, dns_name="host"
+        )
+        config_context = ConfigContext.objects.create(name="Context 1", weight=100, data={"time": str(timezone.now())})
+        config_context.regions.add(region)
+        config_context.sites.add(site)
+
+        for obj in (region, site, device, interface, prefix, ip_address, config_context):
+            self.assertSerializedAsDjango(obj)
+            self.assertSerializedAsDjango(type(obj).objects.get(pk=obj.pk))
+
+
 class GetFiltersetModelTest(TestCase):
     def test_get_filterset_for_model(self):
         self.assertEqual(get_filterset_for_model(Device), DeviceFilterSet)
         self.assertEqual(get_filterset_for_model(Site), SiteFilterSet)
 
 
+class RenderJinja2Test(TestCase):
+    def test_render_jinja2(self):
+        self.assertEqual(
+            render_jinja2("{{ obj.name }} {{ obj.slug|upper }}", {"obj": Site(name="Site 1", slug="a")}), "Site 1 A"
+        )
+
+    def test_render_jinja2_cached(self):
+        get_jinja2_template.cache_clear()
+        for i in range(3):
+            self.assertEqual(render_jinja2("{{ value }}", {"value": i}), str(i))
+        self.assertEqual(render_jinja2("{{ value }}!", {"value": 1}), "1!")
+
+        # Each distinct template is compiled once
+        cache_info = get_jinja2_template.cache_info()
+        self.assertEqual(cache_info.misses, 2)
+        self.assertEqual(cache_info.hits, 2)
+
+    def test_render_jinja2_sandboxed(self):
+        with self.assertRaises(SecurityError):
+            render_jinja2("{{ value.__class__.__subclasses__() }}", {"value": 1})
+
+
+class QuerysetStreamingTest(TestCase):
+    @classmethod
+    def setUpTestData(cls):
+        tag = Tag.objects.create(name="Tag 1", slug="tag-1")
+        for i in range(1, 6):
+            Site.objects.create(name=f"Site {i}", slug=f"site-{i}").tags.add(tag)
+
+    def test_queryset_iterator(self):
+        queryset = Site.objects.prefetch_related("tags").order_by("name")
+        # One query for the sites, and one for the tags of each chunk of sites
+        with self.assertNumQueries(4):
+            sites = list(queryset_iterator(queryset, chunk_size=2))
+            self.assertEqual([site.name for site in sites], [f"Site {i}" for i in range(1, 6)])
+            self.assertEqual({tag.slug for site in sites for tag in site.tags.all()}, {"tag-1"})
+
+    def test_get_streaming_queryset(self):
+        queryset = get_streaming_queryset(Site.objects.order_by("name"))
+        self.assertEqual([site.name for site in queryset], [f"Site {i}" for i in range(1, 6)])
+        # Iterating does not fetch all objects at once into the queryset's result cache
+        self.assertIsNone(queryset._result_cache)
+        self.assertEqual([site.name for site in queryset.filter(name="Site 2")], ["Site 2"])
+        self.assertEqual(queryset.count(), 5)
+
+    def test_buffer_stream(self):
+        self.assertEqual(list(buffer_stream(["a", "bc", "d", "ef", "g"], size=3)), ["abc", "def", "g"])
+        self.assertEqual(list(buffer_stream([], size=3)), [])
+
+
 class IsTruthyTest(TestCase):
     def test_is_truthy(self):
         self.assertTrue(is_truthy("true"))
@@ -1,16 +1,20 @@
 import datetime
+import decimal
+import functools
 import json
 import inspect
 from importlib import import_module
 from collections import OrderedDict, namedtuple
-from itertools import count, groupby
+from itertools import count, groupby, islice
 from distutils.util import strtobool
 
 from django.conf import settings
-from django.core.serializers import serialize
-from django.db.models import Count, OuterRef, Subquery, Model
+from django.core.serializers.json import DjangoJSONEncoder
+from django.db.models import Count, Field, OuterRef, Subquery, Model, prefetch_related_objects
 from django.db.models.functions import Coalesce
-from jinja2 import Environment
+from django.utils.encoding import is_protected_type
+from jinja2 import meta
+from jinja2.sandbox import SandboxedEnvironment
 
 from nautobot.dcim.choices import CableLengthUnitChoices
 from nautobot.extras.utils import is_taggable
@@ -106,15 +110,86 @@ def count_related(model, field):
     return Coalesce(subquery, 0)
 
 
+_json_encoder = DjangoJSONEncoder()
+
+
+def _get_json_value(value):
+    """
+    Return `value` as it would be represented once encoded as JSON by Django's serializers and decoded again.
+    """
+    if value is None or type(value) in (str, int, bool, float):
+        return value
+    if isinstance(value, (datetime.date, datetime.time, decimal.Decimal)):
+        return _json_encoder.default(value)
+    return json.loads(json.dumps(value, cls=DjangoJSONEncoder))
+
+
+def _get_field_extractor(field):
+    """
+    Return a function which extracts the value of `field` from an instance, as represented by Django's serializers.
+    """
+    if field.many_to_many:
+        extract_pk = _get_field_extractor(field.remote_field.model._meta.pk)
+
+        def extract_m2m(obj):
+            related_objects = getattr(obj, "_prefetched_objects_cache", {}).get(field.name)
+            if related_objects is None:
+                related_objects = getattr(obj, field.name).only("pk").iterator()
+            return [extract_pk(related_obj) for related_obj in related_objects]
+
+        return extract_m2m
+
+    if (
+        type(field).value_from_object is Field.value_from_object
+        and type(field).value_to_string is Field.value_to_string
+    ):
+        attname = field.attname
+
+        def extract(obj):
+            value = getattr(obj, attname)
+            if value is None or type(value) in (str, int, bool, float):
+                return value
+            return _get_json_value(value if is_protected_type(value) else str(value))
+
+        return extract
+
+    def extract_custom(obj):
+        value = field.value_from_object(obj)
+        return _get_json_value(value if is_protected_type(value) else field.value_to_string(obj))
+
+    return extract_custom
+
+
+@functools.lru_cache(maxsize=None)
+def get_object_data_extractors(model):
+    """
+    Return a list of `(name, extractor)` tuples for the fields of `model` included by Django's serializers, in the same
+    order, other than private fields (prefaced with an underscore) besides `_custom_field_data`. Each extractor returns
+    the value of its field for a given instance as it would be represented by `serialize("json", [instance])`. The
+    list is compiled once for each model.
+    """
+    concrete_model = model._meta.concrete_model
+    fields = [field for field in concrete_model._meta.local_fields if field.serialize]
+    fields += [
+        field
+        for field in concrete_model._meta.local_many_to_many
+        if field.serialize and field.remote_field.through._meta.auto_created
+    ]
+    return [
+        (field.name, _get_field_extractor(field))
+        for field in fields
+        if not field.name.startswith("_") or field.name == "_custom_field_data"
+    ]
+
+
 def serialize_object(obj, extra=None, exclude=None):
     """
-    Return a generic JSON representation of an object using Django's built-in serializer. (This is used for things like
-    change logging, not the REST API.) Optionally include a dictionary to supplement the object data. A list of keys
-    can be provided to exclude them from the returned dictionary. Private fields (prefaced with an underscore) are
-    implicitly excluded.
+    Return a generic JSON representation of an object, identical to that produced by Django's built-in serializer.
+    (This is used for things like change logging, not the REST API.) Optionally include a dictionary to supplement
+    the object data. A list of keys can be provided to exclude them from the returned dictionary. Private fields
+    (prefaced with an underscore) are implicitly excluded.
     """
-    json_str = serialize("json", [obj])
-    data = json.loads(json_str)[0]["fields"]
+    data = {name: extract(obj) for name, extract in get_object_data_extractors(type(obj))}
 
     # Include custom_field_data as "custom_fields"
     if hasattr(obj, "_custom_field_data"):
@@ -122,7 +197,7 @@ def serialize_object(obj, extra=None, exclude=None):
 
     # Include any tags. Check for tags cached on the instance; fall back to using the manager.
     if is_taggable(obj):
-        tags = getattr(obj, "_tags", obj.tags.all())
+        tags = obj._tags if hasattr(obj, "_tags") else obj.tags.all()
         data["tags"] = [tag.name for tag in tags]
 
     # Append any extra data
@@ -226,11 +301,112 @@ def to_meters(length, unit):
     raise ValueError("Unknown unit {}. Must be 'm', 'cm', 'ft', or 'in'.".format(unit))
 
 
+# The number of compiled Jinja2 templates kept for reuse by render_jinja2()
+JINJA2_TEMPLATE_CACHE_SIZE = 1024
+
+# Templates are user-defined (custom links, export templates, webhooks), so they are rendered within a sandbox which
+# denies access to unsafe attributes, such as those beginning with an underscore.
+_jinja2_environment = SandboxedEnvironment()
+
+
+@functools.lru_cache(maxsize=JINJA2_TEMPLATE_CACHE_SIZE)
+def get_jinja2_template(template_code):
+    """
+    Return the compiled Jinja2 template for the given source code. The most recently used templates are cached, keyed
+    by their source, so a template is compiled again only once it has been evicted; a template whose source has been
+    changed is simply compiled anew, while its previous version ages out of the cache.
+    """
+    return _jinja2_environment.from_string(source=template_code)
+
+
+@functools.lru_cache(maxsize=JINJA2_TEMPLATE_CACHE_SIZE)
+def get_jinja2_template_variables(template_code):
+    """
+    Return the names of the variables which the given template source takes from its context, as a frozenset.
+
+    Raises:
+        TemplateSyntaxError: if the template source is invalid
+    """
+    return frozenset(meta.find_undeclared_variables(_jinja2_environment.parse(template_code)))
+
+
 def render_jinja2(template_code, context):
     """
     Render a Jinja2 template with the provided context. Return the rendered content.
     """
-    return Environment().from_string(source=template_code).render(**context)
+    return get_jinja2_template(template_code).render(**context)
+
+
+# The number of objects fetched from the database at a time when streaming a queryset
+STREAM_CHUNK_SIZE = 2000
+
+# The minimum size of each piece of content (other than the last) written by a streaming response
+STREAM_BUFFER_SIZE = 64 * 1024
+
+
+def queryset_iterator(queryset, chunk_size=STREAM_CHUNK_SIZE):
+    """
+    Iterate over the objects of a queryset without loading them all into memory, fetching `chunk_size` objects at a
+    time (from a server-side cursor where supported). Unlike `QuerySet.iterator()`, any `prefetch_related()` lookups of
+    the queryset are applied, to each chunk of objects in turn.
+    """
+    lookups = queryset._prefetch_related_lookups
+    iterator = queryset.iterator(chunk_size=chunk_size)
+    if not lookups:
+        yield from iterator
+        return
+
+    while True:
+        chunk = list(islice(iterator, chunk_size))
+        if not chunk:
+            break
+        prefetch_related_objects(chunk, *lookups)
+        yield from chunk
+
+
+class StreamingQuerySetMixin:
+    """
+    Makes iterating over a queryset use `queryset_iterator()` rather than fetching and caching all of its objects, so
+    that a template which iterates over a large queryset may be rendered in constant memory.
+    """
+
+    def __iter__(self):
+        if self._result_cache is None:
+            return queryset_iterator(self)
+        return super().__iter__()
+
+
+@functools.lru_cache(maxsize=None)
+def _get_streaming_queryset_class(queryset_class):
+    return type(f"Streaming{queryset_class.__name__}", (StreamingQuerySetMixin, queryset_class), {})
+
+
+def get_streaming_queryset(queryset):
+    """
+    Return a copy of the given queryset whose objects are streamed from the database whenever it is iterated over.
+    Querysets derived from it (e.g. by filtering) stream their objects as well.
+    """
+    queryset = queryset.all()
+    queryset.__class__ = _get_streaming_queryset_class(queryset.__class__)
+    return queryset
+
+
+def buffer_stream(chunks, size=STREAM_BUFFER_SIZE):
+    """
+    Join the strings yielded by `chunks` into fewer, larger strings of at least `size` characters (except the last),
+    to avoid writing many small pieces of content to a streaming response.
+    """
+    buffer = []
+    length = 0
+    for chunk in chunks:
+        buffer.append(chunk)
+        length += len(chunk)
+        if length >= size:
+            yield "".join(buffer)
+            buffer = []
+            length = 0
+    if buffer:
+        yield "".join(buffer)
 
 
 def prepare_cloned_fields(instance):
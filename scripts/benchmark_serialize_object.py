@@ -0,0 +1,81 @@
+#!/usr/bin/env python
+"""
+Benchmark the per-object cost of serialize_object(), as used by change logging, against its previous implementation,
+which round-tripped each object through Django's JSON serializer. Objects are read from the configured database, so
+it should contain some objects of each benchmarked model.
+
+Usage:
+
+    NAUTOBOT_CONFIG=/path/to/nautobot_config.py python scripts/benchmark_serialize_object.py [--count 1000]
+"""
+import argparse
+import json
+import time
+
+import nautobot
+
+nautobot.setup()
+
+import django  # noqa: E402
+
+django.setup()
+
+from django.core.serializers import serialize  # noqa: E402
+
+from nautobot.circuits.models import Circuit  # noqa: E402
+from nautobot.dcim.models import Cable, Device, Interface, Site  # noqa: E402
+from nautobot.extras.utils import is_taggable  # noqa: E402
+from nautobot.ipam.models import IPAddress, Prefix  # noqa: E402
+from nautobot.utilities.utils import serialize_object  # noqa: E402
+
+MODELS = (Cable, Circuit, Device, Interface, IPAddress, Prefix, Site)
+
+
+def serialize_object_with_django(obj):
+    """
+    The previous implementation of serialize_object().
+    """
+    data = json.loads(serialize("json", [obj]))[0]["fields"]
+    if hasattr(obj, "_custom_field_data"):
+        data["custom_fields"] = data.pop("_custom_field_data")
+    if is_taggable(obj):
+        data["tags"] = [tag.name for tag in obj.tags.all()]
+    return {key: value for key, value in data.items() if not key.startswith("_")}
+
+
+def benchmark(function, objects):
+    """
+    Return the mean time in microseconds taken by `function` for each of `objects`.
+    """
+    start = time.perf_counter()
+    for obj in objects:
+        function(obj)
+    return (time.perf_counter() - start) / len(objects) * 1e6
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.strip().splitlines()[0])
+    parser.add_argument("--count", type=int, default=1000, help="Number of objects of each model to serialize")
+    args = parser.parse_args()
+
+    print(f"{'Model':<12} {'Objects':>8} {'Django (us)':>12} {'Extractor (us)':>15} {'Speedup':>8}")
+    for model in MODELS:
+        # Prefetch related objects, as change logging does for tags (Django's serializer queries for them regardless)
+        queryset = model.objects.prefetch_related(*[field.name for field in model._meta.many_to_many])
+        objects = list(queryset[: args.count])
+        if not objects:
+            continue
+        for obj in objects:
+            if serialize_object(obj) != serialize_object_with_django(obj):
+                raise SystemExit(f"serialize_object() differs from Django's serializer for {model.__name__} {obj.pk}")
+
+        django_time = benchmark(serialize_object_with_django, objects)
+        extractor_time = benchmark(serialize_object, objects)
+        print(
+            f"{model.__name__:<12} {len(objects):>8} {django_time:>12.1f} {extractor_time:>15.1f} "
+            f"{django_time / extractor_time:>7.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()